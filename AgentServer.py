@@ -0,0 +1,250 @@
+# AgentServer.py
+#
+# Long-lived asyncio server that plays Python agents for many concurrent game sessions, and a
+# load generator that plays the simulator side against it.
+#
+# Usage: python AgentServer.py serve [-agent <module>] [-socket <path> | -port N]
+#        python AgentServer.py load [-socket <path> | -port N] [-sessions N] [-trials N]
+#                                   [-tries N] [-size N] [-seed N]
+#
+# A session is one connection (Unix domain socket, or TCP on localhost) and one new Agent of
+# the served module, created when the connection is accepted and dropped when it closes, as
+# pywumpsim does with PyAgent_Constructor and PyAgent_Destructor. The client sends single
+# bytes: a packed percept (Percept.STENCH | Percept.BREEZE | ..., below 32), answered by one
+# byte holding the action; INITIALIZE, which starts a try; or GAME_OVER followed by the score
+# (signed 32-bit, little-endian). Only percepts are answered. A byte that is none of these, or
+# an agent error, ends the session. The agent module is imported once, so sessions do not pay
+# for interpreter startup and imports; agents still share module-level state such as the
+# random module and Instrumentation.default (which serve sets to SILENT).
+#
+# load runs -trials trials (a new session and random world of -size each, -tries tries per
+# trial) over -sessions concurrent connections (the worlds are those of ParallelRunner -random
+# with the same -size and -seed), and reports the average score, moves and games per second,
+# and the round-trip latency of each percept (p50/p95/p99 from a Profiling.Histogram).
+
+import os
+import sys
+import stat
+import time
+import random
+import struct
+import asyncio
+import importlib
+import Profiling
+import WumpusWorld
+import Instrumentation
+from Percept import internedPercepts
+
+INITIALIZE = 0x40
+GAME_OVER = 0x41
+
+scoreStruct = struct.Struct("<i")
+
+DEFAULT_PORT = 7780
+MAX_MOVES_PER_GAME = 1000 # As in wumpsim
+
+class AgentServer:
+
+	def __init__(self, agentClass):
+		self.agentClass = agentClass
+		self.numSessions = 0 # Open sessions
+		self.totalSessions = 0
+		self.numMoves = 0
+
+	async def Session (self, reader, writer):
+		self.numSessions += 1
+		self.totalSessions += 1
+		agent = None
+		pending = b"" # Start of a GAME_OVER message split across reads
+		try:
+			agent = self.agentClass()
+			while (True):
+				data = await reader.read(65536)
+				if (not data):
+					break
+				data = pending + data
+				pending = b""
+				actions = bytearray()
+				index = 0
+				while (index < len(data)):
+					message = data[index]
+					if (message < 32):
+						actions.append(agent.Process(internedPercepts[message]))
+						index += 1
+					elif (message == INITIALIZE):
+						agent.Initialize()
+						index += 1
+					elif (message == GAME_OVER):
+						if (index + 1 + scoreStruct.size > len(data)):
+							pending = data[index:]
+							break
+						agent.GameOver(scoreStruct.unpack_from(data, index + 1)[0])
+						index += 1 + scoreStruct.size
+					else:
+						raise ValueError("unknown message " + str(message))
+				if (actions):
+					self.numMoves += len(actions)
+					writer.write(actions)
+					await writer.drain()
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass
+		except Exception as exception:
+			sys.stderr.write("Session ended by " + type(exception).__name__ + ": " + str(exception) + "\n")
+		finally:
+			self.numSessions -= 1
+			del agent
+			writer.close()
+
+	# A stale socket left at socketPath by an earlier server is removed; any other file there is
+	# left alone and FileExistsError is raised.
+	async def Serve (self, socketPath = None, port = DEFAULT_PORT):
+		if (socketPath is not None):
+			try:
+				if (not stat.S_ISSOCK(os.lstat(socketPath).st_mode)):
+					raise FileExistsError(socketPath + " exists and is not a socket")
+				os.unlink(socketPath)
+			except FileNotFoundError:
+				pass
+			server = await asyncio.start_unix_server(self.Session, path = socketPath)
+		else:
+			server = await asyncio.start_server(self.Session, host = "127.0.0.1", port = port)
+		async with server:
+			await server.serve_forever()
+
+async def Connect (socketPath = None, port = DEFAULT_PORT):
+	if (socketPath is not None):
+		return await asyncio.open_unix_connection(socketPath)
+	return await asyncio.open_connection("127.0.0.1", port)
+
+# Load generator
+
+class LoadGenerator:
+
+	def __init__(self, socketPath = None, port = DEFAULT_PORT, worldSize = 4, numTries = 1, seed = 1):
+		self.socketPath = socketPath
+		self.port = port
+		self.worldSize = worldSize
+		self.numTries = numTries
+		self.seed = seed
+		self.latency = Profiling.Histogram()
+		self.scores = []
+		self.numMoves = 0
+		self.errors = 0
+
+	# Plays one trial, numTries games of world trial, in a new session. As in ParallelRunner,
+	# the scores of trials whose session failed are left out.
+	async def PlayTrial (self, trial):
+		wumpusWorld = WumpusWorld.WumpusWorld(size = self.worldSize, rng = random.Random(self.seed + trial))
+		reader, writer = await Connect(self.socketPath, self.port)
+		scores = []
+		try:
+			for tries in range(self.numTries):
+				wumpusWorld.Initialize()
+				writer.write(bytes([INITIALIZE]))
+				numMoves = 0
+				while ((not wumpusWorld.GameOver()) and (numMoves < MAX_MOVES_PER_GAME)):
+					writer.write(bytes([wumpusWorld.GetPerceptBits()]))
+					startTime = time.perf_counter()
+					action = (await reader.readexactly(1))[0]
+					self.latency.Add(time.perf_counter() - startTime)
+					wumpusWorld.ExecuteAction(action)
+					numMoves += 1
+				score = wumpusWorld.GetScore()
+				writer.write(bytes([GAME_OVER]) + scoreStruct.pack(score))
+				scores.append(score)
+				self.numMoves += numMoves
+			self.scores += scores
+		except (ConnectionError, asyncio.IncompleteReadError):
+			self.errors += 1
+		finally:
+			writer.close()
+
+	# Runs numTrials trials over numSessions concurrent sessions.
+	async def Run (self, numTrials, numSessions):
+		trials = iter(range(numTrials))
+		async def Worker ():
+			for trial in trials:
+				await self.PlayTrial(trial)
+		await asyncio.gather(*[Worker() for session in range(min(numSessions, numTrials))])
+
+def main (argv):
+	if (len(argv) < 2):
+		print("usage: python AgentServer.py serve|load [options]")
+		return 1
+	command = argv[1]
+	agentModule = "Agent"
+	socketPath = None
+	port = DEFAULT_PORT
+	numSessions = 16
+	numTrials = 100
+	numTries = 1
+	worldSize = 4
+	seed = 1
+
+	# Process command-line options
+	i = 2
+	while (i < len(argv)):
+		if (argv[i] == "-agent"):
+			i += 1
+			agentModule = argv[i]
+		elif (argv[i] == "-socket"):
+			i += 1
+			socketPath = argv[i]
+		elif (argv[i] == "-port"):
+			i += 1
+			port = int(argv[i])
+		elif (argv[i] == "-sessions"):
+			i += 1
+			numSessions = int(argv[i])
+		elif (argv[i] == "-trials"):
+			i += 1
+			numTrials = int(argv[i])
+		elif (argv[i] == "-tries"):
+			i += 1
+			numTries = int(argv[i])
+		elif (argv[i] == "-size"):
+			i += 1
+			worldSize = max(int(argv[i]), 2)
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+
+	if (command == "serve"):
+		Instrumentation.default.level = Instrumentation.SILENT
+		Instrumentation.default.statsFile = None
+		server = AgentServer(importlib.import_module(agentModule).Agent)
+		sys.stderr.write("Serving " + agentModule + " on " + (socketPath or ("127.0.0.1:" + str(port))) + "\n")
+		try:
+			asyncio.run(server.Serve(socketPath, port))
+		except KeyboardInterrupt:
+			pass
+		except FileExistsError as exception:
+			sys.stderr.write(str(exception) + "\n")
+			return 1
+		sys.stderr.write(str(server.totalSessions) + " sessions, " + str(server.numMoves) + " moves\n")
+	elif (command == "load"):
+		loadGenerator = LoadGenerator(socketPath, port, worldSize, numTries, seed)
+		startTime = time.perf_counter()
+		asyncio.run(loadGenerator.Run(numTrials, numSessions))
+		seconds = time.perf_counter() - startTime
+		latency = loadGenerator.latency.Summary()
+		numGames = len(loadGenerator.scores)
+		print(str(numGames) + " games, " + str(loadGenerator.numMoves) + " moves in " + "%.3f" % seconds + " s (" +
+			  "%.0f" % (numGames / seconds) + " games/s, " + "%.0f" % (loadGenerator.numMoves / seconds) + " moves/s), " +
+			  str(loadGenerator.errors) + " sessions failed")
+		if (numGames):
+			print("Average score = " + "%g" % (sum(loadGenerator.scores) / numGames))
+		if (latency["calls"]):
+			print("Round trip: p50 " + "%.3f" % (latency["p50"] * 1000) + " ms, p95 " + "%.3f" % (latency["p95"] * 1000) +
+				  " ms, p99 " + "%.3f" % (latency["p99"] * 1000) + " ms, max " + "%.3f" % (latency["max"] * 1000) + " ms")
+	else:
+		print("unknown command " + command)
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -0,0 +1,288 @@
+# BatchSimulation.py
+#
+# Vectorized wumpus world simulation: N independent games played in lockstep with NumPy.
+#
+# Usage: python BatchSimulation.py [-episodes N] [-batch N] [-size N] [-seed N]
+#
+# BatchWorld holds the worlds (pit, stench and breeze grids, wumpus and gold locations) and the
+# game state of every episode as arrays, computes all percepts and applies all actions in one
+# step, and scores the episodes with the same rules as WumpusWorld.py. A batch policy plays all
+# episodes at once: Initialize(batchWorld) is called before the first step, Process(percepts)
+# receives a BatchPercept of boolean arrays and returns an array of actions, and Keep(indices)
+# drops the state of finished episodes as BatchWorld.Keep does.
+# ReflexPolicy is ReflexAgent.Agent written against this interface. Requires NumPy.
+
+import sys
+import math
+import statistics
+import numpy
+import Action
+import Orientation
+
+PIT_PROBABILITY = 0.2
+MAX_MOVES_PER_GAME = 1000
+
+# Movement for each orientation (RIGHT, UP, LEFT, DOWN). Turning left adds 1 to the
+# orientation and turning right subtracts 1 (mod 4).
+moveX = numpy.array([1, 0, -1, 0])
+moveY = numpy.array([0, 1, 0, -1])
+
+class BatchPercept:
+
+	def __init__(self, stench, breeze, glitter, bump, scream):
+		self.stench = stench
+		self.breeze = breeze
+		self.glitter = glitter
+		self.bump = bump
+		self.scream = scream
+
+class BatchWorld:
+
+	# sizes, wumpusX/Y and goldX/Y are int arrays of length N; pits is a boolean array of shape
+	# (N, maxSize + 2, maxSize + 2) indexed by [episode, x, y], with a border of empty cells.
+	def __init__(self, sizes, wumpusX, wumpusY, goldX, goldY, pits):
+		self.numEpisodes = len(sizes)
+		self.worlds = tuple([numpy.asarray(values) for values in (sizes, wumpusX, wumpusY, goldX, goldY)])
+		self.sizes, self.wumpusX, self.wumpusY, self.goldX, self.goldY = self.worlds
+		self.pits = numpy.asarray(pits, dtype = bool)
+		self.episodes = numpy.arange(self.numEpisodes)
+		# Breeze next to a pit; stench next to or at the wumpus (alive or dead).
+		self.breezes = numpy.zeros_like(self.pits)
+		self.breezes[:, 1:, :] |= self.pits[:, :-1, :]
+		self.breezes[:, :-1, :] |= self.pits[:, 1:, :]
+		self.breezes[:, :, 1:] |= self.pits[:, :, :-1]
+		self.breezes[:, :, :-1] |= self.pits[:, :, 1:]
+		self.stenches = numpy.zeros_like(self.pits)
+		for offsetX, offsetY in ((0,0), (1,0), (-1,0), (0,1), (0,-1)):
+			self.stenches[self.episodes, self.wumpusX + offsetX, self.wumpusY + offsetY] = True
+		self.Initialize()
+
+	# Random worlds generated as WumpusWorld does: wumpus and gold anywhere but [1,1], and a pit
+	# in each other location with probability PIT_PROBABILITY.
+	@classmethod
+	def Generate (cls, numEpisodes, size, rng):
+		sizes = numpy.full(numEpisodes, size)
+		wumpusCell = rng.integers(1, size * size, numEpisodes)
+		goldCell = rng.integers(1, size * size, numEpisodes)
+		pits = numpy.zeros((numEpisodes, size + 2, size + 2), dtype = bool)
+		pits[:, 1:size + 1, 1:size + 1] = rng.random((numEpisodes, size, size)) < PIT_PROBABILITY
+		pits[:, 1, 1] = False
+		return cls(sizes, wumpusCell // size + 1, wumpusCell % size + 1, goldCell // size + 1, goldCell % size + 1, pits)
+
+	# Batch of the given WumpusWorld.WumpusWorld worlds (e.g. read from world files).
+	@classmethod
+	def FromWorlds (cls, worlds):
+		maxSize = max([world.worldSize for world in worlds])
+		pits = numpy.zeros((len(worlds), maxSize + 2, maxSize + 2), dtype = bool)
+		for episode, world in enumerate(worlds):
+			for x,y in world.pitLocations:
+				pits[episode, x, y] = True
+		return cls([world.worldSize for world in worlds],
+				   [world.wumpusLocation[0] for world in worlds], [world.wumpusLocation[1] for world in worlds],
+				   [world.goldLocation[0] for world in worlds], [world.goldLocation[1] for world in worlds], pits)
+
+	# Starts every episode. The per-episode arrays then hold all numEpisodes episodes, in order.
+	def Initialize (self):
+		numEpisodes = self.numEpisodes
+		self.episodes = numpy.arange(numEpisodes)
+		self.sizes, self.wumpusX, self.wumpusY, self.goldX, self.goldY = self.worlds
+		self.numActions = numpy.zeros(numEpisodes, dtype = int)
+		self.agentX = numpy.ones(numEpisodes, dtype = int)
+		self.agentY = numpy.ones(numEpisodes, dtype = int)
+		self.agentOrientation = numpy.full(numEpisodes, Orientation.RIGHT)
+		self.agentAlive = numpy.ones(numEpisodes, dtype = bool)
+		self.agentHasArrow = numpy.ones(numEpisodes, dtype = bool)
+		self.agentHasGold = numpy.zeros(numEpisodes, dtype = bool)
+		self.agentInCave = numpy.ones(numEpisodes, dtype = bool)
+		self.wumpusAlive = numpy.ones(numEpisodes, dtype = bool)
+		self.stench = self.stenches[self.episodes, 1, 1].copy()
+		self.breeze = self.breezes[self.episodes, 1, 1].copy()
+		self.glitter = (self.goldX == 1) & (self.goldY == 1)
+		self.bump = numpy.zeros(numEpisodes, dtype = bool)
+		self.scream = numpy.zeros(numEpisodes, dtype = bool)
+
+	# Keeps only the given episodes (indices into the current per-episode arrays), so finished
+	# episodes no longer cost anything per step. self.episodes maps back to the original episodes.
+	def Keep (self, indices):
+		for name in ("episodes", "sizes", "wumpusX", "wumpusY", "goldX", "goldY", "numActions", "agentX", "agentY",
+					 "agentOrientation", "agentAlive", "agentHasArrow", "agentHasGold", "agentInCave", "wumpusAlive",
+					 "stench", "breeze", "glitter", "bump", "scream"):
+			setattr(self, name, getattr(self, name)[indices])
+
+	def GetPercepts (self):
+		return BatchPercept(self.stench, self.breeze, self.glitter, self.bump, self.scream)
+
+	# Episodes that are over (agent dead or out of the cave).
+	def GameOver (self):
+		return ~(self.agentAlive & self.agentInCave)
+
+	# Applies one action per episode; episodes that are over or not in active are left alone.
+	def ExecuteActions (self, actions, active = None):
+		if (active is None):
+			active = ~self.GameOver()
+		actions = numpy.asarray(actions)
+		self.numActions += active
+		self.bump = numpy.zeros(len(self.episodes), dtype = bool)
+		self.scream = numpy.zeros(len(self.episodes), dtype = bool)
+		atGold = (self.agentX == self.goldX) & (self.agentY == self.goldY)
+
+		forward = active & (actions == Action.GOFORWARD)
+		if (forward.any()):
+			x = self.agentX + moveX[self.agentOrientation]
+			y = self.agentY + moveY[self.agentOrientation]
+			inside = (x >= 1) & (x <= self.sizes) & (y >= 1) & (y <= self.sizes)
+			moved = forward & inside
+			self.agentX = numpy.where(moved, x, self.agentX)
+			self.agentY = numpy.where(moved, y, self.agentY)
+			self.bump = forward & ~inside
+			atGold = (self.agentX == self.goldX) & (self.agentY == self.goldY)
+			self.glitter = numpy.where(forward, ~self.agentHasGold & atGold, self.glitter)
+			self.stench = numpy.where(forward, self.stenches[self.episodes, self.agentX, self.agentY], self.stench)
+			self.breeze = numpy.where(forward, self.breezes[self.episodes, self.agentX, self.agentY], self.breeze)
+			# Check for death by pit or wumpus
+			atWumpus = (self.agentX == self.wumpusX) & (self.agentY == self.wumpusY)
+			self.agentAlive &= ~(forward & (self.pits[self.episodes, self.agentX, self.agentY] | (self.wumpusAlive & atWumpus)))
+
+		turnLeft = active & (actions == Action.TURNLEFT)
+		turnRight = active & (actions == Action.TURNRIGHT)
+		self.agentOrientation = (self.agentOrientation + turnLeft - turnRight) % 4
+
+		grab = active & (actions == Action.GRAB) & ~self.agentHasGold & atGold
+		self.agentHasGold |= grab
+		self.glitter &= ~grab
+
+		shoot = active & (actions == Action.SHOOT) & self.agentHasArrow
+		self.agentHasArrow &= ~shoot
+		orientation = self.agentOrientation
+		inLineOfFire = (((orientation == Orientation.RIGHT) & (self.agentX < self.wumpusX) & (self.agentY == self.wumpusY)) |
+						((orientation == Orientation.UP) & (self.agentX == self.wumpusX) & (self.agentY < self.wumpusY)) |
+						((orientation == Orientation.LEFT) & (self.agentX > self.wumpusX) & (self.agentY == self.wumpusY)) |
+						((orientation == Orientation.DOWN) & (self.agentX == self.wumpusX) & (self.agentY > self.wumpusY)))
+		killed = shoot & self.wumpusAlive & inLineOfFire
+		self.wumpusAlive &= ~killed
+		self.scream = killed
+
+		climb = active & (actions == Action.CLIMB) & (self.agentX == 1) & (self.agentY == 1)
+		self.agentInCave &= ~climb
+		self.stench &= ~climb
+		self.breeze &= ~climb
+		self.glitter &= ~climb
+
+	def GetScores (self):
+		return (-self.numActions - 9 * ~self.agentHasArrow + 1000 * (self.agentHasGold & ~self.agentInCave) -
+				1000 * ~self.agentAlive)
+
+	# Plays every episode to the end (or MAX_MOVES_PER_GAME moves) and returns the scores of all
+	# numEpisodes episodes. Once fewer than half the remaining episodes are still being played,
+	# the finished ones are scored and dropped from both the world and the policy.
+	def Run (self, policy):
+		self.Initialize()
+		policy.Initialize(self)
+		scores = numpy.zeros(self.numEpisodes, dtype = int)
+		for move in range(MAX_MOVES_PER_GAME):
+			active = ~self.GameOver()
+			numActive = int(active.sum())
+			if (numActive == 0):
+				break
+			if (numActive * 2 < len(active)):
+				scores[self.episodes[~active]] = self.GetScores()[~active]
+				indices = numpy.flatnonzero(active)
+				self.Keep(indices)
+				policy.Keep(indices)
+				active = active[indices]
+			self.ExecuteActions(policy.Process(self.GetPercepts()), active)
+		scores[self.episodes] = self.GetScores()
+		return scores
+
+# ReflexAgent.Agent as a batch policy: grab on glitter, climb with the gold at [1,1], shoot on
+# the first stench, otherwise turn left, turn right or go forward at random, tracking the
+# believed position on a gridSize x gridSize grid.
+class ReflexPolicy:
+
+	def __init__(self, rng, gridSize = 4):
+		self.rng = rng
+		self.gridSize = gridSize
+
+	def Initialize (self, batchWorld):
+		numEpisodes = batchWorld.numEpisodes
+		self.hasGold = numpy.zeros(numEpisodes, dtype = bool)
+		self.hasArrow = numpy.ones(numEpisodes, dtype = bool)
+		self.positionX = numpy.ones(numEpisodes, dtype = int)
+		self.positionY = numpy.ones(numEpisodes, dtype = int)
+		self.orientation = numpy.full(numEpisodes, Orientation.RIGHT)
+
+	def Keep (self, indices):
+		for name in ("hasGold", "hasArrow", "positionX", "positionY", "orientation"):
+			setattr(self, name, getattr(self, name)[indices])
+
+	def Process (self, percepts):
+		numEpisodes = len(percepts.glitter)
+		randomActions = numpy.array([Action.TURNLEFT, Action.TURNRIGHT, Action.GOFORWARD])[self.rng.integers(0, 3, numEpisodes)]
+		grab = percepts.glitter
+		climb = ~grab & self.hasGold & (self.positionX == 1) & (self.positionY == 1)
+		shoot = ~grab & ~climb & self.hasArrow & percepts.stench
+		move = ~(grab | climb | shoot)
+		actions = numpy.where(grab, Action.GRAB, numpy.where(climb, Action.CLIMB, numpy.where(shoot, Action.SHOOT, randomActions)))
+		self.hasGold |= grab
+		self.hasArrow &= ~shoot
+		turnLeft = move & (actions == Action.TURNLEFT)
+		turnRight = move & (actions == Action.TURNRIGHT)
+		forward = move & (actions == Action.GOFORWARD)
+		self.orientation = (self.orientation + turnLeft - turnRight) % 4
+		self.positionX = numpy.where(forward, numpy.clip(self.positionX + moveX[self.orientation], 1, self.gridSize), self.positionX)
+		self.positionY = numpy.where(forward, numpy.clip(self.positionY + moveY[self.orientation], 1, self.gridSize), self.positionY)
+		return actions
+
+# Mean, variance, standard error and a normal-approximation confidence interval of the scores.
+def ScoreSummary (scores, confidence = 0.95):
+	scores = numpy.asarray(scores, dtype = float)
+	mean = float(scores.mean())
+	variance = float(scores.var(ddof = 1)) if (len(scores) > 1) else 0.0
+	standardError = math.sqrt(variance / len(scores))
+	halfWidth = statistics.NormalDist().inv_cdf(0.5 + confidence / 2) * standardError
+	return {"episodes": len(scores), "mean": mean, "variance": variance, "standardError": standardError,
+			"confidence": confidence, "confidenceInterval": (mean - halfWidth, mean + halfWidth)}
+
+# Plays numEpisodes random size x size worlds in batches of batchSize with ReflexPolicy.
+def RunReflexEpisodes (numEpisodes, batchSize = 10000, size = 4, seed = None):
+	rng = numpy.random.default_rng(seed)
+	scores = []
+	while (len(scores) < numEpisodes):
+		batchWorld = BatchWorld.Generate(min(batchSize, numEpisodes - len(scores)), size, rng)
+		scores.extend(batchWorld.Run(ReflexPolicy(rng, gridSize = size)).tolist())
+	return scores
+
+def main (argv):
+	numEpisodes = 100000
+	batchSize = 10000
+	size = 4
+	seed = None
+
+	# Process command-line options
+	i = 1
+	while (i < len(argv)):
+		if (argv[i] == "-episodes"):
+			i += 1
+			numEpisodes = int(argv[i])
+		elif (argv[i] == "-batch"):
+			i += 1
+			batchSize = int(argv[i])
+		elif (argv[i] == "-size"):
+			i += 1
+			size = max(int(argv[i]), 2)
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+
+	summary = ScoreSummary(RunReflexEpisodes(numEpisodes, batchSize, size, seed))
+	print("Episodes = " + str(summary["episodes"]))
+	print("Mean score = %.3f, variance = %.3f, standard error = %.3f" % (summary["mean"], summary["variance"], summary["standardError"]))
+	print("%g%% confidence interval = [%.3f, %.3f]" % ((summary["confidence"] * 100,) + summary["confidenceInterval"]))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
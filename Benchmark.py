@@ -0,0 +1,323 @@
+# Benchmark.py
+#
+# Latency benchmarks for the search engine and the Python agents.
+#
+# Usage: python Benchmark.py [-sizes N,N,...] [-queries N] [-engines <engine>,...]
+#                            [-agents <module>,...] [-tries N] [-seed N] [-save <file>]
+#                            [-compare <file>] [-threshold F]
+#
+# Search: for each size (default 4 to 200) a sparse, a dense and an open (all safe) random map
+# of safe cells is built, and FindPath (path cache disabled) of each engine in -engines (see
+# searchEngines; default all) is timed from [1,1] to -queries goals drawn from the cells
+# reachable from [1,1], after one untimed search to build the tables. Benchmarks of engines
+# other than "heap" (Search.SearchEngine) are named with the engine's name appended.
+# Agents: each agent plays every world under test_worlds for -tries tries while its percepts
+# are recorded; a new agent then replays the recorded percepts, and each Process call is
+# timed (random is seeded the same way for both runs, so the replay makes the same decisions).
+# Worlds on which an agent raises an exception are skipped.
+#
+# Reported: p50/p95/p99 latency, nodes generated and nodes expanded per second (search), and
+# peak traced memory, measured by a separate pass under tracemalloc (starting without the shared
+# search tables) so that it does not slow the timed pass.
+# -save writes the results as JSON; -compare reads such a file and reports every latency or
+# memory figure more than -threshold (default 0.1, i.e. 10%) worse than the baseline, or nodes
+# per second more than that much lower, and exits with status 1 if there are any.
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import importlib
+import tracemalloc
+import collections
+import Instrumentation
+import Orientation
+import Search
+import JumpSearch
+import WumpusWorld
+import wumpsim
+from Percept import internedPercepts
+
+DEFAULT_SIZES = (4, 8, 16, 32, 64, 100, 200)
+DENSITIES = {"sparse": 0.7, "dense": 0.9, "open": 1.0} # Fraction of cells that are safe
+searchEngines = {"heap": Search.SearchEngine, "jump": JumpSearch.JumpSearchEngine}
+DEFAULT_AGENTS = ("SearchAgent", "WumpusSlayerAgent", "ReflexAgent")
+WORLD_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_worlds")
+
+# Returns the p-th percentile (0 < p <= 100) of the sorted values, by nearest rank.
+def Percentile (sortedValues, p):
+	if (not sortedValues):
+		return None
+	rank = max(int(-(-p * len(sortedValues) // 100)), 1)
+	return sortedValues[rank - 1]
+
+def LatencySummary (seconds):
+	seconds = sorted(seconds)
+	return {"calls": len(seconds), "p50": Percentile(seconds, 50), "p95": Percentile(seconds, 95),
+			"p99": Percentile(seconds, 99), "max": seconds[-1] if seconds else None, "total": sum(seconds)}
+
+# Search benchmark
+
+# Returns the safe cells of a random size x size map (each cell safe with probability density,
+# [1,1] always) and the cells reachable from [1,1] through them.
+def SafeMap (size, density, rng):
+	safeLocations = set([(1,1)])
+	for x in range(1, size + 1):
+		for y in range(1, size + 1):
+			if (rng.random() < density):
+				safeLocations.add((x,y))
+	reachable = set([(1,1)])
+	queue = collections.deque([(1,1)])
+	while (queue):
+		x, y = queue.popleft()
+		for location in ((x+1,y), (x-1,y), (x,y+1), (x,y-1)):
+			if ((location in safeLocations) and (not location in reachable)):
+				reachable.add(location)
+				queue.append(location)
+	return safeLocations, sorted(reachable)
+
+def SearchQueries (size, density, numQueries, rng):
+	safeLocations, reachable = SafeMap(size, density, rng)
+	goals = [rng.choice(reachable) for i in range(numQueries)]
+	return safeLocations, [(list(goal), rng.randrange(4)) for goal in goals]
+
+def RunSearchQueries (engineClass, safeLocations, queries, timed):
+	engine = engineClass(pathCacheSize = 0, heuristic = "turnaware",
+						 instrumentation = Instrumentation.Instrumentation(level = Instrumentation.SILENT))
+	engine.AddSafeLocations(safeLocations)
+	# Untimed first search, which fills the safe cell grid for this map
+	engine.FindPath([1,1], Orientation.RIGHT, [1,1], Orientation.UP)
+	seconds = []
+	generated = 0
+	expanded = 0
+	for goal, goalOrientation in queries:
+		startTime = time.perf_counter()
+		engine.FindPath([1,1], Orientation.RIGHT, goal, goalOrientation)
+		if (timed):
+			seconds.append(time.perf_counter() - startTime)
+		generated += engine.nodeCount
+		expanded += engine.expandedCount
+	return seconds, generated, expanded
+
+def BenchmarkSearch (sizes, numQueries, seed, engineNames = tuple(searchEngines)):
+	results = {}
+	for size in sizes:
+		for densityName, density in DENSITIES.items():
+			rng = random.Random(seed * 1000 + size)
+			safeLocations, queries = SearchQueries(size, density, numQueries, rng)
+			for engineName in engineNames:
+				engineClass = searchEngines[engineName]
+				seconds, generated, expanded = RunSearchQueries(engineClass, safeLocations, queries, True)
+				result = LatencySummary(seconds)
+				result["nodesGenerated"] = generated
+				result["nodesExpanded"] = expanded
+				result["nodesPerSecond"] = expanded / result["total"] if result["total"] else None
+				result["peakMemory"] = PeakMemory(RunSearchQueries, engineClass, safeLocations, queries, False)
+				name = str(size) + "x" + str(size) + " " + densityName
+				if (engineName != "heap"):
+					name += " " + engineName
+				results[name] = result
+	return results
+
+# Agent benchmark
+
+# Plays numTries tries of the world with a new agent, returning the percepts (packed) of each
+# try, or None if the agent raised an exception.
+def RecordPercepts (agentClass, worldFile, numTries, seed):
+	random.seed(seed)
+	wumpusWorld = WumpusWorld.WumpusWorld(worldFile = worldFile)
+	agent = agentClass()
+	tries = []
+	try:
+		for tryIndex in range(numTries):
+			wumpusWorld.Initialize()
+			agent.Initialize()
+			percepts = []
+			while ((not wumpusWorld.GameOver()) and (len(percepts) < wumpsim.MAX_MOVES_PER_GAME)):
+				percepts.append(wumpusWorld.GetPerceptBits())
+				wumpusWorld.ExecuteAction(agent.Process(wumpusWorld.GetPercept()))
+			agent.GameOver(wumpusWorld.GetScore())
+			tries.append((percepts, wumpusWorld.GetScore()))
+	except Exception:
+		return None
+	return tries
+
+# Replays recorded percepts into a new agent; returns the time of each Process call.
+def ReplayPercepts (agentClass, tries, seed, timed):
+	random.seed(seed)
+	agent = agentClass()
+	seconds = []
+	for percepts, score in tries:
+		agent.Initialize()
+		for perceptBits in percepts:
+			percept = internedPercepts[perceptBits]
+			startTime = time.perf_counter()
+			agent.Process(percept)
+			if (timed):
+				seconds.append(time.perf_counter() - startTime)
+		agent.GameOver(score)
+	return seconds
+
+def BenchmarkAgents (agentModules, numTries, seed):
+	worldFiles = []
+	for directory, directories, fileNames in os.walk(WORLD_DIRECTORY):
+		worldFiles += [os.path.join(directory, fileName) for fileName in fileNames if fileName.endswith(".txt")]
+	worldFiles.sort()
+	results = {}
+	for agentModule in agentModules:
+		agentClass = importlib.import_module(agentModule).Agent
+		recordings = []
+		skipped = []
+		for index, worldFile in enumerate(worldFiles):
+			tries = RecordPercepts(agentClass, worldFile, numTries, seed + index)
+			if (tries is None):
+				skipped.append(os.path.relpath(worldFile, WORLD_DIRECTORY))
+			else:
+				recordings.append((seed + index, tries))
+		seconds = []
+		for recordingSeed, tries in recordings:
+			seconds += ReplayPercepts(agentClass, tries, recordingSeed, True)
+		result = LatencySummary(seconds)
+		result["worlds"] = len(recordings)
+		result["skippedWorlds"] = skipped
+		result["peakMemory"] = max([PeakMemory(ReplayPercepts, agentClass, tries, recordingSeed, False)
+									for recordingSeed, tries in recordings] + [0])
+		results[agentModule] = result
+	return results
+
+# Returns the peak memory traced (in bytes) while calling function(*args). The shared search
+# tables are dropped first, so that the tables the call builds are counted even if an earlier
+# (timed) call already built them.
+def PeakMemory (function, *args):
+	Search.ClearHeuristicTables()
+	Search.successorTables.clear()
+	tracemalloc.start()
+	try:
+		function(*args)
+		return tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+# Baselines
+
+# Returns a list of (benchmark, measure, baseline, current) for every figure that got worse by
+# more than threshold (as a fraction of the baseline).
+def Regressions (baseline, results, threshold):
+	regressions = []
+	for section in ("search", "agents"):
+		for name, result in results.get(section, {}).items():
+			baselineResult = baseline.get(section, {}).get(name)
+			if (baselineResult is None):
+				continue
+			for measure in ("p50", "p95", "p99", "peakMemory", "nodesPerSecond"):
+				old = baselineResult.get(measure)
+				new = result.get(measure)
+				if ((not old) or (new is None)):
+					continue
+				if (measure == "nodesPerSecond"):
+					worse = new < old * (1 - threshold)
+				else:
+					worse = new > old * (1 + threshold)
+				if (worse):
+					regressions.append((section + " " + name, measure, old, new))
+	return regressions
+
+def FormatMeasure (measure, value):
+	if (value is None):
+		return "-"
+	if (measure in ("p50", "p95", "p99", "max", "total")):
+		return "%.3f ms" % (value * 1000)
+	if (measure == "peakMemory"):
+		return "%.1f KB" % (value / 1024)
+	if (measure == "nodesPerSecond"):
+		return "%.0f" % value
+	return str(value)
+
+def PrintResults (results, stream):
+	for section, measures in (("search", ("p50", "p95", "p99", "nodesGenerated", "nodesPerSecond", "peakMemory")),
+							  ("agents", ("calls", "p50", "p95", "p99", "peakMemory"))):
+		for name, result in results.get(section, {}).items():
+			stream.write(section + " " + name + ": " +
+						 ", ".join([measure + " " + FormatMeasure(measure, result.get(measure)) for measure in measures]) + "\n")
+			if (result.get("skippedWorlds")):
+				stream.write("  skipped (agent error): " + " ".join(result["skippedWorlds"]) + "\n")
+
+def main (argv):
+	sizes = DEFAULT_SIZES
+	numQueries = 20
+	engineNames = tuple(searchEngines)
+	agentModules = DEFAULT_AGENTS
+	numTries = 3
+	seed = 1
+	saveFile = None
+	compareFile = None
+	threshold = 0.1
+
+	# Process command-line options
+	i = 1
+	while (i < len(argv)):
+		if (argv[i] == "-sizes"):
+			i += 1
+			sizes = [int(size) for size in argv[i].split(",") if size]
+		elif (argv[i] == "-queries"):
+			i += 1
+			numQueries = int(argv[i])
+		elif (argv[i] == "-engines"):
+			i += 1
+			engineNames = [engineName for engineName in argv[i].split(",") if engineName]
+			for engineName in engineNames:
+				if (not engineName in searchEngines):
+					print("unknown engine " + engineName)
+					return 1
+		elif (argv[i] == "-agents"):
+			i += 1
+			agentModules = [agentModule for agentModule in argv[i].split(",") if agentModule]
+		elif (argv[i] == "-tries"):
+			i += 1
+			numTries = int(argv[i])
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		elif (argv[i] == "-save"):
+			i += 1
+			saveFile = argv[i]
+		elif (argv[i] == "-compare"):
+			i += 1
+			compareFile = argv[i]
+		elif (argv[i] == "-threshold"):
+			i += 1
+			threshold = float(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+
+	# Agents log through the shared instrumentation; keep it quiet while timing.
+	Instrumentation.default.level = Instrumentation.SILENT
+	Instrumentation.default.statsFile = None
+
+	results = {"python": platform.python_version(), "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+			   "settings": {"sizes": list(sizes), "queries": numQueries, "engines": list(engineNames), "tries": numTries, "seed": seed}}
+	results["search"] = BenchmarkSearch(sizes, numQueries, seed, engineNames)
+	results["agents"] = BenchmarkAgents(agentModules, numTries, seed)
+	PrintResults(results, sys.stdout)
+
+	if (saveFile is not None):
+		with open(saveFile, "w") as baselineFile:
+			json.dump(results, baselineFile, indent = 1)
+			baselineFile.write("\n")
+	if (compareFile is not None):
+		with open(compareFile) as baselineFile:
+			baseline = json.load(baselineFile)
+		regressions = Regressions(baseline, results, threshold)
+		for name, measure, old, new in regressions:
+			print("REGRESSION " + name + " " + measure + ": " + FormatMeasure(measure, old) + " -> " + FormatMeasure(measure, new))
+		if (regressions):
+			return 1
+		print("No regressions against " + compareFile)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -0,0 +1,218 @@
+# ForkRunner.py
+#
+# Runs agent trials in forked children of a process that has already imported the agents and
+# built the shared tables, so no trial pays for interpreter startup, imports or table building.
+#
+# Usage: python ForkRunner.py [-agent <module>]... [-corpus <directory>]... [-world <file>]...
+#                             [-random N] [-size N] [-seed N] [-tries N] [-workers N]
+#                             [-batch N] [-startup N]
+#
+# Jobs and output are those of ParallelRunner (the same options give the same averages). The
+# parent preloads first: it imports each agent module and plays one untimed, silent game with
+# each agent on a world of each size to be played, which fills the heuristic tables and anything the agents build on first use
+# (interned percepts are built when Percept is imported). gc.freeze then keeps the collector
+# from touching the preloaded objects, so their pages stay shared copy-on-write. The jobs are
+# split into batches of -batch trials, each run by a child forked from the preloaded parent,
+# at most -workers (default: number of CPUs) at a time; a child sends its results back through
+# a pipe and exits.
+#
+# -startup N measures startup N times and reports the median: cold is a new interpreter that
+# imports wumpsim and the first agent and plays one game; warm is a child forked from the
+# preloaded parent playing the same game.
+
+import os
+import gc
+import sys
+import time
+import pickle
+import random
+import selectors
+import statistics
+import subprocess
+import Instrumentation
+import WumpusWorld
+import ParallelRunner
+import wumpsim
+
+# Imports the agent modules and fills the tables they use for worlds of the given sizes.
+def Preload (agentModules, worldSizes):
+	level = Instrumentation.default.level
+	statsFile = Instrumentation.default.statsFile
+	Instrumentation.default.level = Instrumentation.SILENT
+	Instrumentation.default.statsFile = None
+	try:
+		for agentModule in agentModules:
+			agentClass = ParallelRunner.GetAgentClass(agentModule)
+			for worldSize in worldSizes:
+				wumpusWorld = WumpusWorld.WumpusWorld(size = worldSize, rng = random.Random(0))
+				wumpusWorld.Initialize()
+				try:
+					wumpsim.PlayGame(wumpusWorld, agentClass())
+				except Exception:
+					pass
+	finally:
+		Instrumentation.default.level = level
+		Instrumentation.default.statsFile = statsFile
+		Instrumentation.default.Reset()
+	gc.collect()
+	gc.freeze()
+
+# Forks a child that runs the jobs and writes [(job index, results), ...] to a pipe; returns
+# (pid, read end of the pipe).
+def ForkBatch (jobs):
+	readFd, writeFd = os.pipe()
+	pid = os.fork()
+	if (pid == 0):
+		status = 0
+		try:
+			os.close(readFd)
+			with os.fdopen(writeFd, "wb") as pipe:
+				pickle.dump([ParallelRunner.RunJob(job) for job in jobs], pipe)
+		except BaseException:
+			status = 1
+		finally:
+			os._exit(status)
+	os.close(writeFd)
+	return pid, readFd
+
+# Runs the jobs in batches of batchSize, in at most numWorkers children at once, yielding
+# (job, results) as each batch completes.
+def RunJobs (jobs, numWorkers = None, batchSize = 1):
+	numWorkers = numWorkers or os.cpu_count() or 1
+	batches = [jobs[first:first + batchSize] for first in range(0, len(jobs), batchSize)]
+	selector = selectors.DefaultSelector()
+	running = 0
+	while (batches or running):
+		while (batches and (running < numWorkers)):
+			batch = batches.pop(0)
+			pid, readFd = ForkBatch(batch)
+			selector.register(readFd, selectors.EVENT_READ, (pid, batch, []))
+			running += 1
+		for key, events in selector.select():
+			pid, batch, chunks = key.data
+			chunk = os.read(key.fd, 65536)
+			if (chunk):
+				chunks.append(chunk)
+				continue
+			selector.unregister(key.fd)
+			os.close(key.fd)
+			os.waitpid(pid, 0)
+			running -= 1
+			data = b"".join(chunks)
+			if (data):
+				for jobIndex, results in pickle.loads(data):
+					yield jobs[jobIndex], results
+			else:
+				for job in batch:
+					yield job, "child process failed"
+	selector.close()
+
+# Seconds for a new interpreter to import wumpsim and the agent module and play one game.
+def ColdStart (agentModule, worldSize):
+	code = ("import random, wumpsim, WumpusWorld, " + agentModule + "\n" +
+			"wumpusWorld = WumpusWorld.WumpusWorld(size = " + str(worldSize) + ", rng = random.Random(0))\n" +
+			"wumpusWorld.Initialize()\n" +
+			"try:\n\twumpsim.PlayGame(wumpusWorld, " + agentModule + ".Agent())\nexcept Exception:\n\tpass\n")
+	environment = dict(os.environ, WUMPUS_LOG_LEVEL = "silent")
+	environment.pop("WUMPUS_STATS_FILE", None)
+	startTime = time.perf_counter()
+	subprocess.run([sys.executable, "-c", code], env = environment, cwd = os.path.dirname(os.path.abspath(__file__)), check = True)
+	return time.perf_counter() - startTime
+
+# Seconds for a child forked from the preloaded process to play the same game.
+def WarmStart (agentModule, worldSize):
+	startTime = time.perf_counter()
+	pid = os.fork()
+	if (pid == 0):
+		Instrumentation.default.level = Instrumentation.SILENT
+		Instrumentation.default.statsFile = None
+		try:
+			wumpusWorld = WumpusWorld.WumpusWorld(size = worldSize, rng = random.Random(0))
+			wumpusWorld.Initialize()
+			wumpsim.PlayGame(wumpusWorld, ParallelRunner.GetAgentClass(agentModule)())
+		except BaseException:
+			pass
+		finally:
+			os._exit(0)
+	os.waitpid(pid, 0)
+	return time.perf_counter() - startTime
+
+def main (argv):
+	agentModules = []
+	corpusDirectories = []
+	worldFiles = []
+	numRandom = 0
+	worldSize = 4
+	seed = 1
+	numTries = 1
+	numWorkers = None
+	batchSize = 10
+	numStartups = 0
+
+	# Process command-line options
+	i = 1
+	while (i < len(argv)):
+		if (argv[i] == "-agent"):
+			i += 1
+			agentModules.append(argv[i])
+		elif (argv[i] == "-corpus"):
+			i += 1
+			corpusDirectories.append(argv[i])
+		elif (argv[i] == "-world"):
+			i += 1
+			worldFiles.append(argv[i])
+		elif (argv[i] == "-random"):
+			i += 1
+			numRandom = int(argv[i])
+		elif (argv[i] == "-size"):
+			i += 1
+			worldSize = max(int(argv[i]), 2)
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		elif (argv[i] == "-tries"):
+			i += 1
+			numTries = int(argv[i])
+		elif (argv[i] == "-workers"):
+			i += 1
+			numWorkers = int(argv[i])
+		elif (argv[i] == "-batch"):
+			i += 1
+			batchSize = max(int(argv[i]), 1)
+		elif (argv[i] == "-startup"):
+			i += 1
+			numStartups = int(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+	if (not agentModules):
+		agentModules = ["Agent"]
+
+	worlds = [(worldFile, None) for worldFile in ParallelRunner.CorpusWorldFiles(corpusDirectories) + worldFiles]
+	jobs = ParallelRunner.MakeJobs(agentModules, worlds, numRandom, worldSize, seed, numTries)
+	worldSizes = set([worldSize] if numRandom else [])
+	for worldFile, worldIndex in worlds:
+		worldSizes.add(WumpusWorld.WumpusWorld(worldFile = worldFile).worldSize)
+
+	startTime = time.perf_counter()
+	Preload(agentModules, sorted(worldSizes or [worldSize]))
+	sys.stderr.write("Preloaded in " + "%.3f" % (time.perf_counter() - startTime) + " s\n")
+	if (numStartups > 0):
+		coldTimes = [ColdStart(agentModules[0], worldSize) for i in range(numStartups)]
+		warmTimes = [WarmStart(agentModules[0], worldSize) for i in range(numStartups)]
+		sys.stderr.write("Startup and one game of " + agentModules[0] + ": cold " + "%.1f" % (statistics.median(coldTimes) * 1000) +
+						 " ms, warm (forked) " + "%.1f" % (statistics.median(warmTimes) * 1000) + " ms (median of " +
+						 str(numStartups) + ")\n")
+
+	startTime = time.perf_counter()
+	jobResults = [None] * len(jobs)
+	for job, results in RunJobs(jobs, numWorkers, batchSize):
+		jobResults[job[0]] = results
+	seconds = time.perf_counter() - startTime
+	sys.stderr.write(str(len(jobs) * numTries) + " games in " + "%.3f" % seconds + " s\n")
+	ParallelRunner.PrintResults(agentModules, jobs, jobResults, numTries)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
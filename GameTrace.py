@@ -0,0 +1,288 @@
+# GameTrace.py
+#
+# Compact binary traces of the moves an agent makes, and replay of those traces into an agent
+# without a simulator.
+#
+# Usage: python GameTrace.py info <trace>
+#        python GameTrace.py replay <trace> [-agent <module>] [-seed N]
+#
+# Traces are recorded with wumpsim.py -trace <file>, or by wrapping an agent with
+# TraceRecorder.Wrap. A trace file is a header (magic, version, and the length of a JSON
+# metadata object, e.g. the agent module and seed, which follows it) and then records that are
+# only ever appended, each starting with a tag byte and a 32-bit little-endian value:
+#   move:      tag = packed percept | action << 5, value = decision time in nanoseconds
+#   trial:     tag TRIAL, value = record length, then the world as a WorldCorpus record
+#   game over: tag GAME_OVER, value = score (signed)
+# A move takes 5 bytes. Records are flushed at the end of each game, and a truncated last
+# record (e.g. from a crash) is ignored on reading and cut off before more records are
+# appended, so they stay aligned. TraceReader.Events reads the file as a
+# stream, so traces of any length are read in constant memory.
+#
+# replay starts a new agent for each trial and an Initialize for each game, feeds it the
+# recorded percepts and stops at the first action that differs from the recorded one. It
+# reports that divergence and the recorded and replayed decision times (p50/p95/p99 from a
+# Profiling.Histogram). Agents that use the random module only replay the same decisions if it
+# is seeded as when they were recorded (-seed seeds it at the start of each trial).
+
+import os
+import sys
+import json
+import time
+import random
+import struct
+import importlib
+import Profiling
+import WorldCorpus
+import WumpusWorld
+from Percept import PackPercept, internedPercepts
+
+TRACE_MAGIC = b"WUMPUSTR"
+TRACE_VERSION = 1
+
+# Record tags; any smaller tag is a move.
+TRIAL = 0xFE
+GAME_OVER = 0xFF
+
+# Event kinds yielded by TraceReader.Events
+MOVE = 0
+
+headerStruct = struct.Struct("<8sHI")
+recordStruct = struct.Struct("<BI")
+gameOverStruct = struct.Struct("<Bi")
+
+MAX_NANOSECONDS = 0xFFFFFFFF # Longer decisions (over 4.29 s) are recorded as this
+
+class TraceRecorder:
+
+	# Starts a new trace file with the given metadata, or appends to an existing one (whose
+	# metadata is kept) after its last complete record.
+	def __init__(self, fileName, metadata = None):
+		self.fileName = fileName
+		if (os.path.exists(fileName) and (os.path.getsize(fileName) > 0)):
+			reader = TraceReader(fileName)
+			try:
+				for event in reader.Events():
+					pass
+			finally:
+				reader.close()
+			self.traceFile = open(fileName, "ab")
+			if (reader.truncated):
+				self.traceFile.truncate(reader.endOffset)
+		else:
+			metadataBytes = json.dumps(metadata or {}).encode("utf-8")
+			self.traceFile = open(fileName, "wb")
+			self.traceFile.write(headerStruct.pack(TRACE_MAGIC, TRACE_VERSION, len(metadataBytes)) + metadataBytes)
+		self.numMoves = 0
+
+	def close (self):
+		self.traceFile.close()
+
+	# Starts a trial (a new agent) in wumpusWorld.
+	def BeginTrial (self, wumpusWorld):
+		worldBytes = WorldCorpus.PackWorld(wumpusWorld, wumpusWorld.worldSize)
+		self.traceFile.write(recordStruct.pack(TRIAL, len(worldBytes)) + worldBytes)
+
+	def Move (self, perceptBits, action, seconds):
+		self.traceFile.write(recordStruct.pack(perceptBits | (action << 5), min(int(seconds * 1e9), MAX_NANOSECONDS)))
+		self.numMoves += 1
+
+	def GameOver (self, score):
+		self.traceFile.write(gameOverStruct.pack(GAME_OVER, int(score)))
+		self.traceFile.flush()
+
+	# Returns an agent that passes every call on to agent and records its moves. It has no
+	# PlanAhead, so all actions go through Process.
+	def Wrap (self, agent):
+		return RecordingAgent(agent, self)
+
+class RecordingAgent:
+
+	def __init__(self, agent, recorder):
+		self.agent = agent
+		self.recorder = recorder
+
+	def Initialize (self):
+		self.agent.Initialize()
+
+	def Process (self, percept):
+		perceptBits = PackPercept(percept.stench, percept.breeze, percept.glitter, percept.bump, percept.scream)
+		startTime = time.perf_counter()
+		action = self.agent.Process(percept)
+		self.recorder.Move(perceptBits, action, time.perf_counter() - startTime)
+		return action
+
+	def GameOver (self, score):
+		self.agent.GameOver(score)
+		self.recorder.GameOver(score)
+
+class TraceReader:
+
+	def __init__(self, fileName, bufferSize = 1 << 20):
+		self.fileName = fileName
+		self.traceFile = open(fileName, "rb", buffering = bufferSize)
+		header = self.traceFile.read(headerStruct.size)
+		if (len(header) == headerStruct.size):
+			magic, version, metadataLength = headerStruct.unpack(header)
+		if ((len(header) < headerStruct.size) or (magic != TRACE_MAGIC) or (version != TRACE_VERSION)):
+			self.traceFile.close()
+			raise ValueError("Not a version " + str(TRACE_VERSION) + " game trace: " + fileName)
+		self.metadata = json.loads(self.traceFile.read(metadataLength).decode("utf-8"))
+		self.dataOffset = headerStruct.size + metadataLength
+		self.truncated = False # Set if Events found a partial last record
+		self.endOffset = self.dataOffset # Offset just past the last complete record Events read
+
+	def close (self):
+		self.traceFile.close()
+
+	# Yields the records in order: (MOVE, packed percept, action, nanoseconds),
+	# (TRIAL, (size, wumpus location, gold location, pit locations)) and (GAME_OVER, score).
+	def Events (self):
+		traceFile = self.traceFile
+		traceFile.seek(self.dataOffset)
+		self.endOffset = self.dataOffset
+		while (True):
+			record = traceFile.read(recordStruct.size)
+			if (len(record) < recordStruct.size):
+				self.truncated = (len(record) > 0)
+				return
+			tag, value = recordStruct.unpack(record)
+			if (tag < TRIAL):
+				self.endOffset += recordStruct.size
+				yield (MOVE, tag & 31, tag >> 5, value)
+			elif (tag == GAME_OVER):
+				self.endOffset += recordStruct.size
+				yield (GAME_OVER, gameOverStruct.unpack(record)[1])
+			else:
+				worldBytes = traceFile.read(value)
+				if (len(worldBytes) < value):
+					self.truncated = True
+					return
+				self.endOffset += recordStruct.size + value
+				yield (TRIAL, WorldCorpus.UnpackWorld(worldBytes))
+
+	def __iter__ (self):
+		return self.Events()
+
+# Feeds the recorded percepts of the trace to new agentClass agents. Returns a dict with the
+# number of trials, games and moves replayed, the first divergence (None if every action
+# matched), and summaries of the recorded and replayed decision times.
+def ReplayTrace (fileName, agentClass, seed = None):
+	reader = TraceReader(fileName)
+	recorded = Profiling.Histogram()
+	replayed = Profiling.Histogram()
+	result = {"trials": 0, "games": 0, "moves": 0, "divergence": None}
+	agent = None
+	tryIndex = 0 # Games finished in the current trial
+	moveIndex = None # Move number within the current game, or None between games
+	try:
+		for event in reader.Events():
+			if (event[0] == MOVE):
+				kind, perceptBits, recordedAction, nanoseconds = event
+				if (agent is None):
+					raise ValueError("Move before the first trial in game trace: " + fileName)
+				if (moveIndex is None):
+					agent.Initialize()
+					moveIndex = 0
+				percept = internedPercepts[perceptBits]
+				startTime = time.perf_counter()
+				action = agent.Process(percept)
+				replayed.Add(time.perf_counter() - startTime)
+				recorded.Add(nanoseconds * 1e-9)
+				moveIndex += 1
+				result["moves"] += 1
+				if (action != recordedAction):
+					result["divergence"] = {"trial": result["trials"], "try": tryIndex + 1, "move": moveIndex,
+											"percept": str(percept), "recorded": WumpusWorld.actionNames[recordedAction],
+											"replayed": WumpusWorld.actionNames.get(action, str(action))}
+					break
+			elif (event[0] == GAME_OVER):
+				if (moveIndex is not None):
+					agent.GameOver(event[1])
+					moveIndex = None
+				tryIndex += 1
+				result["games"] += 1
+			else:
+				if (seed is not None):
+					random.seed(seed)
+				agent = agentClass()
+				moveIndex = None
+				tryIndex = 0
+				result["trials"] += 1
+	finally:
+		reader.close()
+	result["truncated"] = reader.truncated
+	result["recorded"] = recorded.Summary()
+	result["replayed"] = replayed.Summary()
+	return result
+
+def FormatLatency (summary):
+	if (not summary["calls"]):
+		return "no calls"
+	return (str(summary["calls"]) + " calls, mean " + "%.3f" % (summary["mean"] * 1000) + " ms, p50 " + "%.3f" % (summary["p50"] * 1000) +
+			" ms, p95 " + "%.3f" % (summary["p95"] * 1000) + " ms, p99 " + "%.3f" % (summary["p99"] * 1000) +
+			" ms, max " + "%.3f" % (summary["max"] * 1000) + " ms")
+
+def main (argv):
+	if (len(argv) < 3):
+		print("usage: python GameTrace.py info|replay <trace> ...")
+		return 1
+	command = argv[1]
+	fileName = argv[2]
+	if (command == "info"):
+		reader = TraceReader(fileName)
+		recorded = Profiling.Histogram()
+		numTrials = 0
+		numGames = 0
+		totalScore = 0
+		for event in reader.Events():
+			if (event[0] == MOVE):
+				recorded.Add(event[3] * 1e-9)
+			elif (event[0] == GAME_OVER):
+				numGames += 1
+				totalScore += event[1]
+			else:
+				numTrials += 1
+		reader.close()
+		print("metadata: " + json.dumps(reader.metadata))
+		print(str(numTrials) + " trials, " + str(numGames) + " games, " + str(recorded.calls) + " moves" +
+			  ((", average score " + "%g" % (totalScore / numGames)) if numGames else "") +
+			  (" (truncated)" if reader.truncated else ""))
+		print("recorded decisions: " + FormatLatency(recorded.Summary()))
+	elif (command == "replay"):
+		agentModule = None
+		seed = None
+		i = 3
+		while (i < len(argv)):
+			if (argv[i] == "-agent"):
+				i += 1
+				agentModule = argv[i]
+			elif (argv[i] == "-seed"):
+				i += 1
+				seed = int(argv[i])
+			else:
+				print("unknown option " + argv[i])
+				return 1
+			i += 1
+		if (agentModule is None):
+			reader = TraceReader(fileName)
+			agentModule = reader.metadata.get("agent", "Agent")
+			reader.close()
+		result = ReplayTrace(fileName, importlib.import_module(agentModule).Agent, seed)
+		print(agentModule + ": " + str(result["trials"]) + " trials, " + str(result["games"]) + " games, " +
+			  str(result["moves"]) + " moves replayed" + (" (trace truncated)" if result["truncated"] else ""))
+		print("recorded decisions: " + FormatLatency(result["recorded"]))
+		print("replayed decisions: " + FormatLatency(result["replayed"]))
+		divergence = result["divergence"]
+		if (divergence is not None):
+			print("Actions diverge at trial " + str(divergence["trial"]) + ", try " + str(divergence["try"]) + ", move " +
+				  str(divergence["move"]) + " (percept " + divergence["percept"] + "): recorded " + divergence["recorded"] +
+				  ", replayed " + divergence["replayed"])
+			return 1
+		print("All actions match")
+	else:
+		print("unknown command " + command)
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
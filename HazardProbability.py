@@ -0,0 +1,192 @@
+# HazardProbability.py
+#
+# Exact pit and wumpus probabilities for unvisited cells, from the facts in a KnowledgeBase.
+#
+# As in the world generator, each cell other than [1,1] holds a pit with probability
+# PIT_PROBABILITY, independently, and the wumpus is in one of those cells chosen uniformly.
+# Breezes only depend on pits and stenches only on the wumpus, so the two are computed apart.
+#
+# Pits: each breeze without a known pit next to it requires at least one pit among its
+# neighbors that may hold one. Breezes sharing such cells form connected components of the
+# frontier; each component is solved by enumerating the consistent pit assignments (a dynamic
+# program over its cells, keeping only the breezes still open), and the results are cached by
+# component, so components untouched by a move are not solved again. Cells in no component
+# keep the prior. Wumpus: every cell that the stenches and the cells ruled out still allow is
+# equally likely (while the world size is unknown, the world is taken to be ASSUMED_WORLD_SIZE
+# cells wide, or wider if cells beyond that have been visited).
+#
+# A death the knowledge base cannot attribute to a pit or to the wumpus is not used as evidence.
+
+import collections
+
+PIT_PROBABILITY = 0.2
+ASSUMED_WORLD_SIZE = 9
+
+class HazardModel:
+
+	# componentCacheSize component results are kept in an LRU cache.
+	def __init__(self, knowledgeBase, pitProbability = PIT_PROBABILITY, componentCacheSize = 256):
+		self.knowledgeBase = knowledgeBase
+		self.pitProbability = pitProbability
+		self.componentCacheSize = componentCacheSize
+		self.componentCache = collections.OrderedDict()
+		self.componentCacheHits = 0
+		self.componentCacheMisses = 0
+		self.version = None # Knowledge base version the probabilities below are for
+		self.pitProbabilities = {}
+
+	# Recomputes the pit probabilities of cells in breeze constraints if the knowledge base changed.
+	def Update (self):
+		if (self.version == self.knowledgeBase.version):
+			return
+		self.version = self.knowledgeBase.version
+		self.pitProbabilities = {}
+		for component in self.Components(self.BreezeConstraints()):
+			self.pitProbabilities.update(self.ComponentProbabilities(component))
+
+	# Returns the open breeze constraints, each a sorted tuple of the cells that may hold the pit.
+	def BreezeConstraints (self):
+		knowledgeBase = self.knowledgeBase
+		constraints = set()
+		for location in knowledgeBase.breezes:
+			neighbors = knowledgeBase.Neighbors(location)
+			if (not any([neighbor in knowledgeBase.pits for neighbor in neighbors])):
+				constraints.add(tuple(sorted([neighbor for neighbor in neighbors if (not neighbor in knowledgeBase.noPit)])))
+		return constraints
+
+	# Groups constraints that share cells (union-find over cells); returns sorted tuples of constraints.
+	def Components (self, constraints):
+		parents = {}
+		def Find (location):
+			while (parents[location] != location):
+				parents[location] = parents[parents[location]]
+				location = parents[location]
+			return location
+		for constraint in constraints:
+			for location in constraint:
+				parents.setdefault(location, location)
+			for location in constraint[1:]:
+				parents[Find(location)] = Find(constraint[0])
+		components = {}
+		for constraint in constraints:
+			if (constraint):
+				components.setdefault(Find(constraint[0]), []).append(constraint)
+		return [tuple(sorted(component)) for component in components.values()]
+
+	def ComponentProbabilities (self, component):
+		probabilities = self.componentCache.get(component)
+		if (probabilities is not None):
+			self.componentCacheHits += 1
+			self.componentCache.move_to_end(component)
+			return probabilities
+		self.componentCacheMisses += 1
+		probabilities = self.SolveComponent(component)
+		if (self.componentCacheSize > 0):
+			self.componentCache[component] = probabilities
+			while (len(self.componentCache) > self.componentCacheSize):
+				self.componentCache.popitem(last = False)
+		return probabilities
+
+	# Returns {cell: P(pit)} given that each constraint has at least one pit. Cells are assigned
+	# in breadth-first order through the constraints, and partial assignments are merged by the
+	# set of open constraints they already satisfy; each state carries its total weight and, for
+	# every cell, the weight of its assignments with a pit there.
+	def SolveComponent (self, component):
+		constraintsOf = collections.defaultdict(list)
+		for index, constraint in enumerate(component):
+			for location in constraint:
+				constraintsOf[location].append(index)
+		order = []
+		seen = set([component[0][0]])
+		queue = collections.deque([component[0][0]])
+		while (queue):
+			location = queue.popleft()
+			order.append(location)
+			for index in constraintsOf[location]:
+				for neighbor in component[index]:
+					if (not neighbor in seen):
+						seen.add(neighbor)
+						queue.append(neighbor)
+		position = dict([(location, i) for i, location in enumerate(order)])
+		lastCell = [max([position[location] for location in constraint]) for constraint in component]
+
+		p = self.pitProbability
+		numCells = len(order)
+		states = {frozenset(): (1.0, [0.0] * numCells)}
+		for i, location in enumerate(order):
+			closing = [index for index in constraintsOf[location] if (lastCell[index] == i)]
+			newStates = {}
+			for satisfied, (weight, pitWeights) in states.items():
+				for pit in (True, False):
+					if (pit):
+						newSatisfied = satisfied.union(constraintsOf[location])
+					else:
+						newSatisfied = satisfied
+						if (any([not index in satisfied for index in closing])):
+							continue # A constraint closes without a pit
+					newSatisfied = newSatisfied.difference(closing)
+					factor = p if pit else (1.0 - p)
+					newWeights = [pitWeight * factor for pitWeight in pitWeights]
+					if (pit):
+						newWeights[i] = weight * factor
+					if (newSatisfied in newStates):
+						oldWeight, oldWeights = newStates[newSatisfied]
+						newStates[newSatisfied] = (oldWeight + weight * factor, [a + b for a, b in zip(oldWeights, newWeights)])
+					else:
+						newStates[newSatisfied] = (weight * factor, newWeights)
+			states = newStates
+		total, pitWeights = states[frozenset()]
+		return dict([(location, pitWeights[i] / total) for i, location in enumerate(order)])
+
+	# Queries
+
+	def PitProbability (self, location):
+		knowledgeBase = self.knowledgeBase
+		location = tuple(location)
+		if (location in knowledgeBase.pits):
+			return 1.0
+		if ((location in knowledgeBase.noPit) or (location == (1,1))):
+			return 0.0
+		self.Update()
+		return self.pitProbabilities.get(location, self.pitProbability)
+
+	# Probability that the wumpus (alive or dead) is at location.
+	def WumpusProbability (self, location):
+		knowledgeBase = self.knowledgeBase
+		location = tuple(location)
+		if (knowledgeBase.wumpusCandidates is not None):
+			if (not location in knowledgeBase.wumpusCandidates):
+				return 0.0
+			return 1.0 / len(knowledgeBase.wumpusCandidates)
+		size = knowledgeBase.worldSize
+		if ((location in knowledgeBase.noWumpus) or (location == (1,1)) or ((size is not None) and (max(location) > size))):
+			return 0.0
+		# Any cell but [1,1] not ruled out
+		if (size is None):
+			size = max(ASSUMED_WORLD_SIZE, knowledgeBase.visited.maxCoordinate + 1, max(location))
+		ruledOut = len([cell for cell in knowledgeBase.noWumpus if ((max(cell) <= size) and (cell != (1,1)))])
+		return 1.0 / (size * size - 1 - ruledOut)
+
+	# Probability that entering location is fatal (a pit or the live wumpus).
+	def Risk (self, location):
+		if (location in self.knowledgeBase.deadly):
+			return 1.0
+		wumpusProbability = self.WumpusProbability(location) if self.knowledgeBase.wumpusAlive else 0.0
+		return 1.0 - (1.0 - self.PitProbability(location)) * (1.0 - wumpusProbability)
+
+	# Returns the location with the lowest risk, breaking ties by distance if a
+	# Search.DistanceField is given (unreachable locations are skipped), or None.
+	def LeastRisky (self, locations, distances = None):
+		bestLocation = None
+		bestKey = None
+		for location in locations:
+			distance = 0
+			if (distances is not None):
+				distance = distances.Distance(location)
+				if (distance is None):
+					continue
+			key = (round(self.Risk(location), 9), distance)
+			if ((bestKey is None) or (key < bestKey)):
+				bestLocation = location
+				bestKey = key
+		return bestLocation
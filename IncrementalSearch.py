@@ -0,0 +1,177 @@
+# IncrementalSearch.py
+#
+# Incremental replanning (D* Lite) for wumpus world navigation in Python.
+#
+# IncrementalSearchEngine is a drop-in replacement for Search.SearchEngine: subclass it and
+# supply HeuristicFunction as usual. Instead of running A* from scratch, it keeps one D* Lite
+# planner per goal pose. A planner searches backward from its goal and keeps its g/rhs values
+# between calls; when the safe locations change, only the states next to the changed locations
+# are updated, and when the start moves the heuristic offset (km) is adjusted, so each call only
+# repairs the part of the search that is affected.
+
+import heapq
+import collections
+import Action
+import Orientation
+import Search
+from LocationSet import LocationSet
+
+INFINITY = float("inf")
+
+class Planner:
+
+	def __init__(self, engine, table, goal, goalState):
+		self.engine = engine
+		self.table = table
+		self.goal = goal
+		self.goalState = goalState
+		self.safeLocations = LocationSet()
+		self.safeCells = bytearray(table.stride * table.stride)
+		self.g = {}
+		self.rhs = {goal: 0}
+		self.queue = []
+		self.queueKeys = {}
+		self.km = 0
+		self.lastStart = None
+		self.heuristics = {}
+		self.startState = Search.SearchState ([0,0], Orientation.RIGHT, 0, None, Action.CLIMB)
+		self.scratchState = Search.SearchState ([0,0], Orientation.RIGHT, 0, None, Action.CLIMB)
+		self.Push(goal)
+
+	# Estimated cost from the current start to state.
+	def Heuristic (self, state):
+		heuristic = self.heuristics.get(state)
+		if (heuristic is None):
+			self.scratchState.location[0], self.scratchState.location[1], self.scratchState.orientation = self.table.Decode(state)
+			heuristic = self.engine.HeuristicFunction(self.startState, self.scratchState)
+			self.heuristics[state] = heuristic
+		return heuristic
+
+	def CalculateKey (self, state):
+		value = min(self.g.get(state, INFINITY), self.rhs.get(state, INFINITY))
+		return (value + self.Heuristic(state) + self.km, value)
+
+	def Push (self, state):
+		key = self.CalculateKey(state)
+		self.queueKeys[state] = key
+		heapq.heappush(self.queue, (key, state))
+
+	# Successors of state with their action; GOFORWARD only into safe locations.
+	def Successors (self, state):
+		forwardState = self.table.Forward(state)
+		if ((forwardState >= 0) and self.safeCells[forwardState >> 2]):
+			yield Action.GOFORWARD, forwardState
+		yield Action.TURNLEFT, state + Search.turnLeftSteps[state & 3]
+		yield Action.TURNRIGHT, state + Search.turnRightSteps[state & 3]
+
+	# Predecessors of state: the states with an action leading to it.
+	def Predecessors (self, state):
+		if (self.safeCells[state >> 2]):
+			backwardState = self.table.Backward(state)
+			if (backwardState >= 0):
+				yield backwardState
+		yield state + Search.turnRightSteps[state & 3] # TURNLEFT from here leads to state
+		yield state + Search.turnLeftSteps[state & 3] # TURNRIGHT from here leads to state
+
+	def UpdateVertex (self, state):
+		self.engine.nodeCount += 1
+		if (state != self.goal):
+			self.rhs[state] = min([1 + self.g.get(successor, INFINITY) for action, successor in self.Successors(state)])
+		self.queueKeys.pop(state, None)
+		if (self.g.get(state, INFINITY) != self.rhs.get(state, INFINITY)):
+			self.Push(state)
+
+	def TopKey (self):
+		while (self.queue):
+			key, state = self.queue[0]
+			if (self.queueKeys.get(state) == key):
+				return key
+			heapq.heappop(self.queue) # stale entry
+		return (INFINITY, INFINITY)
+
+	def ComputeShortestPath (self, start):
+		while ((self.TopKey() < self.CalculateKey(start)) or (self.rhs.get(start, INFINITY) != self.g.get(start, INFINITY))):
+			if (not self.queue):
+				break
+			oldKey, state = heapq.heappop(self.queue)
+			del self.queueKeys[state]
+			self.engine.expandedCount += 1
+			newKey = self.CalculateKey(state)
+			if (oldKey < newKey):
+				self.Push(state)
+			elif (self.g.get(state, INFINITY) > self.rhs.get(state, INFINITY)):
+				self.g[state] = self.rhs[state]
+				for predecessor in self.Predecessors(state):
+					self.UpdateVertex(predecessor)
+			else:
+				self.g[state] = INFINITY
+				self.UpdateVertex(state)
+				for predecessor in self.Predecessors(state):
+					self.UpdateVertex(predecessor)
+
+	# Bring the planner up to date with the engine's safe locations. A location changing
+	# only affects the GOFORWARD edges into it, i.e. the states one step behind it.
+	def UpdateSafeLocations (self, safeLocations):
+		changed = (safeLocations - self.safeLocations) | (self.safeLocations - safeLocations)
+		self.safeLocations = safeLocations.copy()
+		for x,y in changed:
+			cell = x * self.table.stride + y
+			self.safeCells[cell] ^= 1
+			for orientation in range(4):
+				predecessor = self.table.Backward((cell << 2) + orientation)
+				if (predecessor >= 0):
+					self.UpdateVertex(predecessor)
+
+	# Returns the final SearchState of a shortest path from start, or None if there is none.
+	def Plan (self, start, initialState):
+		if (self.lastStart != start):
+			if (self.lastStart is not None):
+				self.km += self.Heuristic(start)
+			self.startState.location[0], self.startState.location[1], self.startState.orientation = self.table.Decode(start)
+			self.heuristics = {}
+			self.lastStart = start
+		self.UpdateSafeLocations(self.engine.safeLocations)
+		self.ComputeShortestPath(start)
+		if (self.g.get(start, INFINITY) == INFINITY):
+			return None
+		# Follow the cheapest successors (in action order GOFORWARD, TURNLEFT, TURNRIGHT) to the goal.
+		finalState = initialState
+		state = start
+		while (state != self.goal):
+			bestAction = None
+			bestCost = INFINITY
+			for action, successor in self.Successors(state):
+				cost = 1 + self.g.get(successor, INFINITY)
+				if (cost < bestCost):
+					bestAction, bestState, bestCost = action, successor, cost
+			x, y, orientation = self.table.Decode(bestState)
+			finalState = Search.SearchState ([x,y], orientation, finalState.depth + 1, finalState, bestAction)
+			state = bestState
+		return finalState
+
+class IncrementalSearchEngine(Search.SearchEngine):
+
+	# Planners are kept for the maxPlanners most recently used goal poses.
+	def __init__(self, maxPlanners = 8, **kwargs):
+		Search.SearchEngine.__init__(self, **kwargs)
+		self.maxPlanners = maxPlanners
+		self.planners = collections.OrderedDict()
+
+	def AStarSearch (self, initialState, goalState):
+		table = self.GetTable(initialState.location, goalState.location)
+		if (table is None):
+			return self.ListAStarSearch (initialState, goalState)
+		start = table.Encode(initialState.location[0], initialState.location[1], initialState.orientation)
+		goal = table.Encode(goalState.location[0], goalState.location[1], goalState.orientation)
+		planner = self.planners.get(goal)
+		# A planner built for a different table size starts over.
+		if ((planner is None) or (planner.table is not table)):
+			planner = Planner(self, table, goal, goalState)
+			self.planners[goal] = planner
+		self.planners.move_to_end(goal)
+		while (len(self.planners) > self.maxPlanners):
+			self.planners.popitem(last = False)
+		return planner.Plan(start, initialState)
+
+	def ClearPlanners (self):
+		self.planners.clear()
@@ -0,0 +1,121 @@
+# Instrumentation.py
+#
+# Counters and logging for the search engine and agents.
+#
+# Messages are only produced at the VERBOSE level, and are written (and flushed) as they are
+# logged, so they stay in order with whatever else the program prints. The level comes from the
+# WUMPUS_LOG_LEVEL environment variable (silent, summary or verbose); if it is not set, or not
+# one of those, output is VERBOSE when stdout is a terminal and SILENT otherwise (e.g. batch runs
+# redirected to a file). Counters are always kept; call EndGame at the end of each game to get
+# them as a dict (and, at SUMMARY or above, print them). If WUMPUS_STATS_FILE is set, each game's
+# snapshot is also appended to it as a JSON line.
+
+import os
+import sys
+import collections
+
+SILENT = 0
+SUMMARY = 1
+VERBOSE = 2
+
+levelNames = {"silent": SILENT, "summary": SUMMARY, "verbose": VERBOSE}
+
+def DefaultLevel ():
+	levelName = os.environ.get("WUMPUS_LOG_LEVEL")
+	if (levelName is not None):
+		if (levelName.lower() in levelNames):
+			return levelNames[levelName.lower()]
+		sys.stderr.write("Warning: unknown WUMPUS_LOG_LEVEL " + repr(levelName) +
+						 " (expected silent, summary or verbose); using the default level\n")
+	if (sys.stdout is not None and sys.stdout.isatty()):
+		return VERBOSE
+	return SILENT
+
+class Instrumentation:
+
+	# Messages go to stream (sys.stdout if None). Up to maxSearchRecords (nodes generated, nodes
+	# expanded, path length, seconds) tuples are kept for the most recent searches.
+	def __init__(self, level = None, stream = None, maxSearchRecords = 1000):
+		self.level = DefaultLevel() if (level is None) else level
+		self.stream = stream
+		self.searchRecords = collections.deque(maxlen = maxSearchRecords)
+		self.statsFile = os.environ.get("WUMPUS_STATS_FILE")
+		self.games = 0
+		self.totals = self.NewCounters()
+		self.Reset()
+
+	def NewCounters (self):
+		return {"searches": 0, "solutionsFound": 0, "nodesGenerated": 0, "nodesExpanded": 0,
+				"totalPathLength": 0, "maxPathLength": 0, "totalSearchTime": 0.0, "maxSearchTime": 0.0,
+				"budgetHits": 0, "defaultActions": 0}
+
+	# Clears the counters for the current game.
+	def Reset (self):
+		self.counters = self.NewCounters()
+		self.searchRecords.clear()
+
+	def Log (self, *args):
+		if (self.level >= VERBOSE):
+			self.Write(" ".join([str(arg) for arg in args]))
+
+	def Write (self, line):
+		stream = self.stream or sys.stdout
+		stream.write(line + "\n")
+		stream.flush()
+
+	# Records one search. pathLength is None if no solution was found (or the search had no
+	# single goal, as for SearchEngine.FindDistances).
+	def RecordSearch (self, nodesGenerated, nodesExpanded, pathLength, seconds):
+		for counters in (self.counters, self.totals):
+			counters["searches"] += 1
+			counters["nodesGenerated"] += nodesGenerated
+			counters["nodesExpanded"] += nodesExpanded
+			counters["totalSearchTime"] += seconds
+			counters["maxSearchTime"] = max(counters["maxSearchTime"], seconds)
+			if (pathLength is not None):
+				counters["solutionsFound"] += 1
+				counters["totalPathLength"] += pathLength
+				counters["maxPathLength"] = max(counters["maxPathLength"], pathLength)
+		self.searchRecords.append((nodesGenerated, nodesExpanded, pathLength, seconds))
+
+	# Records a search cut short by its node or time budget (see SearchEngine.BudgetHit).
+	def RecordBudgetHit (self):
+		for counters in (self.counters, self.totals):
+			counters["budgetHits"] += 1
+
+	# Records a move for which an agent had no plan within its deadline and took a default action.
+	def RecordDefaultAction (self):
+		for counters in (self.counters, self.totals):
+			counters["defaultActions"] += 1
+
+	def Snapshot (self):
+		return {"games": self.games, "game": dict(self.counters), "totals": dict(self.totals),
+				"recentSearches": list(self.searchRecords)}
+
+	def ToJSON (self):
+		import json
+		return json.dumps(self.Snapshot())
+
+	# Call from the agent's GameOver. Returns the snapshot for the game just played, then
+	# starts counting the next game.
+	def EndGame (self, score = None):
+		self.games += 1
+		snapshot = self.Snapshot()
+		snapshot["score"] = score
+		if (self.level >= SUMMARY):
+			game = snapshot["game"]
+			self.Write("Game " + str(self.games) + ": score = " + str(score) + ", " + str(game["searches"]) +
+					   " searches, " + str(game["nodesGenerated"]) + " nodes generated, " +
+					   str(game["nodesExpanded"]) + " nodes expanded, " +
+					   "%.6f" % game["totalSearchTime"] + " s searching" +
+					   ((", " + str(game["budgetHits"]) + " budget hits, " + str(game["defaultActions"]) +
+						 " default actions") if (game["budgetHits"] or game["defaultActions"]) else ""))
+		if (self.statsFile):
+			import json
+			with open(self.statsFile, "a") as statsFile:
+				statsFile.write(json.dumps(snapshot) + "\n")
+		self.Reset()
+		return snapshot
+
+# Shared instance used by default by search engines and agents.
+default = Instrumentation()
@@ -0,0 +1,302 @@
+# JumpSearch.py
+#
+# Jump point search for wumpus world navigation in Python.
+#
+# JumpSearchEngine is a drop-in replacement for Search.SearchEngine, like
+# IncrementalSearch.IncrementalSearchEngine: subclass it or pass a built-in heuristic as usual.
+# Instead of one GOFORWARD at a time, a state's forward successor is the next jump point along
+# its straight run through safe locations, reached by one macro-edge costing the number of
+# cells moved; turns remain single actions. Moving from cell to cell in one orientation, a cell
+# is a jump point if
+#   - it is the goal location, or the run is blocked after it;
+#   - a location beside it is safe while the location on the same side of the previous cell
+#     is not (the run passes an opening);
+#   - scanning sideways from it through safe locations reaches the goal, or a cell whose
+#     neighbor ahead or behind (in the orientation of the run) is safe while the same
+#     neighbor of the cell before it in the scan is not.
+# Every other cell on the run is passed over without generating its states, so on large open
+# maps and long corridors A* generates far fewer nodes (see Benchmark.py -engines). What a
+# sideways scan finds other than the goal depends only on the safe locations, so it is kept,
+# per cell and direction, until they change; each scan is walked at most once. Costs and
+# heuristics are unchanged, so the path found is as short as SearchEngine's, and the macro-edges
+# are expanded back into single GOFORWARD actions: FindPath returns an action list of the same
+# form and length (among equally short paths, not necessarily the same one). Searches that
+# would reach a location with an x coordinate of 0, or that have a budget or deadline, use
+# SearchEngine's A* instead.
+#
+# Usage: python JumpSearch.py check [-maps N] [-seed N]
+#
+# check compares FindPath of JumpSearchEngine with SearchEngine's on -maps random maps (open
+# maps of various densities and mazes of corridors, from 5x5 to 33x33): on each map, random
+# queries are run, then some safe locations are removed with RemoveSafeLocation and more queries
+# are run. Each jump search path must be as long as SearchEngine's and must lead from the start
+# to the goal through safe locations. Mismatches are printed, and the exit status is 1 if there
+# are any.
+
+import sys
+import heapq
+import random
+import array
+import Action
+import Orientation
+import Search
+import Instrumentation
+
+class JumpSearchEngine(Search.SearchEngine):
+
+	def __init__(self, **kwargs):
+		Search.SearchEngine.__init__(self, **kwargs)
+		self.raysCache = None
+
+	def AStarSearch (self, initialState, goalState):
+		if (self.Budgeted()):
+			return self.AnytimeAStarSearch (initialState, goalState)
+		table = self.GetTable(initialState.location, goalState.location)
+		if (table is None):
+			return self.ListAStarSearch (initialState, goalState)
+		safeCells = self.GetSafeCells(table)
+		if (safeCells.find(1, 0, table.stride) >= 0):
+			return self.HeapAStarSearch (initialState, goalState)
+		rays = self.GetRays(table, safeCells)
+		start = table.Encode(initialState.location[0], initialState.location[1], initialState.orientation)
+		goal = table.Encode(goalState.location[0], goalState.location[1], goalState.orientation)
+		goalCell = goal >> 2
+		if (self.UsesBuiltinHeuristic()):
+			heuristics = Search.GetHeuristicTable(self.heuristic, table, goalState.location[0], goalState.location[1], goalState.orientation)
+		else:
+			heuristics = {}
+		scratchState = Search.SearchState ([0,0], Orientation.RIGHT, 0, None, Action.CLIMB)
+		depths = self.depths
+		parents = self.parents
+		actions = self.actions
+		closed = self.closedStates
+		frontier = self.frontier
+		depths[start] = initialState.depth
+		parents[start] = -1
+		heuristics[start] = self.HeuristicFunction(initialState, goalState)
+		order = 0
+		heapq.heappush(frontier, (initialState.depth + heuristics[start], order, start))
+		while (frontier):
+			cost, _, state = heapq.heappop(frontier)
+			if ((state in closed) or (cost != depths[state] + heuristics[state])):
+				continue # stale entry
+			if (state == goal):
+				return self.BuildJumpChain(table, state, initialState)
+			closed.add(state)
+			self.expandedCount += 1
+			depth = depths[state]
+			jumpState, jumpLength = self.Jump(table, safeCells, rays, state, goalCell)
+			orientation = state & 3
+			# Try each action: GOFORWARD (to the next jump point), TURNLEFT, TURNRIGHT
+			for action, childState, childDepth in ((Action.GOFORWARD, jumpState, depth + jumpLength),
+												   (Action.TURNLEFT, state + Search.turnLeftSteps[orientation], depth + 1),
+												   (Action.TURNRIGHT, state + Search.turnRightSteps[orientation], depth + 1)):
+				if (childState < 0):
+					continue
+				self.nodeCount += 1
+				heuristic = heuristics.get(childState)
+				if (heuristic is None):
+					scratchState.location[0], scratchState.location[1], scratchState.orientation = table.Decode(childState)
+					heuristic = self.HeuristicFunction(scratchState, goalState)
+					heuristics[childState] = heuristic
+				if (childState in closed):
+					continue
+				frontierDepth = depths.get(childState)
+				if ((frontierDepth is None) or (frontierDepth > childDepth)):
+					depths[childState] = childDepth
+					parents[childState] = state
+					actions[childState] = action
+					order -= 1
+					heapq.heappush(frontier, (childDepth + heuristic, order, childState))
+		return None # failure
+
+	# Follows the run ahead of state through safe cells to the next jump point. Returns (state at
+	# the jump point, number of cells moved), or (-1, 0) if the cell ahead is not safe.
+	def Jump (self, table, safeCells, rays, state, goalCell):
+		orientation = state & 3
+		cellSteps = rays[0]
+		step = cellSteps[orientation]
+		sides = ((orientation + 1) & 3, (orientation + 3) & 3)
+		cell = state >> 2
+		length = 0
+		while (safeCells[cell + step]):
+			previousCell = cell
+			cell += step
+			length += 1
+			if (cell == goalCell):
+				break
+			if (self.IsJumpPoint(safeCells, rays, cell, previousCell, sides, goalCell)):
+				break
+		if (length == 0):
+			return -1, 0
+		return (cell << 2) + orientation, length
+
+	def IsJumpPoint (self, safeCells, rays, cell, previousCell, sides, goalCell):
+		cellSteps = rays[0]
+		for side in sides:
+			sideStep = cellSteps[side]
+			if (safeCells[cell + sideStep]):
+				if (not safeCells[previousCell + sideStep]):
+					return True
+				forced, extent = self.Scan(safeCells, rays, side, cell)
+				if (forced):
+					return True
+				offset = goalCell - cell
+				if ((offset % sideStep == 0) and (0 < offset // sideStep <= extent)):
+					return True
+		return False
+
+	# Returns the cell steps of each orientation and, for each orientation, arrays (indexed by
+	# cell, filled in by Scan) of scan results. The result is reused until the safe cells change.
+	def GetRays (self, table, safeCells):
+		if ((self.raysCache is not None) and (self.raysCache[0] is safeCells)):
+			return self.raysCache[1]
+		stride = table.stride
+		rays = [(stride, 1, -stride, -1)] # Orientation.RIGHT, UP, LEFT, DOWN
+		for orientation in range(4):
+			rays.append((bytearray(len(safeCells)), array.array('l', [-1]) * len(safeCells)))
+		self.raysCache = (safeCells, rays)
+		return rays
+
+	# Scans from cell in the given orientation through safe cells. Returns (whether a scanned
+	# cell's neighbor ahead or behind, across the scan, is safe while the same neighbor of the
+	# cell before it is not; number of safe cells scanned).
+	def Scan (self, safeCells, rays, orientation, cell):
+		forcedCells, extents = rays[orientation + 1]
+		if (extents[cell] < 0):
+			sideStep = rays[0][orientation]
+			acrossStep = rays[0][(orientation + 1) & 3]
+			unknownCells = []
+			while ((extents[cell] < 0) and safeCells[cell + sideStep]):
+				unknownCells.append(cell)
+				cell += sideStep
+			if (extents[cell] < 0):
+				extents[cell] = 0
+			for behindCell in reversed(unknownCells):
+				extents[behindCell] = extents[cell] + 1
+				forcedCells[behindCell] = (forcedCells[cell] or
+										   (safeCells[cell + acrossStep] and not safeCells[behindCell + acrossStep]) or
+										   (safeCells[cell - acrossStep] and not safeCells[behindCell - acrossStep]))
+				cell = behindCell
+		return forcedCells[cell], extents[cell]
+
+	# Converts the solution path ending at the given integer state back into linked SearchStates,
+	# one per action, expanding each jump into its GOFORWARD actions.
+	def BuildJumpChain (self, table, state, initialState):
+		path = []
+		while (state != -1):
+			path.append(state)
+			state = self.parents[state]
+		path.reverse()
+		finalState = initialState
+		depth = initialState.depth
+		for previousState, state in zip(path, path[1:]):
+			action = self.actions[state]
+			if (action == Action.GOFORWARD):
+				states = []
+				for step in range(self.depths[state] - self.depths[previousState]):
+					previousState += table.forwardSteps[previousState & 3]
+					states.append(previousState)
+			else:
+				states = [state]
+			for state in states:
+				x, y, orientation = table.Decode(state)
+				depth += 1
+				finalState = Search.SearchState ([x,y], orientation, depth, finalState, action)
+		return finalState
+
+# Check
+
+CHECK_SIZES = (5, 8, 13, 20, 33)
+CHECK_DENSITIES = (0.5, 0.6, 0.7, 0.8, 0.9, 0.97, 1.0) # Fraction of cells that are safe
+CHECK_QUERIES = 5 # Per map, before and again after removing safe locations
+CHECK_REMOVALS = 3 # Safe locations removed per map
+
+orientationMoves = {Orientation.RIGHT:(1,0), Orientation.UP:(0,1), Orientation.LEFT:(-1,0), Orientation.DOWN:(0,-1)}
+
+# Returns a random size x size map of safe cells: either each cell safe with a random density,
+# or a maze of corridors along the odd rows and columns with a few cells blocked.
+def CheckMap (size, rng):
+	if (rng.random() < 0.3):
+		corridors = [(x,y) for x in range(1, size + 1) for y in range(1, size + 1) if ((x % 2 == 1) or (y % 2 == 1))]
+		return set([location for location in corridors if (rng.random() < 0.93)] + [(1,1)])
+	density = rng.choice(CHECK_DENSITIES)
+	return set([(x,y) for x in range(1, size + 1) for y in range(1, size + 1) if (rng.random() < density)] + [(1,1)])
+
+# Returns the location and orientation reached by following actions from the start, or None if
+# a GOFORWARD leaves the safe locations.
+def FollowPath (safeLocations, location, orientation, actions):
+	x, y = location
+	for action in actions:
+		if (action == Action.GOFORWARD):
+			x += orientationMoves[orientation][0]
+			y += orientationMoves[orientation][1]
+			if (not (x,y) in safeLocations):
+				return None
+		elif (action == Action.TURNLEFT):
+			orientation = (orientation + 1) % 4
+		elif (action == Action.TURNRIGHT):
+			orientation = (orientation + 3) % 4
+	return (x,y), orientation
+
+# Runs the check on numMaps random maps and returns (queries, mismatches, identical paths).
+def Check (numMaps, seed):
+	rng = random.Random(seed)
+	quiet = Instrumentation.Instrumentation(level = Instrumentation.SILENT)
+	numQueries = 0
+	numMismatches = 0
+	numIdentical = 0
+	for mapIndex in range(numMaps):
+		safeLocations = CheckMap(rng.choice(CHECK_SIZES), rng)
+		engine = Search.SearchEngine(pathCacheSize = 0, heuristic = "turnaware", instrumentation = quiet)
+		jumpEngine = JumpSearchEngine(pathCacheSize = 0, heuristic = "turnaware", instrumentation = quiet)
+		engine.AddSafeLocations(safeLocations)
+		jumpEngine.AddSafeLocations(safeLocations)
+		for removals in (0, CHECK_REMOVALS):
+			for location in rng.sample(sorted(safeLocations), min(removals, len(safeLocations) - 1)):
+				safeLocations.discard(location)
+				engine.RemoveSafeLocation(location[0], location[1])
+				jumpEngine.RemoveSafeLocation(location[0], location[1])
+			locations = sorted(safeLocations)
+			for query in range(CHECK_QUERIES):
+				start = list(rng.choice(locations))
+				goal = list(rng.choice(locations))
+				startOrientation = rng.randrange(4)
+				goalOrientation = rng.randrange(4)
+				path = engine.FindPath(start, startOrientation, goal, goalOrientation)
+				jumpPath = jumpEngine.FindPath(start, startOrientation, goal, goalOrientation)
+				numQueries += 1
+				if ((len(jumpPath) != len(path)) or
+					(jumpPath and (FollowPath(safeLocations, start, startOrientation, jumpPath) != (tuple(goal), goalOrientation)))):
+					numMismatches += 1
+					print("Map " + str(mapIndex) + " (" + str(removals) + " removed): from " + str(start) + " " + str(startOrientation) +
+						  " to " + str(goal) + " " + str(goalOrientation) + ", SearchEngine path of " + str(len(path)) +
+						  " actions, jump search path " + str(jumpPath))
+				elif (jumpPath == path):
+					numIdentical += 1
+	return numQueries, numMismatches, numIdentical
+
+def main (argv):
+	if ((len(argv) < 2) or (argv[1] != "check")):
+		print("usage: python JumpSearch.py check [-maps N] [-seed N]")
+		return 1
+	numMaps = 1000
+	seed = 1
+	i = 2
+	while (i < len(argv)):
+		if (argv[i] == "-maps"):
+			i += 1
+			numMaps = int(argv[i])
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+	numQueries, numMismatches, numIdentical = Check(numMaps, seed)
+	print(str(numQueries) + " queries, " + str(numMismatches) + " mismatches, " + str(numIdentical) + " identical paths")
+	return 1 if numMismatches else 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -0,0 +1,188 @@
+# KnowledgeBase.py
+#
+# Incremental hazard knowledge for wumpus world agents.
+#
+# Facts are kept as LocationSets (bitmasks): cells known to have no pit, known pits, cells that
+# cannot hold the wumpus, and the wumpus candidates (the intersection of the neighborhoods of
+# all stenches, minus the cells ruled out). Each breeze is a constraint "at least one pit among
+# my neighbors"; when all but one neighbor are known pit-free, that neighbor is a pit (unit
+# propagation). A new fact only re-checks the constraints of the neighbors of the cell it is
+# about, so each percept does local work. The frontier (unvisited cells next to visited ones)
+# and the part of it proven safe are kept up to date, so the queries are O(1).
+
+from LocationSet import LocationSet
+
+class KnowledgeBase:
+
+	# worldSize is an upper bound on the world size until SetWorldSize is called, or None if
+	# there is none.
+	def __init__(self, worldSize = None):
+		self.worldSize = worldSize
+		self.visited = LocationSet()
+		self.noPit = LocationSet()
+		self.pits = LocationSet()
+		self.noWumpus = LocationSet()
+		self.wumpusCandidates = None # LocationSet once a stench has been perceived
+		self.wumpusLocation = None # Set once there is only one candidate
+		self.wumpusAlive = True
+		self.breezes = LocationSet()
+		self.stenches = LocationSet()
+		self.deadly = LocationSet() # Where the agent has died
+		self.frontier = LocationSet()
+		self.safeFrontier = LocationSet()
+		self.version = 0 # Incremented whenever the agent tells the knowledge base something
+
+	def Neighbors (self, location):
+		x, y = location
+		return [(x + moveX, y + moveY) for moveX, moveY in ((-1,0), (1,0), (0,-1), (0,1))
+				if ((0 < x + moveX) and (0 < y + moveY) and
+					((self.worldSize is None) or ((x + moveX <= self.worldSize) and (y + moveY <= self.worldSize))))]
+
+	# Queries
+
+	def IsSafe (self, location):
+		return (location in self.visited) or ((location in self.noPit) and self.NoWumpus(location) and (not location in self.deadly))
+
+	def IsPit (self, location):
+		return location in self.pits
+
+	def NoWumpus (self, location):
+		return ((not self.wumpusAlive) or (location in self.noWumpus) or
+				((self.wumpusCandidates is not None) and (not location in self.wumpusCandidates)))
+
+	# Unvisited cells next to visited ones, and those of them proven safe.
+	def Frontier (self):
+		return self.frontier
+
+	def SafeFrontier (self):
+		return self.safeFrontier
+
+	# Percepts
+
+	# The agent is at location (alive) and perceives stench and breeze.
+	def Tell (self, location, stench, breeze):
+		if (location in self.visited):
+			return
+		self.version += 1
+		location = tuple(location)
+		self.visited.add(location)
+		self.frontier.discard(location)
+		self.safeFrontier.discard(location)
+		neighbors = self.Neighbors(location)
+		for neighbor in neighbors:
+			if ((not neighbor in self.visited) and (not neighbor in self.deadly)):
+				self.frontier.add(neighbor)
+				self.UpdateSafety(neighbor)
+		self.MarkNoPit(location)
+		if (breeze):
+			self.breezes.add(location)
+			self.CheckBreeze(location)
+		else:
+			for neighbor in neighbors:
+				self.MarkNoPit(neighbor)
+		if (stench):
+			self.stenches.add(location)
+			self.RestrictWumpus(LocationSet(neighbors + [location]))
+		else:
+			for neighbor in neighbors:
+				self.MarkNoWumpus(neighbor)
+		# The agent survived here, so the wumpus is elsewhere (unless this is its corpse)
+		if (self.wumpusAlive):
+			self.MarkNoWumpus(location)
+
+	def TellScream (self):
+		self.version += 1
+		self.wumpusAlive = False
+		self.RefreshFrontier()
+
+	# Call at the start of each try: the wumpus is alive again.
+	def NewTry (self):
+		if (not self.wumpusAlive):
+			self.version += 1
+			self.wumpusAlive = True
+			self.RefreshFrontier()
+
+	# The agent died at location, so it holds a pit or the live wumpus.
+	def TellDeath (self, location):
+		self.version += 1
+		location = tuple(location)
+		self.deadly.add(location)
+		self.frontier.discard(location)
+		self.safeFrontier.discard(location)
+		if (self.wumpusAlive and (location in self.noPit)):
+			self.RestrictWumpus(LocationSet([location]))
+		elif ((not self.wumpusAlive) or self.NoWumpus(location)):
+			self.MarkPit(location)
+
+	# The world is size x size (e.g. learned from a bump).
+	def SetWorldSize (self, size):
+		self.version += 1
+		self.worldSize = size
+		for locationSet in (self.frontier, self.safeFrontier):
+			for location in list(locationSet):
+				if (max(location) > size):
+					locationSet.discard(location)
+		if (self.wumpusCandidates is not None):
+			self.RestrictWumpus(LocationSet([location for location in self.wumpusCandidates if (max(location) <= size)]))
+		for location in list(self.breezes):
+			self.CheckBreeze(location)
+
+	# Propagation
+
+	def UpdateSafety (self, location):
+		if ((location in self.frontier) and self.IsSafe(location)):
+			self.safeFrontier.add(location)
+
+	def RefreshFrontier (self):
+		self.safeFrontier = LocationSet([location for location in self.frontier if self.IsSafe(location)])
+
+	def MarkNoPit (self, location):
+		if (location in self.noPit):
+			return
+		self.noPit.add(location)
+		self.UpdateSafety(location)
+		for neighbor in self.Neighbors(location):
+			if (neighbor in self.breezes):
+				self.CheckBreeze(neighbor)
+
+	def MarkPit (self, location):
+		self.pits.add(location)
+		self.safeFrontier.discard(location)
+
+	# Unit propagation: a breeze with no known pit next to it and exactly one neighbor that may
+	# hold a pit means that neighbor is a pit.
+	def CheckBreeze (self, location):
+		unknown = []
+		for neighbor in self.Neighbors(location):
+			if (neighbor in self.pits):
+				return
+			if (not neighbor in self.noPit):
+				unknown.append(neighbor)
+		if (len(unknown) == 1):
+			self.MarkPit(unknown[0])
+
+	def MarkNoWumpus (self, location):
+		if (location in self.noWumpus):
+			return
+		self.noWumpus.add(location)
+		if ((self.wumpusCandidates is not None) and (location in self.wumpusCandidates)):
+			self.wumpusCandidates.discard(location)
+			self.CheckWumpus()
+		self.UpdateSafety(location)
+
+	# The wumpus is in one of the given cells.
+	def RestrictWumpus (self, locations):
+		candidates = locations - self.noWumpus
+		if (self.wumpusCandidates is None):
+			self.wumpusCandidates = candidates
+			self.RefreshFrontier()
+		else:
+			ruledOut = self.wumpusCandidates - candidates
+			self.wumpusCandidates &= candidates
+			for location in ruledOut:
+				self.UpdateSafety(location)
+		self.CheckWumpus()
+
+	def CheckWumpus (self):
+		if ((self.wumpusLocation is None) and (len(self.wumpusCandidates) == 1)):
+			self.wumpusLocation = next(iter(self.wumpusCandidates))
@@ -0,0 +1,202 @@
+# LocationSet.py
+#
+# Set of (x,y) locations kept as an int bitmask for bulk operations, for use by the search engine
+# and agents. Bit positions interleave the bits of x and y (Morton order), so the mask grows with
+# the explored area rather than with a fixed world size, and masks of any two sets line up for
+# bulk union/intersection/difference. Coordinates must be non-negative.
+
+# Spread the 8 bits of each byte value into the even bits of a 16-bit value.
+spreadByte = []
+for value in range(256):
+	spread = 0
+	for bit in range(8):
+		if (value & (1 << bit)):
+			spread |= 1 << (2 * bit)
+	spreadByte.append(spread)
+
+def Spread (value):
+	if (value < 256):
+		return spreadByte[value]
+	spread = 0
+	shift = 0
+	while (value):
+		spread |= spreadByte[value & 0xFF] << shift
+		value >>= 8
+		shift += 16
+	return spread
+
+def Compact (index):
+	value = 0
+	bit = 0
+	while (index):
+		if (index & 1):
+			value |= 1 << bit
+		index >>= 2
+		bit += 1
+	return value
+
+# Bit position of location (x,y).
+def LocationIndex (x, y):
+	return Spread(x) | (Spread(y) << 1)
+
+# Bits set in each byte value, lowest first.
+byteBits = [[bit for bit in range(8) if (value & (1 << bit))] for value in range(256)]
+
+# Builds the mask of the given locations in one pass over a bytearray, rather than OR-ing in one
+# bit at a time (each of which copies the whole int).
+def LocationsMask (locations, maxCoordinate):
+	data = bytearray(LocationIndex(maxCoordinate, maxCoordinate) // 8 + 1)
+	for x,y in locations:
+		index = LocationIndex(x, y)
+		data[index >> 3] |= 1 << (index & 7)
+	return int.from_bytes(data, "little")
+
+# Yields the locations in a mask, in Morton order.
+def MaskLocations (mask):
+	data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+	for byteIndex, value in enumerate(data):
+		if (value):
+			for bit in byteBits[value]:
+				index = (byteIndex << 3) | bit
+				yield (Compact(index), Compact(index >> 1))
+
+# Single-location operations (add, discard, in) go through a set of (x,y) tuples, and bulk
+# operations through the mask, since changing or testing one bit of an int takes time in the size
+# of the whole mask. Each form is built from the other when first needed after a change (None
+# until then), so a run of single-location operations or of bulk operations costs no conversions.
+class LocationSet:
+
+	__slots__ = ("locations", "maskCache", "maxCoordinate")
+
+	def __init__(self, locations = ()):
+		self.locations = set() # Locations as (x,y) tuples, or None
+		self.maskCache = 0 # Bitmask, or None
+		self.maxCoordinate = 0 # Upper bound on any coordinate ever added
+		for location in locations:
+			self.add(location)
+
+	@classmethod
+	def FromMask (cls, mask, maxCoordinate = None):
+		locationSet = cls()
+		locationSet.locations = None
+		locationSet.maskCache = mask
+		if (maxCoordinate is None):
+			maxCoordinate = max([max(location) for location in locationSet] + [0])
+		locationSet.maxCoordinate = maxCoordinate
+		return locationSet
+
+	def Mask (self):
+		if (self.maskCache is None):
+			self.maskCache = LocationsMask(self.locations, self.maxCoordinate)
+		return self.maskCache
+
+	def Locations (self):
+		if (self.locations is None):
+			self.locations = set(MaskLocations(self.maskCache))
+		return self.locations
+
+	def add (self, location):
+		x, y = location
+		if ((x < 0) or (y < 0)):
+			raise ValueError("LocationSet coordinates must be non-negative: " + str(location))
+		locations = self.Locations()
+		if (not (x,y) in locations):
+			locations.add((x,y))
+			self.maskCache = None
+		if (x > self.maxCoordinate):
+			self.maxCoordinate = x
+		if (y > self.maxCoordinate):
+			self.maxCoordinate = y
+
+	def discard (self, location):
+		location = tuple(location)
+		locations = self.Locations()
+		if (location in locations):
+			locations.discard(location)
+			self.maskCache = None
+
+	def remove (self, location):
+		if (not location in self):
+			raise KeyError(location)
+		self.discard(location)
+
+	def clear (self):
+		self.locations = set()
+		self.maskCache = 0
+
+	def copy (self):
+		locationSet = LocationSet.FromMask(self.maskCache, self.maxCoordinate)
+		if (self.locations is not None):
+			locationSet.locations = set(self.locations)
+		return locationSet
+
+	def __contains__ (self, location):
+		return tuple(location) in self.Locations()
+
+	# Yields locations as (x,y) tuples in Morton order.
+	def __iter__ (self):
+		return MaskLocations(self.Mask())
+
+	def __len__ (self):
+		if (self.locations is not None):
+			return len(self.locations)
+		return bin(self.maskCache).count("1")
+
+	def __bool__ (self):
+		if (self.locations is not None):
+			return len(self.locations) != 0
+		return self.maskCache != 0
+
+	def __eq__ (self, other):
+		if (isinstance(other, LocationSet)):
+			if ((self.locations is not None) and (other.locations is not None)):
+				return self.locations == other.locations
+			return self.Mask() == other.Mask()
+		return NotImplemented
+
+	def __repr__ (self):
+		return "LocationSet(" + str(sorted(self)) + ")"
+
+	# Bulk operations combine the masks directly. The other operand may be any iterable of locations.
+
+	def union (self, other):
+		other = AsLocationSet(other)
+		return LocationSet.FromMask(self.Mask() | other.Mask(), max(self.maxCoordinate, other.maxCoordinate))
+
+	def intersection (self, other):
+		other = AsLocationSet(other)
+		return LocationSet.FromMask(self.Mask() & other.Mask(), min(self.maxCoordinate, other.maxCoordinate))
+
+	def difference (self, other):
+		return LocationSet.FromMask(self.Mask() & ~AsLocationSet(other).Mask(), self.maxCoordinate)
+
+	def update (self, other):
+		other = AsLocationSet(other)
+		self.SetMask(self.Mask() | other.Mask())
+		self.maxCoordinate = max(self.maxCoordinate, other.maxCoordinate)
+		return self
+
+	def intersection_update (self, other):
+		self.SetMask(self.Mask() & AsLocationSet(other).Mask())
+		return self
+
+	def difference_update (self, other):
+		self.SetMask(self.Mask() & ~AsLocationSet(other).Mask())
+		return self
+
+	def SetMask (self, mask):
+		if (mask != self.maskCache):
+			self.maskCache = mask
+			self.locations = None
+
+	__or__ = union
+	__and__ = intersection
+	__sub__ = difference
+	__ior__ = update
+	__iand__ = intersection_update
+	__isub__ = difference_update
+
+def AsLocationSet (locations):
+	if (isinstance(locations, LocationSet)):
+		return locations
+	return LocationSet(locations)
@@ -0,0 +1,207 @@
+# ParallelRunner.py
+#
+# Runs agent trials in parallel over a process pool using the pure-Python simulator.
+#
+# Usage: python ParallelRunner.py [-agent <module>]... [-corpus <directory>]... [-world <file>]...
+#                                 [-packed <file>]... [-random N] [-size N] [-seed N] [-tries N]
+#                                 [-workers N] [-chunksize N]
+#
+# A job is one trial: a new agent playing -tries games on one world, which is either a world
+# file (every *.txt file under each -corpus directory, plus each -world file), a world of a
+# -packed corpus file (see WorldCorpus.py), or one of -random seeded random worlds of the given
+# -size. Every job is run for every -agent module. Workers import each agent module and map each
+# packed corpus once and reuse them for all their jobs. Results arrive in completion
+# order and are merged by job, so the printed averages are the same for any number of workers.
+
+import os
+import sys
+import glob
+import time
+import random
+import importlib
+import multiprocessing
+import WumpusWorld
+import WorldCorpus
+import wumpsim
+
+# Agent modules imported and packed corpora mapped by this worker process, by name.
+agentModules = {}
+corpora = {}
+
+def GetAgentClass (agentModule):
+	module = agentModules.get(agentModule)
+	if (module is None):
+		module = importlib.import_module(agentModule)
+		agentModules[agentModule] = module
+	return module.Agent
+
+def GetCorpus (corpusFile):
+	corpus = corpora.get(corpusFile)
+	if (corpus is None):
+		corpus = WorldCorpus.WorldCorpus(corpusFile)
+		corpora[corpusFile] = corpus
+	return corpus
+
+# Job = (job index, agent module, world file or None, world size, seed, number of tries, world
+# index or None); with a world index, the world file is a packed corpus. The seed generates the
+# random world, and also seeds the random module so agents that use it
+# behave the same whichever worker runs the job. Returns (job index, [(score, moves), ...]),
+# or (job index, error message) if the agent raised an exception.
+def RunJob (job):
+	try:
+		return RunTrial(job)
+	except Exception as exception:
+		return job[0], type(exception).__name__ + ": " + str(exception)
+
+def RunTrial (job):
+	jobIndex, agentModule, worldFile, worldSize, seed, numTries, worldIndex = job
+	agentClass = GetAgentClass(agentModule)
+	random.seed(seed)
+	if (worldIndex is not None):
+		wumpusWorld = GetCorpus(worldFile).World(worldIndex)
+	elif (worldFile is not None):
+		wumpusWorld = WumpusWorld.WumpusWorld(worldFile = worldFile)
+	else:
+		wumpusWorld = WumpusWorld.WumpusWorld(size = worldSize, rng = random.Random(seed))
+	agent = agentClass()
+	results = []
+	for tries in range(numTries):
+		wumpusWorld.Initialize()
+		results.append(wumpsim.PlayGame(wumpusWorld, agent))
+	del agent
+	return jobIndex, results
+
+# Returns the world files under the given corpus directories, in sorted order.
+def CorpusWorldFiles (corpusDirectories):
+	worldFiles = []
+	for directory in corpusDirectories:
+		worldFiles += sorted(glob.glob(os.path.join(directory, "**", "*.txt"), recursive = True))
+	return worldFiles
+
+# Worlds are (world file, None) or (packed corpus file, world index).
+def MakeJobs (agentModules, worlds, numRandom, worldSize, seed, numTries):
+	jobs = []
+	for agentModule in agentModules:
+		for index, (worldFile, worldIndex) in enumerate(worlds):
+			jobs.append((len(jobs), agentModule, worldFile, worldSize, seed + index, numTries, worldIndex))
+		for index in range(numRandom):
+			jobs.append((len(jobs), agentModule, None, worldSize, seed + len(worlds) + index, numTries, None))
+	return jobs
+
+# Returns (corpus file, world index) for every world of the packed corpus files.
+def PackedWorlds (corpusFiles):
+	worlds = []
+	for corpusFile in corpusFiles:
+		corpus = WorldCorpus.WorldCorpus(corpusFile)
+		worlds += [(corpusFile, index) for index in range(len(corpus))]
+		corpus.close()
+	return worlds
+
+# Runs the jobs on numWorkers processes (in this process if numWorkers is 1), yielding
+# (job, results) in completion order.
+def RunJobs (jobs, numWorkers = None, chunkSize = 1):
+	if (numWorkers == 1):
+		for job in jobs:
+			yield job, RunJob(job)[1]
+		return
+	with multiprocessing.Pool(numWorkers) as pool:
+		for jobIndex, results in pool.imap_unordered(RunJob, jobs, chunkSize):
+			yield jobs[jobIndex], results
+
+# Job label used in the output: the world file or corpus world, or the seed for random worlds.
+def JobName (job):
+	if (job[6] is not None):
+		return job[2] + " world " + str(job[6])
+	if (job[2] is not None):
+		return job[2]
+	return "random size " + str(job[3]) + " seed " + str(job[4])
+
+# Prints each agent's trials and average score. jobResults holds each job's results, by job
+# index; merging in job order means the output does not depend on completion order. Trials
+# that failed are reported and left out of the averages.
+def PrintResults (agentModules, jobs, jobResults, numTries):
+	for agentModule in agentModules:
+		print("Agent " + agentModule + ":")
+		totalScore = 0
+		numGames = 0
+		for job, results in zip(jobs, jobResults):
+			if (job[1] != agentModule):
+				continue
+			if (isinstance(results, str)):
+				print("  " + JobName(job) + ": Error: " + results)
+				continue
+			trialScore = sum([score for score, numMoves in results])
+			print("  " + JobName(job) + ": Average score for trial = " + wumpsim.FormatScore(trialScore / numTries) +
+				  " (average moves = " + wumpsim.FormatScore(sum([numMoves for score, numMoves in results]) / numTries) + ")")
+			totalScore += trialScore
+			numGames += numTries
+		if (numGames):
+			print("  All trials completed: Average score for all trials = " + wumpsim.FormatScore(totalScore / numGames))
+
+def main (argv):
+	agentModules = []
+	corpusDirectories = []
+	worldFiles = []
+	corpusFiles = []
+	numRandom = 0
+	worldSize = 4
+	seed = 1
+	numTries = 1
+	numWorkers = None
+	chunkSize = 1
+
+	# Process command-line options
+	i = 1
+	while (i < len(argv)):
+		if (argv[i] == "-agent"):
+			i += 1
+			agentModules.append(argv[i])
+		elif (argv[i] == "-corpus"):
+			i += 1
+			corpusDirectories.append(argv[i])
+		elif (argv[i] == "-world"):
+			i += 1
+			worldFiles.append(argv[i])
+		elif (argv[i] == "-packed"):
+			i += 1
+			corpusFiles.append(argv[i])
+		elif (argv[i] == "-random"):
+			i += 1
+			numRandom = int(argv[i])
+		elif (argv[i] == "-size"):
+			i += 1
+			worldSize = max(int(argv[i]), 2)
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		elif (argv[i] == "-tries"):
+			i += 1
+			numTries = int(argv[i])
+		elif (argv[i] == "-workers"):
+			i += 1
+			numWorkers = int(argv[i])
+		elif (argv[i] == "-chunksize"):
+			i += 1
+			chunkSize = int(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+	if (not agentModules):
+		agentModules = ["Agent"]
+
+	worlds = [(worldFile, None) for worldFile in CorpusWorldFiles(corpusDirectories) + worldFiles] + PackedWorlds(corpusFiles)
+	jobs = MakeJobs(agentModules, worlds, numRandom, worldSize, seed, numTries)
+	startTime = time.perf_counter()
+	jobResults = [None] * len(jobs)
+	for completed, (job, results) in enumerate(RunJobs(jobs, numWorkers, chunkSize)):
+		jobResults[job[0]] = results
+		if (((completed + 1) % 100 == 0) or (completed + 1 == len(jobs))):
+			sys.stderr.write("\r" + str(completed + 1) + "/" + str(len(jobs)) + " trials")
+	seconds = time.perf_counter() - startTime
+	sys.stderr.write("\n" + str(len(jobs) * numTries) + " games in " + "%.3f" % seconds + " s\n")
+	PrintResults(agentModules, jobs, jobResults, numTries)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -19,3 +19,32 @@ class Percept:
 		self.bump = bump
 		self.scream = scream
 
+
+# Packed percepts: one bit per percept, as passed by the fast PyAgent bridge.
+STENCH = 1
+BREEZE = 2
+GLITTER = 4
+BUMP = 8
+SCREAM = 16
+
+def PackPercept (stench, breeze, glitter, bump, scream):
+	return (STENCH if stench else 0) | (BREEZE if breeze else 0) | (GLITTER if glitter else 0) | (BUMP if bump else 0) | (SCREAM if scream else 0)
+
+# A Percept that cannot be changed, so one instance per packed value can be shared by every
+# caller (see internedPercepts).
+class ImmutablePercept(Percept):
+	def __init__(self, bits):
+		self.__dict__.update(stench = bool(bits & STENCH), breeze = bool(bits & BREEZE), glitter = bool(bits & GLITTER),
+							 bump = bool(bits & BUMP), scream = bool(bits & SCREAM), bits = bits)
+
+	def __setattr__(self, name, value):
+		raise AttributeError("ImmutablePercept is read-only")
+
+	def __delattr__(self, name):
+		raise AttributeError("ImmutablePercept is read-only")
+
+	def set_percept(self, stench, breeze, glitter, bump, scream):
+		raise AttributeError("ImmutablePercept is read-only")
+
+# The 32 possible percepts, indexed by packed value.
+internedPercepts = tuple([ImmutablePercept(bits) for bits in range(32)])
@@ -0,0 +1,170 @@
+# Profiling.py
+#
+# Opt-in timing of the PyAgent entry points and SearchEngine's searches.
+#
+# Set WUMPUS_PROFILE=1 to enable it. PyAgent.py then wraps its PyAgent_* functions, and
+# SearchEngine.Search and SearchEngine.FindDistances are wrapped, so agents need no changes;
+# when it is not set nothing is wrapped and there is no overhead (cProfile, pstats and json are
+# only imported when used).
+# The wall time of each call goes into a fixed-size histogram per function (power-of-two
+# buckets from 1 microsecond). With WUMPUS_PROFILE_SLOWEST=N, every Process call also runs
+# under cProfile and the profiles of the N slowest calls are kept. A summary (calls, mean,
+# p50/p95/p99 from the histogram, max, and the slowest calls' top functions) is written when
+# the trial ends (PyAgent_Destructor) to stderr, and appended as a JSON line to
+# WUMPUS_PROFILE_FILE if that is set.
+
+import os
+import sys
+import time
+import heapq
+import functools
+
+NUM_BUCKETS = 32
+BUCKET_BASE = 1e-6 # Upper bound of the first bucket, in seconds
+
+class Histogram:
+
+	__slots__ = ("counts", "calls", "total", "maximum")
+
+	def __init__(self):
+		self.Clear()
+
+	def Clear (self):
+		self.counts = [0] * NUM_BUCKETS
+		self.calls = 0
+		self.total = 0.0
+		self.maximum = 0.0
+
+	def Add (self, seconds):
+		bucket = 0
+		bound = BUCKET_BASE
+		while ((seconds > bound) and (bucket < NUM_BUCKETS - 1)):
+			bound *= 2
+			bucket += 1
+		self.counts[bucket] += 1
+		self.calls += 1
+		self.total += seconds
+		if (seconds > self.maximum):
+			self.maximum = seconds
+
+	# Upper bound of the bucket holding the p-th percentile call (capped at the slowest call).
+	def Percentile (self, p):
+		if (not self.calls):
+			return None
+		rank = max(-(-p * self.calls // 100), 1)
+		seen = 0
+		for bucket, count in enumerate(self.counts):
+			seen += count
+			if (seen >= rank):
+				return min(BUCKET_BASE * (2 ** bucket), self.maximum)
+		return self.maximum
+
+	def Summary (self):
+		return {"calls": self.calls, "total": self.total, "mean": (self.total / self.calls) if self.calls else None,
+				"p50": self.Percentile(50), "p95": self.Percentile(95), "p99": self.Percentile(99),
+				"max": self.maximum, "buckets": list(self.counts)}
+
+class Profiler:
+
+	# The cProfile stats of the numSlowest slowest profiled calls are kept.
+	def __init__(self, numSlowest = 0, stream = None, summaryFile = None):
+		self.numSlowest = numSlowest
+		self.stream = stream
+		self.summaryFile = summaryFile
+		self.trials = 0
+		self.histograms = {}
+		self.slowest = [] # Heap of (seconds, call number, name, stats text)
+		self.profiledCalls = 0
+
+	# Returns function wrapped to time each call under name; if profile is set (and numSlowest
+	# is not 0), calls also run under cProfile. Only outermost calls should be profiled, as
+	# profilers cannot be nested.
+	def Wrap (self, name, function, profile = False):
+		histogram = self.histograms.setdefault(name, Histogram())
+		profile = profile and (self.numSlowest > 0)
+		if (profile):
+			import cProfile
+
+		@functools.wraps(function)
+		def Timed (*args, **kwargs):
+			if (profile):
+				profiler = cProfile.Profile()
+				startTime = time.perf_counter()
+				profiler.enable()
+				try:
+					return function(*args, **kwargs)
+				finally:
+					profiler.disable()
+					seconds = time.perf_counter() - startTime
+					histogram.Add(seconds)
+					self.KeepIfSlow(name, seconds, profiler)
+			startTime = time.perf_counter()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				histogram.Add(time.perf_counter() - startTime)
+		Timed.histogram = histogram
+		return Timed
+
+	def KeepIfSlow (self, name, seconds, profiler):
+		self.profiledCalls += 1
+		if ((len(self.slowest) >= self.numSlowest) and (seconds <= self.slowest[0][0])):
+			return
+		import io
+		import pstats
+		text = io.StringIO()
+		pstats.Stats(profiler, stream = text).sort_stats("cumulative").print_stats(10)
+		entry = (seconds, self.profiledCalls, name, text.getvalue())
+		if (len(self.slowest) < self.numSlowest):
+			heapq.heappush(self.slowest, entry)
+		else:
+			heapq.heapreplace(self.slowest, entry)
+
+	def Summary (self):
+		return {"trial": self.trials, "functions": dict([(name, histogram.Summary()) for name, histogram in self.histograms.items()]),
+				"slowest": [{"function": name, "seconds": seconds, "call": call, "profile": text}
+							for seconds, call, name, text in sorted(self.slowest, reverse = True)]}
+
+	# Writes the summary of the trial just finished and starts counting the next one.
+	def EndTrial (self):
+		self.trials += 1
+		summary = self.Summary()
+		stream = self.stream or sys.stderr
+		lines = ["Profile of trial " + str(self.trials) + ":"]
+		for name, function in summary["functions"].items():
+			if (function["calls"]):
+				lines.append("  " + name + ": " + str(function["calls"]) + " calls, mean " + "%.3f" % (function["mean"] * 1000) +
+							 " ms, p50 " + "%.3f" % (function["p50"] * 1000) + " ms, p95 " + "%.3f" % (function["p95"] * 1000) +
+							 " ms, p99 " + "%.3f" % (function["p99"] * 1000) + " ms, max " + "%.3f" % (function["max"] * 1000) + " ms")
+		for slow in summary["slowest"]:
+			lines.append("  Slow " + slow["function"] + " call " + str(slow["call"]) + " (" + "%.3f" % (slow["seconds"] * 1000) + " ms):")
+			lines += ["    " + line for line in slow["profile"].strip().splitlines()]
+		stream.write("\n".join(lines) + "\n")
+		stream.flush()
+		if (self.summaryFile):
+			import json
+			with open(self.summaryFile, "a") as summaryFile:
+				summaryFile.write(json.dumps(summary) + "\n")
+		for histogram in self.histograms.values():
+			histogram.Clear()
+		self.slowest = []
+		self.profiledCalls = 0
+		return summary
+
+# The profiler, if enabled.
+profiler = None
+
+def Enable (numSlowest = 0, stream = None, summaryFile = None):
+	global profiler
+	if (profiler is None):
+		import Search
+		profiler = Profiler(numSlowest, stream, summaryFile)
+		Search.SearchEngine.Search = profiler.Wrap("SearchEngine.Search", Search.SearchEngine.Search)
+		Search.SearchEngine.FindDistances = profiler.Wrap("SearchEngine.FindDistances", Search.SearchEngine.FindDistances)
+	return profiler
+
+def EnabledByEnvironment ():
+	return os.environ.get("WUMPUS_PROFILE", "") not in ("", "0")
+
+if (EnabledByEnvironment()):
+	Enable(int(os.environ.get("WUMPUS_PROFILE_SLOWEST", "0")), summaryFile = os.environ.get("WUMPUS_PROFILE_FILE"))
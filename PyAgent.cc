@@ -19,6 +19,12 @@ Agent::Agent (PyObject* module)
 	PyObject *pFunc = PyObject_GetAttrString(pModule, "PyAgent_Constructor");
 	myPyObject_CallObject(pFunc, NULL);
 	Py_DECREF(pFunc);
+	pProcessPlan = NULL;
+	if (PyObject_HasAttrString(pModule, "PyAgent_ProcessPlan")) {
+		pProcessPlan = PyObject_GetAttrString(pModule, "PyAgent_ProcessPlan");
+	}
+	planIndex = 0;
+	planExecuted = 0;
 }
 
 Agent::~Agent ()
@@ -26,18 +32,56 @@ Agent::~Agent ()
 	PyObject *pFunc = PyObject_GetAttrString(pModule, "PyAgent_Destructor");
 	myPyObject_CallObject(pFunc, NULL);
 	Py_DECREF(pFunc);
+	Py_XDECREF(pProcessPlan);
 }
 
 void Agent::Initialize ()
 {
+	plan.clear();
+	planIndex = 0;
+	planExecuted = 0;
 	PyObject *pFunc = PyObject_GetAttrString(pModule, "PyAgent_Initialize");
 	myPyObject_CallObject(pFunc, NULL);
 	Py_DECREF(pFunc);
 }
 
+// If the module defines PyAgent_ProcessPlan, the percept is passed as one packed int (stench = 1,
+// breeze = 2, glitter = 4, bump = 8, scream = 16) along with the number of plan actions taken since
+// the last call. It returns a tuple (action, action1, percept1, mask1, action2, ...) of the action
+// to take now and a plan of further actions, which are taken here without calling Python for as
+// long as each percept matches the expected one.
 Action Agent::Process (Percept& percept)
 {
 	PyObject *pValue;
+	if (pProcessPlan != NULL) {
+		int bits = (percept.Stench ? 1 : 0) | (percept.Breeze ? 2 : 0) | (percept.Glitter ? 4 : 0) |
+			(percept.Bump ? 8 : 0) | (percept.Scream ? 16 : 0);
+		if (planIndex < plan.size()) {
+			PlanStep& step = plan[planIndex];
+			if ((bits & step.mask) == step.percept) {
+				planIndex++;
+				planExecuted++;
+				return step.action;
+			}
+		}
+		PyObject *pArgs = Py_BuildValue("(ii)", bits, planExecuted);
+		pValue = myPyObject_CallObject(pProcessPlan, pArgs);
+		Py_DECREF(pArgs);
+		plan.clear();
+		planIndex = 0;
+		planExecuted = 0;
+		Py_ssize_t size = PyTuple_Size(pValue);
+		Action action = (Action) PyInt_AsLong(PyTuple_GetItem(pValue, 0));
+		for (Py_ssize_t i = 1; i + 2 < size; i += 3) {
+			PlanStep step;
+			step.action = (Action) PyInt_AsLong(PyTuple_GetItem(pValue, i));
+			step.percept = (int) PyInt_AsLong(PyTuple_GetItem(pValue, i + 1));
+			step.mask = (int) PyInt_AsLong(PyTuple_GetItem(pValue, i + 2));
+			plan.push_back(step);
+		}
+		Py_DECREF(pValue);
+		return action;
+	}
 	PyObject *pArgs = PyTuple_New(5);
 	if (percept.Stench) {
 		pValue = PyInt_FromLong(1);
@@ -80,9 +124,18 @@ Action Agent::Process (Percept& percept)
 
 void Agent::GameOver (int score)
 {
-	PyObject *pArgs = PyTuple_New(1);
-	PyObject *pValue = PyInt_FromLong(score);
-	PyTuple_SetItem(pArgs, 0, pValue);
+	PyObject *pArgs;
+	if (pProcessPlan != NULL) {
+		// Also report the plan actions taken since the agent was last called
+		pArgs = Py_BuildValue("(ii)", score, planExecuted);
+		plan.clear();
+		planIndex = 0;
+		planExecuted = 0;
+	} else {
+		pArgs = PyTuple_New(1);
+		PyObject *pValue = PyInt_FromLong(score);
+		PyTuple_SetItem(pArgs, 0, pValue);
+	}
 	PyObject *pFunc = PyObject_GetAttrString(pModule, "PyAgent_GameOver");
 	myPyObject_CallObject(pFunc, pArgs);
 	Py_DECREF(pArgs);
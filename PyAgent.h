@@ -4,6 +4,7 @@
 #define PYAGENT_H
 
 #include <Python.h>
+#include <vector>
 #include "Action.h"
 #include "Percept.h"
 
@@ -12,6 +13,15 @@
 #define PyInt_AsLong PyLong_AsLong
 #endif
 
+// One queued action of an agent's plan: the action is taken without calling the agent if the
+// packed percept, masked, equals the expected percept.
+struct PlanStep
+{
+	Action action;
+	int percept;
+	int mask;
+};
+
 class Agent
 {
 public:
@@ -22,6 +32,10 @@ public:
 	void GameOver (int score);
 
 	PyObject *pModule;
+	PyObject *pProcessPlan; // PyAgent_ProcessPlan, or NULL if the module does not define it
+	vector<PlanStep> plan;
+	unsigned int planIndex;
+	int planExecuted; // Plan actions taken since the agent was last called
 };
 
 #endif // PYAGENT_H
@@ -1,7 +1,8 @@
 # PyAgent.py
 
 from Agent import Agent
-from Percept import Percept
+from Percept import Percept, internedPercepts
+import Profiling
 
 py_agent = None
 
@@ -23,6 +24,44 @@ def PyAgent_Process (stench, breeze, glitter, bump, scream):
     percept.set_percept(bool(stench), bool(breeze), bool(glitter), bool(bump), bool(scream))
     return py_agent.Process(percept)
 
-def PyAgent_GameOver (score):
+# Fast bridge: the percept is packed into one int (Percept.STENCH | Percept.BREEZE | ...) and
+# mapped to one of the 32 shared, immutable Percept instances.
+def PyAgent_ProcessPacked (percept_bits):
     global py_agent
+    return py_agent.Process(internedPercepts[percept_bits])
+
+# Fast bridge with plans. num_executed plan actions were taken by the host since the last call.
+# Returns (action, action1, percept1, mask1, action2, percept2, mask2, ...): the action to take
+# now, then the queued actions from the agent's PlanAhead (if it has one), which the host takes
+# in order without calling the agent while (packed percept & mask) == expected percept.
+def PyAgent_ProcessPlan (percept_bits, num_executed):
+    global py_agent
+    if num_executed:
+        py_agent.AdvancePlan(num_executed)
+    action = py_agent.Process(internedPercepts[percept_bits])
+    if not hasattr(py_agent, "PlanAhead"):
+        return (action,)
+    plan = [action]
+    for step in py_agent.PlanAhead():
+        plan.extend(step)
+    return tuple(plan)
+
+def PyAgent_GameOver (score, num_executed = 0):
+    global py_agent
+    if num_executed:
+        py_agent.AdvancePlan(num_executed)
     py_agent.GameOver(score)
+
+# Opt-in profiling (see Profiling.py): time every entry point, and end the trial's profile
+# when the agent is destroyed.
+if Profiling.profiler is not None:
+    PyAgent_Initialize = Profiling.profiler.Wrap("PyAgent_Initialize", PyAgent_Initialize)
+    PyAgent_Process = Profiling.profiler.Wrap("PyAgent_Process", PyAgent_Process, profile = True)
+    PyAgent_ProcessPacked = Profiling.profiler.Wrap("PyAgent_ProcessPacked", PyAgent_ProcessPacked, profile = True)
+    PyAgent_ProcessPlan = Profiling.profiler.Wrap("PyAgent_ProcessPlan", PyAgent_ProcessPlan, profile = True)
+    PyAgent_GameOver = Profiling.profiler.Wrap("PyAgent_GameOver", PyAgent_GameOver)
+    unprofiled_destructor = PyAgent_Destructor
+
+    def PyAgent_Destructor ():
+        unprofiled_destructor()
+        Profiling.profiler.EndTrial()
@@ -2,10 +2,13 @@
 
 from Percept import Percept
 import Action, random
+import Instrumentation
 
 class Agent:
     def __init__(self):
 
+        self.instrumentation = Instrumentation.default # Counters and log output.
+
         # Create a dictionary to map cardinal directions to their effect on position.
         self.orientationMovementTransform = {'N':[0,1], 'E':[1,0], 'S':[0,-1], 'W':[-1,0]}
 
@@ -70,7 +73,7 @@ class Agent:
         Given a Percept option, determine what action to take, and return it.
         """
 
-        print("Perceived position:",self.position)
+        self.instrumentation.Log("Perceived position:",self.position)
 
         # Grab the gold if a glitter is perceived.
         if percept.glitter: self.hasGold = True; return Action.GRAB
@@ -86,4 +89,4 @@ class Agent:
 
 
     def GameOver(self, score):
-        pass
+        self.gameStats = self.instrumentation.EndGame(score)
@@ -2,11 +2,18 @@
 #
 # A* search for wumpus world navigation in Python.
 
-import sys
+import os
+import time
+import heapq
+import collections
 import Action
 import Orientation
+from LocationSet import LocationSet
+import Instrumentation
 
 class SearchState:
+
+	__slots__ = ("location", "orientation", "depth", "parent", "action", "heuristic", "cost")
 	
 	def __init__(self, location, orientation, depth, parent, action):
 		self.location = location
@@ -23,13 +30,260 @@ class SearchState:
 		else:
 			return False
 
+# Search states packed into a single int: ((x * stride) + y) * 4 + orientation. A table covers
+# coordinates 0..size+1. Successors are computed from the encoding rather than stored, so a table
+# takes the same small amount of memory whatever its size: TURNLEFT and TURNRIGHT add
+# turnLeftSteps and turnRightSteps[orientation], and GOFORWARD adds forwardSteps[orientation].
+# The sum is negative if GOFORWARD leaves the table below 0, and may wrap into the cells at
+# size+1 when it leaves a cell at y = 0 or size+1; searches only move from and into safe or goal
+# locations, which are never at size+1, so they only need to check for a negative state. Forward
+# and Backward (the state GOFORWARD comes from, for searches run from the goal) check the
+# coordinates and return -1 outside the table. Tables are created once per size and shared.
+class SuccessorTable:
+
+	__slots__ = ("size", "stride", "forwardSteps")
+
+	def __init__(self, size):
+		self.size = size
+		self.stride = size + 2
+		self.forwardSteps = (self.stride * 4, 4, -self.stride * 4, -4) # RIGHT, UP, LEFT, DOWN
+
+	def Encode (self, x, y, orientation):
+		return ((x * self.stride) + y) * 4 + orientation
+
+	def Decode (self, state):
+		cell, orientation = divmod(state, 4)
+		x, y = divmod(cell, self.stride)
+		return x, y, orientation
+
+	def Forward (self, state):
+		return self.Move(state, 1)
+
+	def Backward (self, state):
+		return self.Move(state, -1)
+
+	def Move (self, state, sign):
+		x, y, orientation = self.Decode(state)
+		moveX, moveY = orientationMoves[orientation]
+		if ((0 <= x + sign * moveX < self.stride) and (0 <= y + sign * moveY < self.stride)):
+			return state + sign * self.forwardSteps[orientation]
+		return -1
+
+# Orientations are numbered counterclockwise (RIGHT, UP, LEFT, DOWN), so turning left adds one
+# and turning right subtracts one, modulo 4.
+turnLeftSteps = (1, 1, 1, -3)
+turnRightSteps = (3, -1, -1, -1)
+orientationMoves = ((1,0), (0,1), (-1,0), (0,-1))
+
+successorTables = {}
+
+# Returns the shared successor table covering coordinates up to maxCoordinate. Sizes are
+# rounded up to a power of two so a growing world reuses the same few tables.
+def GetSuccessorTable (maxCoordinate):
+	size = 8
+	while (size < maxCoordinate):
+		size *= 2
+	table = successorTables.get(size)
+	if (table is None):
+		table = SuccessorTable(size)
+		successorTables[size] = table
+	return table
+
+# Built-in heuristics, selected by name with SearchEngine(heuristic = name). Each takes the
+# state's x, y and orientation and the goal's x, y and orientation.
+
+def ManhattanHeuristic (x, y, orientation, goalX, goalY, goalOrientation):
+	return abs(x - goalX) + abs(y - goalY)
+
+# Number of turns needed to go from one orientation to another.
+def TurnCount (fromOrientation, toOrientation):
+	turns = (toOrientation - fromOrientation) % 4
+	return min(turns, 4 - turns)
+
+# City block distance plus the fewest turns needed to face every direction the agent has to
+# move in and then the goal orientation. This is the exact cost with no unsafe locations in
+# the way, so it is admissible and consistent, and it is never less than ManhattanHeuristic.
+def TurnAwareHeuristic (x, y, orientation, goalX, goalY, goalOrientation):
+	directions = []
+	if (goalX > x):
+		directions.append(Orientation.RIGHT)
+	elif (goalX < x):
+		directions.append(Orientation.LEFT)
+	if (goalY > y):
+		directions.append(Orientation.UP)
+	elif (goalY < y):
+		directions.append(Orientation.DOWN)
+	if (not directions):
+		turns = TurnCount(orientation, goalOrientation)
+	elif (len(directions) == 1):
+		turns = TurnCount(orientation, directions[0]) + TurnCount(directions[0], goalOrientation)
+	else:
+		first, second = directions
+		turns = 1 + min(TurnCount(orientation, first) + TurnCount(second, goalOrientation),
+						TurnCount(orientation, second) + TurnCount(first, goalOrientation))
+	return abs(x - goalX) + abs(y - goalY) + turns
+
+heuristicFunctions = {"manhattan": ManhattanHeuristic, "turnaware": TurnAwareHeuristic}
+
+def RegisterHeuristic (name, function):
+	heuristicFunctions[name] = function
+
+# Per-goal heuristic tables: dicts from integer state to heuristic, filled in as states are
+# reached, so each state's heuristic is computed once per goal and then shared by every search
+# toward that goal. A table only holds the states searches have reached, and the cache is bounded
+# by the number of states held by all its tables (least recently used tables are dropped first).
+heuristicTables = collections.OrderedDict() # Key -> [table, states counted in heuristicTableStates]
+heuristicTableStates = 0
+HEURISTIC_CACHE_STATES = 1 << 18
+
+def GetHeuristicTable (name, table, goalX, goalY, goalOrientation):
+	global heuristicTableStates
+	# Only the table returned last can have grown since, as it is the one the last search filled
+	if (heuristicTables):
+		entry = next(reversed(heuristicTables.values()))
+		heuristicTableStates += len(entry[0]) - entry[1]
+		entry[1] = len(entry[0])
+	key = (name, table.size, goalX, goalY, goalOrientation)
+	entry = heuristicTables.get(key)
+	if (entry is None):
+		entry = [{}, 0]
+		heuristicTables[key] = entry
+	heuristicTables.move_to_end(key)
+	while ((heuristicTableStates > HEURISTIC_CACHE_STATES) and (len(heuristicTables) > 1)):
+		heuristicTableStates -= heuristicTables.popitem(last = False)[1][1]
+	return entry[0]
+
+# Drops the cached heuristic tables.
+def ClearHeuristicTables ():
+	global heuristicTableStates
+	heuristicTables.clear()
+	heuristicTableStates = 0
+
+# Weights tried in turn by the anytime search that runs when a search budget or deadline is set
+# (see SearchEngine.AnytimeAStarSearch). The last must be 1 for the final search to be optimal.
+ANYTIME_WEIGHTS = (3.0, 2.0, 1.5, 1.25, 1.0)
+MAX_DEADLINE_DOUBLINGS = 16 # See SearchEngine.SetMoveDeadline
+TIME_CHECK_INTERVAL = 64 # Nodes expanded between checks of the clock (and before the first, so every search makes progress)
+
+# Seconds each Process call of the sample agents may spend searching, from the
+# WUMPUS_MOVE_DEADLINE environment variable (in milliseconds), or None (no deadline).
+def DefaultMoveDeadline ():
+	milliseconds = os.environ.get("WUMPUS_MOVE_DEADLINE")
+	if (not milliseconds):
+		return None
+	return float(milliseconds) / 1000
+
+# Actions that turn from one orientation to another, by (to - from) % 4.
+turnActions = {0: [], 1: [Action.TURNLEFT], 2: [Action.TURNLEFT, Action.TURNLEFT], 3: [Action.TURNRIGHT]}
+
+# Distances and predecessors from one start pose to every reachable pose, as returned by
+# SearchEngine.FindDistances. Where no orientation is given, the cheapest orientation is used.
+# startTurns, if any, turn from the caller's orientation to the one the search started from,
+# and come first in every distance and path.
+class DistanceField:
+
+	def __init__(self, table, depths, parents, actions, startTurns = ()):
+		self.table = table
+		self.depths = depths
+		self.parents = parents
+		self.actions = actions
+		self.startTurns = list(startTurns)
+
+	def BestState (self, location, orientation = None):
+		if ((min(location) < 0) or (max(location) > self.table.size + 1)):
+			return None
+		if (orientation is not None):
+			state = self.table.Encode(location[0], location[1], orientation)
+			return state if (state in self.depths) else None
+		bestState = None
+		for orientation in range(4):
+			state = self.table.Encode(location[0], location[1], orientation)
+			if ((state in self.depths) and ((bestState is None) or (self.depths[state] < self.depths[bestState]))):
+				bestState = state
+		return bestState
+
+	# Number of actions needed to reach the location, or None if it cannot be reached.
+	def Distance (self, location, orientation = None):
+		state = self.BestState(location, orientation)
+		return None if (state is None) else len(self.startTurns) + self.depths[state]
+
+	# Actions leading to the location, or None if it cannot be reached.
+	def PathTo (self, location, orientation = None):
+		state = self.BestState(location, orientation)
+		if (state is None):
+			return None
+		actionList = []
+		while (self.parents[state] != -1):
+			actionList.append(self.actions[state])
+			state = self.parents[state]
+		actionList.reverse()
+		return self.startTurns + actionList
+
+	# Returns the reachable location with the smallest distance (the first one given on ties),
+	# or None if none of them can be reached.
+	def Nearest (self, locations):
+		nearestLocation = None
+		nearestDistance = None
+		for location in locations:
+			distance = self.Distance(location)
+			if ((distance is not None) and ((nearestDistance is None) or (distance < nearestDistance))):
+				nearestLocation = location
+				nearestDistance = distance
+		return nearestLocation
+
+MAX_LOGGED_REMOVALS = 64 # Safe location removals remembered to validate cached paths
+
 class SearchEngine:
 	
-	def __init__(self):
+	# Set useHeap to False to run the original list-based A* (linear frontier insertion
+	# and linear Visited checks), e.g. to compare results or timings against the heap engine.
+	# FindPath results are kept in an LRU cache of pathCacheSize entries (0 disables it), each
+	# tagged with the safe locations version it was last checked against. Changing the safe
+	# locations only bumps the version; an entry is checked against the changes made since when
+	# it is looked up, and dropped if stale (see CachedPathValid). With keepPathsOnAdd, cached
+	# paths survive the addition of safe locations (they remain valid, though a shorter path may
+	# now exist); otherwise adding a safe location makes every entry stale.
+	# heuristic names a built-in heuristic (see heuristicFunctions) to use instead of
+	# overriding HeuristicFunction. Searches are counted and logged through instrumentation
+	# (by default the shared Instrumentation.default).
+	# nodeBudget (nodes generated) and timeBudget (seconds) bound each search, as does the
+	# deadline set with SetDeadline; with any of them set, FindPath runs AnytimeAStarSearch and
+	# may return a partial path. Searches cut short are counted in budgetHits.
+	def __init__(self, useHeap = True, pathCacheSize = 256, keepPathsOnAdd = True, heuristic = None,
+				 instrumentation = None, nodeBudget = None, timeBudget = None):
 		self.frontier = []
 		self.explored = []
-		self.safeLocations = []
+		self.safeLocations = LocationSet()
+		self.safeLocationsVersion = 0
+		self.addedVersion = 0 # Safe locations version of the last addition
+		self.removals = collections.deque() # (safe locations version, mask of the locations removed)
+		self.forgottenVersion = 0 # Version of the last removal dropped from removals
+		self.safeCellsCache = None
+		self.pathCache = collections.OrderedDict()
+		self.pathCacheSize = pathCacheSize
+		self.keepPathsOnAdd = keepPathsOnAdd
+		self.pathCacheHits = 0
+		self.pathCacheMisses = 0
 		self.nodeCount = 0
+		self.expandedCount = 0
+		self.heuristic = heuristic
+		self.heuristicStats = {}
+		self.instrumentation = instrumentation or Instrumentation.default
+		self.useHeap = useHeap
+		self.depths = {}
+		self.parents = {}
+		self.actions = {}
+		self.closedStates = set()
+		self.nodeBudget = nodeBudget
+		self.timeBudget = timeBudget
+		self.deadline = None
+		self.anytimeWeights = ANYTIME_WEIGHTS
+		self.budgetHit = False # Whether the last search was cut short
+		self.budgetHits = 0
+		self.partialPath = False # Whether the last search returned a path that stops short of the goal
+		self.pendingDistances = None # FindDistances search cut short by the budget, to be continued
+		self.moveBudgetHits = 0 # budgetHits at the last SetMoveDeadline
+		self.cutShortMoves = 0 # Moves in a row on which a search was cut short
 		
 	# These are the main methods:
 	# - AddSafeLocation: Tell the search about locations you think are safe; the search only considers safe locations to move through.
@@ -38,50 +292,458 @@ class SearchEngine:
 	
 	def AddSafeLocation (self, x, y):
 		if (not self.SafeLocation(x,y)):
-			self.safeLocations.append([x,y])
+			self.safeLocations.add((x,y))
+			self.SafeLocationsAdded()
 	
 	def RemoveSafeLocation(self, x, y):
 		if (self.SafeLocation(x,y)):
-			self.safeLocations.remove([x,y])
+			self.safeLocations.discard((x,y))
+			self.SafeLocationsRemoved(LocationSet([(x,y)]))
+
+	# Bulk versions of the above, taking a LocationSet (or any iterable of locations).
+	def AddSafeLocations (self, locations):
+		added = LocationSet(locations) - self.safeLocations
+		if (added):
+			self.safeLocations |= added
+			self.SafeLocationsAdded()
+
+	def RemoveSafeLocations (self, locations):
+		removed = self.safeLocations & locations
+		if (removed):
+			self.safeLocations -= removed
+			self.SafeLocationsRemoved(removed)
 
 	# Use search to find sequence of actions from start location/orientation to goal location/orientation.
 	# Returns empty action list if not path found (or already at the goal).
 	def FindPath (self, startLocation, startOrientation, goalLocation, goalOrientation):
+		cacheKey = (startLocation[0], startLocation[1], startOrientation, goalLocation[0], goalLocation[1], goalOrientation)
+		cachedPath = self.pathCache.get(cacheKey)
+		if (cachedPath is not None):
+			if (self.CachedPathValid(cachedPath)):
+				self.pathCacheHits += 1
+				self.pathCache.move_to_end(cacheKey)
+				return list(cachedPath[1])
+			del self.pathCache[cacheKey]
+		self.pathCacheMisses += 1
 		initialState = SearchState (startLocation, startOrientation, 0, None, Action.CLIMB)
 		goalState = SearchState (goalLocation, goalOrientation, 0, None, Action.CLIMB)
 		finalState = self.Search (initialState, goalState)
 		actionList = []
+		pathLocations = LocationSet()
 		# If solution found, retain actions
 		if (finalState):
 			tmpState = finalState
 			while (tmpState.parent):
 				actionList.insert(0, tmpState.action)
+				pathLocations.add(tuple(tmpState.location))
 				tmpState = tmpState.parent
 		self.Clear() # deletes entire search tree, including initialState and finalState
+		if (not self.budgetHit):
+			self.CachePath(cacheKey, finalState is not None, actionList, pathLocations)
 		return actionList
 
+	# Searches stop once the given number of seconds from now have passed (None: no deadline).
+	def SetDeadline (self, seconds):
+		self.deadline = None if (seconds is None) else time.perf_counter() + seconds
+
+	# Sets the deadline (see SetDeadline) for the searches of one of an agent's moves. It is doubled
+	# for each move in a row before this one on which a search was cut short (up to
+	# MAX_DEADLINE_DOUBLINGS times), so that an agent whose searches keep stopping short of a plan,
+	# e.g. one turning in place for lack of one, still gets a plan after a few moves.
+	def SetMoveDeadline (self, seconds):
+		if (self.budgetHits > self.moveBudgetHits):
+			self.cutShortMoves += 1
+		else:
+			self.cutShortMoves = 0
+		self.moveBudgetHits = self.budgetHits
+		if (seconds is not None):
+			seconds *= 2 ** min(self.cutShortMoves, MAX_DEADLINE_DOUBLINGS)
+		self.SetDeadline(seconds)
+
+	# Whether the deadline set with SetDeadline has passed; other planning for the same move
+	# (e.g. TourPlanner's) can stop early too.
+	def PastDeadline (self):
+		return (self.deadline is not None) and (time.perf_counter() >= self.deadline)
+
+	def Budgeted (self):
+		return (self.nodeBudget is not None) or (self.timeBudget is not None) or (self.deadline is not None)
+
+	# Time (perf_counter) at which a search starting now must stop, or None.
+	def StopTime (self):
+		stopTime = self.deadline
+		if (self.timeBudget is not None):
+			budgetEnd = time.perf_counter() + self.timeBudget
+			stopTime = budgetEnd if (stopTime is None) else min(stopTime, budgetEnd)
+		return stopTime
+
+	def BudgetHit (self):
+		self.budgetHit = True
+		self.budgetHits += 1
+		self.instrumentation.RecordBudgetHit()
+
+	# Cache entries are [safe locations version, actions, locations entered along the path, path found].
+	def CachePath (self, cacheKey, pathFound, actionList, pathLocations):
+		if (self.pathCacheSize <= 0):
+			return
+		self.pathCache[cacheKey] = [self.safeLocationsVersion, tuple(actionList), pathLocations, pathFound]
+		self.pathCache.move_to_end(cacheKey)
+		while (len(self.pathCache) > self.pathCacheSize):
+			self.pathCache.popitem(last = False)
+
+	def SafeLocationsAdded (self):
+		self.safeLocationsVersion += 1
+		self.addedVersion = self.safeLocationsVersion
+
+	# The last MAX_LOGGED_REMOVALS removals are kept for CachedPathValid; entries older than
+	# those are stale.
+	def SafeLocationsRemoved (self, removed):
+		self.safeLocationsVersion += 1
+		self.removals.append((self.safeLocationsVersion, removed.Mask()))
+		if (len(self.removals) > MAX_LOGGED_REMOVALS):
+			self.forgottenVersion = self.removals.popleft()[0]
+
+	# Whether a cached entry is still valid after the safe location changes made since it was last
+	# checked; if so, it is tagged with the current version. Adding safe locations leaves every
+	# cached path valid, but a goal that was unreachable may now be reachable, so failed searches
+	# are stale (or everything, if not keepPathsOnAdd). Removing safe locations only invalidates
+	# the paths that pass through one of them.
+	def CachedPathValid (self, cachedPath):
+		version = cachedPath[0]
+		if (version == self.safeLocationsVersion):
+			return True
+		if ((self.addedVersion > version) and ((not self.keepPathsOnAdd) or (not cachedPath[3]))):
+			return False
+		if (self.forgottenVersion > version):
+			return False
+		for removedVersion, removedMask in reversed(self.removals):
+			if (removedVersion <= version):
+				break
+			if (cachedPath[2].Mask() & removedMask):
+				return False
+		cachedPath[0] = self.safeLocationsVersion
+		return True
+
+	def ClearPathCache (self):
+		self.pathCache.clear()
+
+	# Breadth-first search over every (location, orientation) reachable from the start pose
+	# through safe locations. Goal locations may be entered even if they are not safe, but are
+	# not moved through. Returns a DistanceField from which the distance and actions to any
+	# reached location can be read without searching again. If the search budget runs out, the
+	# field only holds the states reached by then, and the search is kept: the next call from
+	# the same location toward the same goals, with the safe locations unchanged, continues it
+	# rather than starting over, so that a search too large for one move's budget still finishes
+	# over several moves (an agent that only turns in the meantime ends up where it started). Its
+	# distances and paths then start with the turns back to the orientation it started from, so
+	# they may be up to two actions longer than the shortest.
+	def FindDistances (self, startLocation, startOrientation, goalLocations = ()):
+		goalLocations = LocationSet(goalLocations)
+		searchKey = (startLocation[0], startLocation[1], goalLocations.Mask(), self.safeLocationsVersion)
+		pending = self.pendingDistances
+		self.pendingDistances = None
+		if ((pending is not None) and (pending[0] == searchKey)):
+			searchKey, table, goalCells, searchOrientation, depths, parents, actions, queue = pending
+		else:
+			table = self.GetTable(startLocation, *goalLocations)
+			goalCells = bytearray(table.stride * table.stride)
+			for x,y in goalLocations:
+				goalCells[x * table.stride + y] = 1
+			searchOrientation = startOrientation
+			depths = {table.Encode(startLocation[0], startLocation[1], startOrientation): 0}
+			parents = dict([(state, -1) for state in depths])
+			actions = {}
+			queue = collections.deque(depths)
+		safeCells = self.GetSafeCells(table)
+		forwardSteps = table.forwardSteps
+		start = table.Encode(startLocation[0], startLocation[1], searchOrientation)
+		startTime = time.perf_counter()
+		nodeCount = self.nodeCount
+		self.budgetHit = False
+		budgeted = self.Budgeted()
+		stopTime = self.StopTime()
+		expanded = 0
+		while (queue):
+			state = queue.popleft()
+			if ((state != start) and (not safeCells[state >> 2])):
+				continue # goal location that is not safe; do not move through it
+			if (budgeted and (((self.nodeBudget is not None) and (self.nodeCount - nodeCount >= self.nodeBudget)) or
+							  ((stopTime is not None) and expanded and (expanded % TIME_CHECK_INTERVAL == 0) and (time.perf_counter() >= stopTime)))):
+				self.BudgetHit() # the distances of the states reached so far are still exact
+				queue.appendleft(state)
+				self.pendingDistances = (searchKey, table, goalCells, searchOrientation, depths, parents, actions, queue)
+				break
+			expanded += 1
+			childDepth = depths[state] + 1
+			orientation = state & 3
+			for action, childState in ((Action.GOFORWARD, state + forwardSteps[orientation]),
+									   (Action.TURNLEFT, state + turnLeftSteps[orientation]),
+									   (Action.TURNRIGHT, state + turnRightSteps[orientation])):
+				if ((action == Action.GOFORWARD) and
+					((childState < 0) or not (safeCells[childState >> 2] or goalCells[childState >> 2]))):
+					continue
+				if (childState in depths):
+					continue
+				self.nodeCount += 1
+				depths[childState] = childDepth
+				parents[childState] = state
+				actions[childState] = action
+				queue.append(childState)
+		self.instrumentation.RecordSearch(self.nodeCount - nodeCount, expanded, None, time.perf_counter() - startTime)
+		return DistanceField(table, depths, parents, actions, turnActions[(searchOrientation - startOrientation) % 4])
+
 	# Main search algorithm. Returns goal state from which you can follow the parent pointers
 	# to get the actions in the solution path.
 	def Search (self,initialState, goalState):
 		self.Clear()
 		self.nodeCount = 0
-		print("Calling search...")
+		self.expandedCount = 0
+		self.budgetHit = False
+		self.partialPath = False
+		self.instrumentation.Log("Calling search...")
+		startTime = time.perf_counter()
 		finalState = self.AStarSearch (initialState, goalState)
-		if (finalState):
-			print("Solution found.")
+		seconds = time.perf_counter() - startTime
+		self.RecordHeuristicStats()
+		if (self.partialPath):
+			self.instrumentation.Log("Search budget exhausted; partial solution found.")
+		elif (finalState):
+			self.instrumentation.Log("Solution found.")
 		else:
-			print("No solution found.")
-		print(str(self.nodeCount) + " nodes generated.\n")
-		sys.stdout.flush()
+			self.instrumentation.Log("No solution found.")
+		self.instrumentation.Log(str(self.nodeCount) + " nodes generated.\n")
+		self.instrumentation.RecordSearch(self.nodeCount, self.expandedCount,
+										  (finalState.depth - initialState.depth) if (finalState and not self.partialPath) else None, seconds)
 		return finalState
 
+	# Name under which searches are counted in heuristicStats.
+	def HeuristicName (self):
+		if (self.UsesBuiltinHeuristic()):
+			return self.heuristic
+		return type(self).__name__ + ".HeuristicFunction"
+
+	def UsesBuiltinHeuristic (self):
+		return (self.heuristic is not None) and (type(self).HeuristicFunction is SearchEngine.HeuristicFunction)
+
+	def RecordHeuristicStats (self):
+		stats = self.heuristicStats.setdefault(self.HeuristicName(), {"searches": 0, "nodesExpanded": 0, "nodesGenerated": 0})
+		stats["searches"] += 1
+		stats["nodesExpanded"] += self.expandedCount
+		stats["nodesGenerated"] += self.nodeCount
+
 	# Clear the explored and frontier lists
 	def Clear (self):
 		self.frontier = []
 		self.explored = []
+		self.depths = {}
+		self.parents = {}
+		self.actions = {}
+		self.closedStates = set()
 
 	# A* search = uniform cost search using cost = (depth + heuristic)
 	def AStarSearch (self, initialState, goalState):
+		if (self.useHeap and self.Budgeted()):
+			return self.AnytimeAStarSearch (initialState, goalState)
+		if (self.useHeap):
+			return self.HeapAStarSearch (initialState, goalState)
+		else:
+			return self.ListAStarSearch (initialState, goalState)
+
+	# A* search using a binary heap for the frontier over integer-encoded states (see
+	# SuccessorTable). Depth, parent and action are kept in parallel dicts keyed on the state,
+	# so the open and closed sets are constant-time lookups. Cheaper duplicates are pushed
+	# again and stale heap entries are skipped when popped (lazy deletion). Among equal-cost
+	# states the most recently added one is popped first, matching the DFS-style tie-break
+	# of AddToFrontierInOrder. Goals are tested by state equality, as in GoalTest.
+	# Note that the list engine overwrites a cheaper duplicate in the frontier slot of the
+	# state it replaces, so on larger maps it can return a longer path than this engine does.
+	def HeapAStarSearch (self, initialState, goalState):
+		table = self.GetTable(initialState.location, goalState.location)
+		if (table is None):
+			return self.ListAStarSearch (initialState, goalState)
+		safeCells = self.GetSafeCells(table)
+		forwardSteps = table.forwardSteps
+		start = table.Encode(initialState.location[0], initialState.location[1], initialState.orientation)
+		goal = table.Encode(goalState.location[0], goalState.location[1], goalState.orientation)
+		if (self.UsesBuiltinHeuristic()):
+			heuristics = GetHeuristicTable(self.heuristic, table, goalState.location[0], goalState.location[1], goalState.orientation)
+		else:
+			heuristics = {}
+		scratchState = SearchState ([0,0], Orientation.RIGHT, 0, None, Action.CLIMB)
+		depths = self.depths
+		parents = self.parents
+		actions = self.actions
+		closed = self.closedStates
+		frontier = self.frontier
+		depths[start] = initialState.depth
+		parents[start] = -1
+		heuristics[start] = self.HeuristicFunction(initialState, goalState)
+		order = 0
+		heapq.heappush(frontier, (initialState.depth + heuristics[start], order, start))
+		while (frontier):
+			cost, _, state = heapq.heappop(frontier)
+			if ((state in closed) or (cost != depths[state] + heuristics[state])):
+				continue # stale entry
+			if (state == goal):
+				return self.BuildStateChain(table, state, initialState)
+			closed.add(state)
+			self.expandedCount += 1
+			childDepth = depths[state] + 1
+			# Try each action: GOFORWARD, TURNLEFT, TURNRIGHT
+			orientation = state & 3
+			for action, childState in ((Action.GOFORWARD, state + forwardSteps[orientation]),
+									   (Action.TURNLEFT, state + turnLeftSteps[orientation]),
+									   (Action.TURNRIGHT, state + turnRightSteps[orientation])):
+				if ((action == Action.GOFORWARD) and ((childState < 0) or (not safeCells[childState >> 2]))):
+					continue
+				self.nodeCount += 1
+				heuristic = heuristics.get(childState)
+				if (heuristic is None):
+					scratchState.location[0], scratchState.location[1], scratchState.orientation = table.Decode(childState)
+					heuristic = self.HeuristicFunction(scratchState, goalState)
+					heuristics[childState] = heuristic
+				if (childState in closed):
+					continue
+				frontierDepth = depths.get(childState)
+				if ((frontierDepth is None) or (frontierDepth > childDepth)):
+					depths[childState] = childDepth
+					parents[childState] = state
+					actions[childState] = action
+					order -= 1
+					heapq.heappush(frontier, (childDepth + heuristic, order, childState))
+		return None # failure
+
+	# Anytime weighted A*, run instead of HeapAStarSearch when a budget or deadline is set. Runs
+	# WeightedAStarSearch with each weight of anytimeWeights in turn, each pruning the states
+	# that cannot lead to a shorter path than the best found so far, until the search with
+	# weight 1 completes (the best path is then optimal) or the budget runs out. If it runs out
+	# before any path is found, the path to the expanded state with the smallest heuristic (the
+	# shallowest of those) is returned instead, and partialPath is set.
+	def AnytimeAStarSearch (self, initialState, goalState):
+		table = self.GetTable(initialState.location, goalState.location)
+		if (table is None):
+			return self.ListAStarSearch (initialState, goalState)
+		start = table.Encode(initialState.location[0], initialState.location[1], initialState.orientation)
+		goal = table.Encode(goalState.location[0], goalState.location[1], goalState.orientation)
+		if (self.UsesBuiltinHeuristic()):
+			heuristics = GetHeuristicTable(self.heuristic, table, goalState.location[0], goalState.location[1], goalState.orientation)
+		else:
+			heuristics = {}
+		heuristics[start] = self.HeuristicFunction(initialState, goalState)
+		stopTime = self.StopTime()
+		bestState = None
+		bestDepth = None
+		for weight in self.anytimeWeights:
+			self.Clear()
+			finalState, closestState = self.WeightedAStarSearch(table, heuristics, start, goal, initialState, goalState,
+																weight, bestDepth, stopTime)
+			if (finalState is not None):
+				bestState = self.BuildStateChain(table, finalState, initialState)
+				bestDepth = bestState.depth
+			if (self.budgetHit):
+				if (bestState is None):
+					self.partialPath = True
+					return self.BuildStateChain(table, closestState, initialState)
+				break
+			if ((bestDepth is not None) and (bestDepth == initialState.depth + heuristics[start])):
+				break # no path can be shorter than the heuristic
+		return bestState
+
+	# Weighted A* (cost = depth + weight * heuristic) with the heap engine's frontier and tie-break,
+	# skipping states whose depth + heuristic reaches bound. Returns (goal state or None, the
+	# expanded state closest to the goal by heuristic); if the node budget or stopTime is reached
+	# first, the goal state is None and budgetHit is set.
+	def WeightedAStarSearch (self, table, heuristics, start, goal, initialState, goalState, weight, bound, stopTime):
+		safeCells = self.GetSafeCells(table)
+		forwardSteps = table.forwardSteps
+		scratchState = SearchState ([0,0], Orientation.RIGHT, 0, None, Action.CLIMB)
+		nodeBudget = self.nodeBudget
+		depths = self.depths
+		parents = self.parents
+		actions = self.actions
+		closed = self.closedStates
+		frontier = self.frontier
+		depths[start] = initialState.depth
+		parents[start] = -1
+		closestState = start
+		order = 0
+		heapq.heappush(frontier, (initialState.depth + weight * heuristics[start], order, start))
+		expanded = 0
+		while (frontier):
+			cost, _, state = heapq.heappop(frontier)
+			if ((state in closed) or (cost != depths[state] + weight * heuristics[state])):
+				continue # stale entry
+			if (state == goal):
+				return state, closestState
+			if (((nodeBudget is not None) and (self.nodeCount >= nodeBudget)) or
+				((stopTime is not None) and expanded and (expanded % TIME_CHECK_INTERVAL == 0) and (time.perf_counter() >= stopTime))):
+				self.BudgetHit()
+				return None, closestState
+			closed.add(state)
+			self.expandedCount += 1
+			expanded += 1
+			if ((heuristics[state], depths[state]) < (heuristics[closestState], depths[closestState])):
+				closestState = state
+			childDepth = depths[state] + 1
+			# Try each action: GOFORWARD, TURNLEFT, TURNRIGHT
+			orientation = state & 3
+			for action, childState in ((Action.GOFORWARD, state + forwardSteps[orientation]),
+									   (Action.TURNLEFT, state + turnLeftSteps[orientation]),
+									   (Action.TURNRIGHT, state + turnRightSteps[orientation])):
+				if ((action == Action.GOFORWARD) and ((childState < 0) or (not safeCells[childState >> 2]))):
+					continue
+				self.nodeCount += 1
+				heuristic = heuristics.get(childState)
+				if (heuristic is None):
+					scratchState.location[0], scratchState.location[1], scratchState.orientation = table.Decode(childState)
+					heuristic = self.HeuristicFunction(scratchState, goalState)
+					heuristics[childState] = heuristic
+				if ((childState in closed) or ((bound is not None) and (childDepth + heuristic >= bound))):
+					continue
+				frontierDepth = depths.get(childState)
+				if ((frontierDepth is None) or (frontierDepth > childDepth)):
+					depths[childState] = childDepth
+					parents[childState] = state
+					actions[childState] = action
+					order -= 1
+					heapq.heappush(frontier, (childDepth + weight * heuristic, order, childState))
+		return None, closestState
+
+	# Returns the successor table covering the safe locations and the given locations, or None
+	# if a location has a negative coordinate and cannot be encoded.
+	def GetTable (self, *locations):
+		maxCoordinate = self.safeLocations.maxCoordinate
+		for location in locations:
+			if (min(location) < 0):
+				return None
+			maxCoordinate = max(maxCoordinate, location[0], location[1])
+		return GetSuccessorTable(maxCoordinate)
+
+	# Returns a bytearray, indexed by table cell, flagging the safe locations. The result is
+	# reused until the safe locations or the table change.
+	def GetSafeCells (self, table):
+		version = self.safeLocationsVersion
+		if ((self.safeCellsCache is not None) and (self.safeCellsCache[0] is table) and (self.safeCellsCache[1] == version)):
+			return self.safeCellsCache[2]
+		safeCells = bytearray(table.stride * table.stride)
+		for x,y in self.safeLocations.Locations():
+			safeCells[x * table.stride + y] = 1
+		self.safeCellsCache = (table, version, safeCells)
+		return safeCells
+
+	# Converts the solution path ending at the given integer state back into linked SearchStates.
+	def BuildStateChain (self, table, state, initialState):
+		path = []
+		while (state != -1):
+			path.append(state)
+			state = self.parents[state]
+		finalState = initialState
+		for state in reversed(path[:-1]):
+			x, y, orientation = table.Decode(state)
+			finalState = SearchState ([x,y], orientation, self.depths[state], finalState, self.actions[state])
+		return finalState
+
+	# Original A* search using ordered lists for the frontier and explored states.
+	def ListAStarSearch (self, initialState, goalState):
 		initialState.heuristic = self.HeuristicFunction(initialState, goalState)
 		initialState.cost = initialState.depth + initialState.heuristic
 		self.frontier.append(initialState)
@@ -90,6 +752,7 @@ class SearchEngine:
 			if (self.GoalTest (state, goalState)):
 				return state
 			self.explored.append (state)
+			self.expandedCount += 1
 			# Try each action: GOFORWARD, TURNLEFT, TURNRIGHT
 			for action in [Action.GOFORWARD, Action.TURNLEFT, Action.TURNRIGHT]:
 				childState = self.GetChildState (state, action)
@@ -110,8 +773,12 @@ class SearchEngine:
 								
 		return None # failure
 	
+	# Override this, or pass the name of a built-in heuristic to the constructor.
 	def HeuristicFunction(self, state, goalState):
-		raise NotImplementedError()
+		if (self.heuristic is None):
+			raise NotImplementedError()
+		return heuristicFunctions[self.heuristic](state.location[0], state.location[1], state.orientation,
+												  goalState.location[0], goalState.location[1], goalState.orientation)
 
 	# True if state location same as goal location, ignoring orientation.
 	def GoalTest (self, state, goalState):
@@ -160,7 +827,7 @@ class SearchEngine:
 		return childState
 
 	def SafeLocation (self, x, y):
-		if ([x,y] in self.safeLocations):
+		if ((x,y) in self.safeLocations):
 			return True
 		else:
 			return False
@@ -2,23 +2,25 @@
 #
 # This code works only for the testworld that comes with the simulator.
 
-from Percept import Percept
+from Percept import Percept, GLITTER, BUMP, SCREAM
 import Action
 import Orientation
 import Search
+import Instrumentation
+import KnowledgeBase
+import HazardProbability
+import WorldModel
+import TourPlanner
 
-class MySearchEngine(Search.SearchEngine):
-    def HeuristicFunction(self, state: Search.SearchState, goalState: Search.SearchState):
-        # Compute and return city block distance.
-        return(abs(state.location[0]-goalState.location[0]) + abs(state.location[1]-goalState.location[1]))
-    
 class Agent:
     def __init__(self):
         # These two lines are already in Initialize(), so are they unnecessary?
         #self.agentHasGold = False
         #self.actionList = []
+        self.instrumentation = Instrumentation.default # Counters and log output.
         self.location = [1,1] # A two-item list representing the x and y coordinates of the agent's position.
-        self.searchEngine = MySearchEngine()
+        self.searchEngine = Search.SearchEngine(heuristic = "turnaware", instrumentation = self.instrumentation)
+        self.moveDeadline = Search.DefaultMoveDeadline() # Seconds each Process call may search for.  None if unlimited.
         self.goldLocation = None # The location of the gold.  NoneType if unknown.
 
         # Dictionary to convert action objects to the related function.
@@ -35,19 +37,17 @@ class Agent:
         self.turnLeftTransform = {Orientation.UP:Orientation.LEFT, Orientation.LEFT:Orientation.DOWN,
                                   Orientation.DOWN:Orientation.RIGHT, Orientation.RIGHT:Orientation.UP}
 
-        # Assume that the world is the max size to begin.
-        self.worldSize = 9
-
-        # Create a set of locations which have already been visited.
-        self.visitedLocations = set()
+        # The world size is unknown until the agent bumps into a wall.
+        # The world model keeps the visited and known safe locations, and the locations that are
+        # adjacent to visited locations but have yet to be visited (starting with [1,1]).
+        self.worldModel = WorldModel.WorldModel()
 
-        # Create a set of locations that are known to be safe
-        self.knownSafeLocations = set()
+        # Record the percepts in a knowledge base, to judge the risk of unsafe locations.
+        self.knowledgeBase = KnowledgeBase.KnowledgeBase(self.worldModel.worldSize)
+        self.hazardModel = HazardProbability.HazardModel(self.knowledgeBase)
 
-        # Create a set of locations that are adjacent to visited locations but have yet to be visited.
-        # Also, add the starting location here as, well, a starting point!
-        self.locationsToVisit = set()
-        self.locationsToVisit.add((1,1))
+        # Orders the known safe locations still to be explored into a short tour.
+        self.tourPlanner = TourPlanner.TourPlanner(self.searchEngine)
 
         for x in range(1,10):
             for y in range(1,10):
@@ -63,10 +63,11 @@ class Agent:
         # Check the agent's location.  If it is not [1,1], then the agent encountered an unsafe spot at the end of the
         # last try.  Update the agent's knowledge accordingly.  Then, reset the location to [1,1]
         if self.location != [1,1]:
-            print("Agent met its demise at:",self.location,'\n')
-            self.locationsToVisit.remove(tuple(self.location))
-            self.visitedLocations.add(tuple(self.location))
+            self.instrumentation.Log("Agent met its demise at:",self.location,'\n')
+            self.worldModel.MarkDeadly(self.location)
             self.searchEngine.RemoveSafeLocation(self.location[0],self.location[1])
+            self.knowledgeBase.TellDeath(self.location)
+            self.tourPlanner.Clear()
             self.location = [1,1]
 
         self.orientation = Orientation.RIGHT # The agent's current orientation.
@@ -113,7 +114,12 @@ class Agent:
     # Input percept is a dictionary [perceptName: boolean]
     def Process (self, percept: Percept):
 
-        print("Agent is at:",self.location)
+        self.instrumentation.Log("Agent is at:",self.location)
+
+        # Searches made for this move stop at the deadline, possibly with a partial path.  The deadline
+        # grows while moves in a row have their searches cut short, so the agent cannot be stuck without a plan.
+        self.searchEngine.SetMoveDeadline(self.moveDeadline)
+        budgetHits = self.searchEngine.budgetHits
 
         # First thing's first: If we have gold and are at the exit, get out of there!
         if self.hasGold and self.location == [1,1]: return Action.CLIMB
@@ -121,42 +127,33 @@ class Agent:
         # Did the agent bump?  If so, we now know the world size and should reset our position
         # and update our unvisited locations and actionList to make sure we don't try to go out of bounds again.
         if percept.bump:
-            self.worldSize = max(self.location)-1
-            self.location[self.location.index(self.worldSize+1)] = self.worldSize
-            self.locationsToVisit = {location for location in self.locationsToVisit if max(location) <= self.worldSize}
+            worldSize = max(self.location)-1
+            self.location[self.location.index(worldSize+1)] = worldSize
+            self.worldModel.SetWorldSize(worldSize)
+            self.knowledgeBase.SetWorldSize(worldSize)
+            self.tourPlanner.Clear()
             self.actionList.clear()
 
         # Check to see if this is a new location.  If it is, we have some new knowledge about the world!
-        if not tuple(self.location) in self.visitedLocations:
+        if not self.worldModel.IsVisited(self.location):
             
             # Clear out the current action, as it should only contain rotation actions now anyway.
             self.actionList.clear()
 
-            # This space has now been visited and is known to be safe.
-            self.visitedLocations.add(tuple(self.location))
+            # This space has now been visited and is known to be safe.  The world model marks any
+            # unvisited adjacent locations to be visited.
+            self.worldModel.Visit(self.location, percept.stench, percept.breeze)
             self.searchEngine.AddSafeLocation(self.location[0],self.location[1])
-            self.locationsToVisit.remove(tuple(self.location))
-            self.knownSafeLocations.add(tuple(self.location))
-
-            # Determine which adjacent spaces are actually valid.
-            adjacentLocations = list()
-            for x,y in ((-1,0),(1,0),(0,-1),(0,1)):
-                location = (self.location[0]+x,self.location[1]+y)
-                if min(location) > 0 and max(location) <= self.worldSize:
-                    adjacentLocations.append(location)
+            self.knowledgeBase.Tell(self.location, percept.stench, percept.breeze)
 
             # If there is no breeze or stench, all adjacent spaces are safe too!
             if not percept.stench and not percept.breeze:
-                for location in adjacentLocations: self.knownSafeLocations.add(location)
-
-            # Check for any unvisited adjacent locations and mark them to be visited.
-            for location in adjacentLocations:
-                if not location in self.visitedLocations: self.locationsToVisit.add(location)
+                for location in self.worldModel.Neighbors(self.location): self.worldModel.MarkSafe(location)
 
         # Did the agent perceive a glitter?  If so, grab it, and plan to go back to [1,1]
         # Also, update the known gold position.
         if percept.glitter:
-            print("Found gold! Routing back to [1,1]")
+            self.instrumentation.Log("Found gold! Routing back to [1,1]")
             self.actionList = self.searchEngine.FindPath(self.location, self.orientation, [1,1], Orientation.LEFT)
             self.hasGold = True
             self.goldLocation = self.location
@@ -165,33 +162,90 @@ class Agent:
         # If there are not actions planned at the moment, we need to choose a location to travel to.
         if not self.actionList:
 
+            # If we have the gold (and a search for the way back was cut short), head for [1,1].
+            if self.hasGold:
+                self.actionList = self.searchEngine.FindPath(self.location, self.orientation, [1,1], Orientation.LEFT)
+
             # If we know the location of the gold, go there!
-            if self.goldLocation is not None:
-                print("Routing to gold at",self.goldLocation)
+            elif self.goldLocation is not None:
+                self.instrumentation.Log("Routing to gold at",self.goldLocation)
                 self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
                                                              self.goldLocation, Orientation.RIGHT)
 
-            # Otherwise, check for areas marked for exploration that are guaranteed to be safe.
+            # Otherwise, head for the next area marked for exploration that is guaranteed to be safe,
+            # in the order of the tour through all of them.
             else:
-                for location in self.locationsToVisit:
-                    if location in self.knownSafeLocations:
-                        print("Routing to",location)
-                        self.searchEngine.AddSafeLocation(location[0],location[1])
-                        self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
-                                                                     list(location), Orientation.RIGHT)
-                        break
-            
-                # If we still haven't decided on a location, just pick one that needs to be visited!
-                if not self.actionList: 
-                    location = tuple(self.locationsToVisit)[0]
-                    print("Routing to",location)
+                locationsToVisit = self.worldModel.Frontier()
+                location, actionList = self.tourPlanner.Plan(self.location, self.orientation,
+                                                             [location for location in locationsToVisit
+                                                              if self.worldModel.IsSafe(location)])
+
+                # If we still haven't decided on a location, pick the one least likely to hold a pit or the wumpus
+                # (the closest one of those).  One search from the current pose gives the distance and path to
+                # every candidate.  Not if the search for safe locations was cut short by the deadline, though.
+                if location is None and self.searchEngine.budgetHits == budgetHits:
+                    distances = self.searchEngine.FindDistances(self.location, self.orientation, locationsToVisit)
+                    location = self.hazardModel.LeastRisky(locationsToVisit, distances)
+                    if location is not None: actionList = distances.PathTo(location)
+
+                if location is not None:
+                    self.instrumentation.Log("Routing to",location)
                     self.searchEngine.AddSafeLocation(location[0],location[1])
-                    self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
-                                                                 list(location), Orientation.RIGHT)
+                    self.actionList = actionList
+
+            # If there is nowhere left to go (or no way to get there), give up: climb out at [1,1],
+            # or head back there first.
+            if not self.actionList and self.searchEngine.budgetHits == budgetHits:
+                if self.location == [1,1]: return Action.CLIMB
+                self.instrumentation.Log("Nothing left to explore. Routing back to [1,1]")
+                self.actionList = self.searchEngine.FindPath(self.location, self.orientation, [1,1], Orientation.LEFT)
+
+        # If the deadline passed before any plan was found, turn in place: it is always safe, and the
+        # next move searches again from the same location.
+        if not self.actionList and self.searchEngine.budgetHits > budgetHits:
+            self.instrumentation.RecordDefaultAction()
+            return self.turnLeft()
 
         # If we've reached this point, we should have a list of movement actions to work with.  Pop one off and handle it!
         action = self.actionList.pop(0)
         return self.actionToFunction[action]()
+
+
+    def PlanAhead(self):
+        """
+        Returns the queued actions that Process would take next if nothing new is perceived, as
+        (action, expected percept, percept mask) tuples for the fast PyAgent bridge.  Each action is
+        only valid if the packed percept before it, masked, equals the expected percept (no
+        glitter, bump or scream); stench and breeze are already known at visited locations.
+        The agent's state is not changed; the host reports the actions it took via AdvancePlan.
+        """
+
+        plan = []
+        location = self.location
+        orientation = self.orientation
+        for action in self.actionList:
+
+            # Stop where Process would do something else: climb out, or learn about a new location.
+            if (self.hasGold and location == [1,1]) or not self.worldModel.IsVisited(location): break
+
+            plan.append((action, 0, GLITTER | BUMP | SCREAM))
+            if action == Action.GOFORWARD:
+                positionTransform = self.orientationMovementTransform[orientation]
+                location = [location[0] + positionTransform[0], location[1] + positionTransform[1]]
+            elif action == Action.TURNLEFT: orientation = self.turnLeftTransform[orientation]
+            else: orientation = self.turnRightTransform[orientation]
+        return plan
+
+
+    def AdvancePlan(self, numActions):
+        """
+        Takes the first numActions actions of the plan returned by PlanAhead, exactly as Process
+        would have.
+        """
+
+        for i in range(numActions):
+            self.instrumentation.Log("Agent is at:",self.location)
+            self.actionToFunction[self.actionList.pop(0)]()
     
     def GameOver(self, score):
-        pass
+        self.gameStats = self.instrumentation.EndGame(score)
@@ -0,0 +1,182 @@
+# TourPlanner.py
+#
+# Orders an agent's known safe exploration targets into a tour, instead of heading for whichever
+# is nearest each time it reaches one, and plans the next leg of that tour.
+#
+# The tour is kept between calls: targets that are gone (visited) are dropped and new ones are
+# inserted where they cost least, then 2-opt improves the order. A tour is scored by the sum of
+# the times (in actions) at which it reaches each target rather than by its total length, since
+# a game stops exploring as soon as the gold is found.
+#
+# The first leg is pose-aware: its distance counts the turns as well as the moves from the
+# agent's pose (location and orientation), estimated by Search.TurnAwareHeuristic until one
+# FindDistances search replaces the estimates with exact distances and gives the path of the
+# leg. Legs between targets are estimated as the city block distance plus one turn if both
+# coordinates change, which is the same in either direction. A tour's cost is then the sum of
+# its legs, each weighted by the number of targets from its end to the end of the tour, and the
+# change in cost from reversing a segment or inserting a target is computed in constant time
+# from prefix sums of the legs (see Costs), so a 2-opt pass over n targets takes O(n^2) time.
+# A leg to a location next to the agent's is planned without a search, since no path is shorter
+# than turning and stepping into it.
+#
+# Under a deadline (see SearchEngine.SetDeadline), 2-opt gets IMPROVE_TIME_FRACTION of the time
+# left before the distance search runs, and the rest after it; new targets are appended to the
+# tour once past the deadline. If the distance search is cut short, the next leg goes to the
+# nearest target it reached; if it reached none, the next call continues it (see
+# SearchEngine.FindDistances).
+
+import time
+import Search
+import Action
+
+UNREACHABLE = 1 << 30
+MAX_IMPROVE_TARGETS = 40 # Longer tours are not improved by 2-opt
+IMPROVE_TIME_FRACTION = 0.5 # Of the time left before the deadline, for 2-opt before the distance search
+
+# Orientation of each (x, y) step.
+stepOrientations = {(1,0): 0, (0,1): 1, (-1,0): 2, (0,-1): 3} # RIGHT, UP, LEFT, DOWN
+
+# Estimated number of actions from one target to another (or back).
+def LegDistance (fromTarget, toTarget):
+	distanceX = abs(toTarget[0] - fromTarget[0])
+	distanceY = abs(toTarget[1] - fromTarget[1])
+	return distanceX + distanceY + (1 if (distanceX and distanceY) else 0)
+
+class TourPlanner:
+
+	def __init__(self, searchEngine):
+		self.searchEngine = searchEngine
+		self.tour = [] # Targets, in visiting order
+		self.startPose = None
+		self.startDistances = {} # Target -> distance from startPose (estimated, or searched)
+
+	# Forgets the tour, e.g. when safe locations were removed.
+	def Clear (self):
+		self.tour = []
+
+	def StartDistance (self, target):
+		distance = self.startDistances.get(target)
+		if (distance is None):
+			(x, y), orientation = self.startPose
+			distance = min([Search.TurnAwareHeuristic(x, y, orientation, target[0], target[1], arrival) for arrival in range(4)])
+			self.startDistances[target] = distance
+		return distance
+
+	# Returns the legs of the tour (legs[i] leads to tour[i]) and the prefix sums of the legs,
+	# plain and weighted by the number of targets from each leg's end to the end of the tour
+	# (the last weighted sum is the cost of the tour).
+	def Costs (self):
+		numTargets = len(self.tour)
+		legs = [self.StartDistance(self.tour[0])] if (self.tour) else []
+		for index in range(1, numTargets):
+			legs.append(LegDistance(self.tour[index - 1], self.tour[index]))
+		sums = [0]
+		weightedSums = [0]
+		for index, leg in enumerate(legs):
+			sums.append(sums[-1] + leg)
+			weightedSums.append(weightedSums[-1] + (numTargets - index) * leg)
+		return legs, sums, weightedSums
+
+	# Returns (target, actions) for the next leg of the tour through the given targets from the
+	# agent's pose, or (None, None) if no target can be reached.
+	def Plan (self, location, orientation, targets):
+		targets = [tuple(target) for target in targets]
+		targetSet = set(targets)
+		self.tour = [target for target in self.tour if (target in targetSet)]
+		if (not targets):
+			return None, None
+		self.startPose = (tuple(location), orientation)
+		self.startDistances = {}
+		tourTargets = set(self.tour)
+		for target in targets:
+			if (not target in tourTargets):
+				self.Insert(target)
+		self.TwoOpt(self.ImproveStopTime())
+
+		target = self.tour[0]
+		step = (target[0] - location[0], target[1] - location[1])
+		if (step in stepOrientations):
+			return target, Search.turnActions[(stepOrientations[step] - orientation) % 4] + [Action.GOFORWARD]
+
+		# Replace the estimates from the agent's pose with searched distances, and reorder
+		field = self.searchEngine.FindDistances(location, orientation, targets)
+		if (self.searchEngine.budgetHit):
+			target = field.Nearest(targets)
+			if (target is None):
+				return None, None
+			return target, field.PathTo(target)
+		for target in targets:
+			distance = field.Distance(target)
+			self.startDistances[target] = UNREACHABLE if (distance is None) else distance
+		self.tour.sort(key = lambda target: self.startDistances[target] >= UNREACHABLE)
+		self.TwoOpt(self.searchEngine.deadline)
+		target = self.tour[0]
+		if (self.startDistances[target] >= UNREACHABLE):
+			return None, None
+		return target, field.PathTo(target)
+
+	# Time (perf_counter) until which 2-opt may run before the distance search, or None.
+	def ImproveStopTime (self):
+		deadline = self.searchEngine.deadline
+		if (deadline is None):
+			return None
+		now = time.perf_counter()
+		return now + max(deadline - now, 0) * IMPROVE_TIME_FRACTION
+
+	# Inserts target where it adds the least cost, or at the end once past the deadline.
+	def Insert (self, target):
+		if (self.searchEngine.PastDeadline()):
+			self.tour.append(target)
+			return
+		legs, sums, weightedSums = self.Costs()
+		numTargets = len(self.tour)
+		bestIndex = None
+		bestDelta = None
+		for index in range(numTargets + 1):
+			# The legs before the target now lead to one more target each
+			if (index == 0):
+				delta = (numTargets + 1) * self.StartDistance(target)
+			else:
+				delta = sums[index] + (numTargets + 1 - index) * LegDistance(self.tour[index - 1], target)
+			if (index < numTargets):
+				delta += (numTargets - index) * (LegDistance(target, self.tour[index]) - legs[index])
+			if ((bestDelta is None) or (delta < bestDelta)):
+				bestIndex = index
+				bestDelta = delta
+		self.tour.insert(bestIndex, target)
+
+	# Change in the cost of the tour from reversing tour[first:last + 1].
+	def ReversalDelta (self, legs, sums, weightedSums, first, last):
+		numTargets = len(self.tour)
+		if (first == 0):
+			firstLeg = self.StartDistance(self.tour[last])
+		else:
+			firstLeg = LegDistance(self.tour[first - 1], self.tour[last])
+		delta = (numTargets - first) * (firstLeg - legs[first])
+		# Each leg inside the segment keeps its length but moves to the mirrored position; the
+		# weights of a position and its mirror add up to 2 * numTargets - first - last - 1.
+		innerSum = sums[last + 1] - sums[first + 1]
+		innerWeightedSum = weightedSums[last + 1] - weightedSums[first + 1]
+		delta += (2 * numTargets - first - last - 1) * innerSum - 2 * innerWeightedSum
+		if (last + 1 < numTargets):
+			delta += (numTargets - last - 1) * (LegDistance(self.tour[first], self.tour[last + 1]) - legs[last + 1])
+		return delta
+
+	# Reverses segments of the tour while that lowers its cost, until stopTime (perf_counter) if
+	# one is given.
+	def TwoOpt (self, stopTime = None):
+		numTargets = len(self.tour)
+		if (numTargets > MAX_IMPROVE_TARGETS):
+			return
+		legs, sums, weightedSums = self.Costs()
+		improved = True
+		while (improved):
+			improved = False
+			for first in range(numTargets - 1):
+				if ((stopTime is not None) and (time.perf_counter() >= stopTime)):
+					return
+				for last in range(first + 1, numTargets):
+					if (self.ReversalDelta(legs, sums, weightedSums, first, last) < 0):
+						self.tour[first:last + 1] = self.tour[first:last + 1][::-1]
+						legs, sums, weightedSums = self.Costs()
+						improved = True
@@ -0,0 +1,203 @@
+# WorldCorpus.py
+#
+# Packed binary world corpus with memory-mapped random access.
+#
+# Usage: python WorldCorpus.py generate <corpus> <count> [-size N]... [-seed N]
+#        python WorldCorpus.py import <corpus> <world file or directory>...
+#        python WorldCorpus.py export <corpus> <directory> [first [last]]
+#        python WorldCorpus.py index <corpus>
+#
+# A corpus file is a header (magic, version, maximum world size, number of worlds) followed by
+# fixed-size records: world size, wumpus x and y, gold x and y and number of pits (unsigned
+# 16-bit, little-endian), then a bitmask of pit locations, bit (x-1)*size + (y-1) for the pit at
+# (x,y), padded to the maximum world size. WorldCorpus maps the file read-only, so world i is
+# decoded straight from the mapping and all processes reading the corpus share its pages.
+
+import os
+import sys
+import glob
+import mmap
+import random
+import struct
+import WumpusWorld
+
+CORPUS_MAGIC = b"WUMPUSWC"
+CORPUS_VERSION = 1
+
+headerStruct = struct.Struct("<8sHHQ")
+recordHeaderStruct = struct.Struct("<6H")
+
+# Bytes per record for worlds up to maxSize x maxSize.
+def RecordSize (maxSize):
+	return recordHeaderStruct.size + (maxSize * maxSize + 7) // 8
+
+def PackWorld (wumpusWorld, maxSize):
+	size = wumpusWorld.worldSize
+	pitMask = 0
+	for x,y in wumpusWorld.pitLocations:
+		pitMask |= 1 << ((x - 1) * size + (y - 1))
+	return (recordHeaderStruct.pack(size, wumpusWorld.wumpusLocation[0], wumpusWorld.wumpusLocation[1],
+									wumpusWorld.goldLocation[0], wumpusWorld.goldLocation[1], len(wumpusWorld.pitLocations)) +
+			pitMask.to_bytes(RecordSize(maxSize) - recordHeaderStruct.size, "little"))
+
+# Returns (size, wumpus location, gold location, pit locations) of the world record at offset in data.
+def UnpackWorld (data, offset = 0):
+	size, wumpusX, wumpusY, goldX, goldY, numPits = recordHeaderStruct.unpack_from(data, offset)
+	pitLocations = []
+	if (numPits):
+		offset += recordHeaderStruct.size
+		pitMask = int.from_bytes(data[offset:offset + (size * size + 7) // 8], "little")
+		while (pitMask):
+			bit = (pitMask & -pitMask).bit_length() - 1
+			pitLocations.append((bit // size + 1, bit % size + 1))
+			pitMask &= pitMask - 1
+	return size, (wumpusX, wumpusY), (goldX, goldY), pitLocations
+
+# Writes the worlds (WumpusWorld.WumpusWorld objects) to a new corpus file and returns the
+# number written. worlds may be an iterator if maxSize is given.
+def WriteCorpus (fileName, worlds, maxSize = None):
+	if (maxSize is None):
+		worlds = list(worlds)
+		maxSize = max([wumpusWorld.worldSize for wumpusWorld in worlds] or [2])
+	count = 0
+	with open(fileName, "wb") as corpusFile:
+		corpusFile.write(headerStruct.pack(CORPUS_MAGIC, CORPUS_VERSION, maxSize, 0))
+		for wumpusWorld in worlds:
+			if (wumpusWorld.worldSize > maxSize):
+				raise ValueError("World size " + str(wumpusWorld.worldSize) + " is larger than corpus maximum " + str(maxSize))
+			corpusFile.write(PackWorld(wumpusWorld, maxSize))
+			count += 1
+		corpusFile.seek(0)
+		corpusFile.write(headerStruct.pack(CORPUS_MAGIC, CORPUS_VERSION, maxSize, count))
+	return count
+
+# Yields count random worlds, cycling through the given sizes, all generated from one
+# random.Random(seed) as WumpusWorld does.
+def GenerateWorlds (count, sizes = (4,), seed = None):
+	rng = random.Random(seed)
+	for index in range(count):
+		yield WumpusWorld.WumpusWorld(size = sizes[index % len(sizes)], rng = rng)
+
+# Returns the world files named by paths: files as given, directories searched for *.txt files.
+def WorldFiles (paths):
+	worldFiles = []
+	for path in paths:
+		if (os.path.isdir(path)):
+			worldFiles += sorted(glob.glob(os.path.join(path, "**", "*.txt"), recursive = True))
+		else:
+			worldFiles.append(path)
+	return worldFiles
+
+class WorldCorpus:
+
+	def __init__(self, fileName):
+		self.fileName = fileName
+		with open(fileName, "rb") as corpusFile:
+			self.data = mmap.mmap(corpusFile.fileno(), 0, access = mmap.ACCESS_READ)
+		magic, version, self.maxSize, self.count = headerStruct.unpack_from(self.data, 0)
+		if ((magic != CORPUS_MAGIC) or (version != CORPUS_VERSION)):
+			raise ValueError("Not a version " + str(CORPUS_VERSION) + " world corpus: " + fileName)
+		self.recordSize = RecordSize(self.maxSize)
+		if (len(self.data) < headerStruct.size + self.count * self.recordSize):
+			raise ValueError("Truncated world corpus: " + fileName)
+		self.index = None
+
+	def close (self):
+		self.data.close()
+
+	def __len__(self):
+		return self.count
+
+	def RecordOffset (self, index):
+		if ((index < 0) or (index >= self.count)):
+			raise IndexError("World index out of range: " + str(index))
+		return headerStruct.size + index * self.recordSize
+
+	# Raw record bytes of world index (a view of the mapping, not a copy).
+	def RecordBytes (self, index):
+		offset = self.RecordOffset(index)
+		return memoryview(self.data)[offset:offset + self.recordSize]
+
+	# Returns (size, wumpus location, gold location, pit locations) of world index.
+	def Locations (self, index):
+		return UnpackWorld(self.data, self.RecordOffset(index))
+
+	def World (self, index):
+		return WumpusWorld.WumpusWorld(locations = self.Locations(index))
+
+	def __getitem__(self, index):
+		return self.World(index)
+
+	# Dict of (size, number of pits) -> list of world indices, built on first use.
+	def Index (self):
+		if (self.index is None):
+			self.index = {}
+			indexStruct = struct.Struct("<H8xH" + str(self.recordSize - recordHeaderStruct.size) + "x")
+			with memoryview(self.data) as data:
+				with data[headerStruct.size:headerStruct.size + self.count * self.recordSize] as records:
+					for index, key in enumerate(indexStruct.iter_unpack(records)):
+						self.index.setdefault(key, []).append(index)
+		return self.index
+
+	# Indices of the worlds of the given size (any size if None) with numPits pits, or with
+	# between minPits and maxPits pits.
+	def Select (self, size = None, numPits = None, minPits = 0, maxPits = None):
+		if (numPits is not None):
+			minPits = maxPits = numPits
+		indices = []
+		for (worldSize, worldPits), worldIndices in self.Index().items():
+			if (((size is None) or (worldSize == size)) and (worldPits >= minPits) and
+				((maxPits is None) or (worldPits <= maxPits))):
+				indices += worldIndices
+		return sorted(indices)
+
+	# Writes worlds first..last-1 as world files <directory>/world<i>.txt.
+	def Export (self, directory, first = 0, last = None):
+		os.makedirs(directory, exist_ok = True)
+		for index in range(first, self.count if (last is None) else min(last, self.count)):
+			self.World(index).Write(os.path.join(directory, "world" + str(index) + ".txt"))
+
+def main (argv):
+	if (len(argv) < 3):
+		print("usage: python WorldCorpus.py generate|import|export|index <corpus> ...")
+		return 1
+	command = argv[1]
+	fileName = argv[2]
+	if (command == "generate"):
+		count = int(argv[3])
+		sizes = []
+		seed = None
+		i = 4
+		while (i < len(argv)):
+			if (argv[i] == "-size"):
+				i += 1
+				sizes.append(max(int(argv[i]), 2))
+			elif (argv[i] == "-seed"):
+				i += 1
+				seed = int(argv[i])
+			else:
+				print("unknown option " + argv[i])
+				return 1
+			i += 1
+		sizes = sizes or [4]
+		print(str(WriteCorpus(fileName, GenerateWorlds(count, sizes, seed), max(sizes))) + " worlds written to " + fileName)
+	elif (command == "import"):
+		worlds = [WumpusWorld.WumpusWorld(worldFile = worldFile) for worldFile in WorldFiles(argv[3:])]
+		print(str(WriteCorpus(fileName, worlds)) + " worlds written to " + fileName)
+	elif (command == "export"):
+		corpus = WorldCorpus(fileName)
+		corpus.Export(argv[3], *[int(arg) for arg in argv[4:6]])
+		corpus.close()
+	elif (command == "index"):
+		corpus = WorldCorpus(fileName)
+		print(str(len(corpus)) + " worlds, maximum size " + str(corpus.maxSize))
+		for (size, numPits), indices in sorted(corpus.Index().items()):
+			print("size " + str(size) + ", " + str(numPits) + " pits: " + str(len(indices)) + " worlds")
+		corpus.close()
+	else:
+		print("unknown command " + command)
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
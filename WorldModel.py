@@ -0,0 +1,120 @@
+# WorldModel.py
+#
+# What an agent knows about the cells of a world of unknown size.
+#
+# Each cell has one byte of flags (visited, known safe, deadly, and the stench and breeze
+# perceived there) in a dense bytearray grid. The grid covers only the cells written so far: it
+# starts at capacity x capacity and doubles along an axis when a cell beyond it is written, so
+# memory follows the explored area, not the largest possible world. Reading a cell beyond the
+# grid returns no flags. The world size is unbounded above until SetWorldSize is called (e.g.
+# after a bump). The frontier (cells that are neither visited nor deadly, next to visited ones,
+# plus [1,1] at the start) is kept as a set, updated with the neighbors of each newly visited
+# cell, so each move costs O(1).
+
+VISITED = 1
+SAFE = 2 # Visited, or proven safe
+DEADLY = 4 # The agent died there
+STENCH = 8
+BREEZE = 16
+
+class WorldModel:
+
+	# worldSize is None while the size is unknown.
+	def __init__(self, worldSize = None, capacity = 8):
+		self.worldSize = worldSize
+		self.width = capacity
+		self.height = capacity
+		self.cells = bytearray(capacity * capacity)
+		self.frontier = set()
+		self.frontier.add((1,1))
+		self.numVisited = 0
+
+	# Grid
+
+	def Grow (self, x, y):
+		width = self.width
+		height = self.height
+		while (width < x):
+			width *= 2
+		while (height < y):
+			height *= 2
+		if (width != self.width):
+			cells = bytearray(width * height)
+			for row in range(self.height):
+				cells[row * width : row * width + self.width] = self.cells[row * self.width : (row + 1) * self.width]
+			self.cells = cells
+		elif (height != self.height):
+			self.cells.extend(bytes((height - self.height) * width))
+		self.width = width
+		self.height = height
+
+	def Flags (self, location):
+		x, y = location
+		if ((x < 1) or (y < 1) or (x > self.width) or (y > self.height)):
+			return 0
+		return self.cells[(y - 1) * self.width + x - 1]
+
+	def SetFlags (self, location, flags):
+		x, y = location
+		if ((x < 1) or (y < 1)):
+			raise ValueError("WorldModel coordinates must be positive: " + str(location))
+		if ((x > self.width) or (y > self.height)):
+			self.Grow(x, y)
+		self.cells[(y - 1) * self.width + x - 1] |= flags
+
+	# Bytes used by the grid.
+	def MemoryUsed (self):
+		return len(self.cells)
+
+	# Queries
+
+	def InWorld (self, location):
+		x, y = location
+		return (x > 0) and (y > 0) and ((self.worldSize is None) or ((x <= self.worldSize) and (y <= self.worldSize)))
+
+	def Neighbors (self, location):
+		x, y = location
+		return [neighbor for neighbor in ((x-1,y), (x+1,y), (x,y-1), (x,y+1)) if self.InWorld(neighbor)]
+
+	# Visited also covers the cells where the agent died.
+	def IsVisited (self, location):
+		return (self.Flags(location) & VISITED) != 0
+
+	def IsSafe (self, location):
+		return (self.Flags(location) & SAFE) != 0
+
+	def IsDeadly (self, location):
+		return (self.Flags(location) & DEADLY) != 0
+
+	def Frontier (self):
+		return self.frontier
+
+	# Updates
+
+	# The agent is at location (alive). Returns True if it had not been there before.
+	def Visit (self, location, stench = False, breeze = False):
+		location = tuple(location)
+		if (self.IsVisited(location)):
+			return False
+		self.SetFlags(location, VISITED | SAFE | (STENCH if stench else 0) | (BREEZE if breeze else 0))
+		self.numVisited += 1
+		self.frontier.discard(location)
+		for neighbor in self.Neighbors(location):
+			if (not self.IsVisited(neighbor)):
+				self.frontier.add(neighbor)
+		return True
+
+	def MarkSafe (self, location):
+		if (self.InWorld(location)):
+			self.SetFlags(location, SAFE)
+
+	# The agent died at location.
+	def MarkDeadly (self, location):
+		location = tuple(location)
+		self.SetFlags(location, VISITED | DEADLY)
+		self.frontier.discard(location)
+
+	# The world is size x size.
+	def SetWorldSize (self, size):
+		self.worldSize = size
+		self.frontier = set([location for location in self.frontier if (max(location) <= size)])
@@ -0,0 +1,223 @@
+# WumpsimLog.py
+#
+# Streaming parser for the output of wumpsim, pywumpsim and wumpsim.py.
+#
+# Usage: python WumpsimLog.py <log file>... [-csv <file>] [-npz <file>] [-workers N]
+#
+# Each log (- for standard input; files ending in .gz are decompressed) is read line by line,
+# keeping only the current try's state and the last board printed, so logs of any length are
+# parsed in constant memory. For every try the trial, try, score, number of moves and the way
+# the game ended are kept in compact columns (array.array). How the game ended is one of
+# CAUSES, worked out from the last board and action: "gold" (climbed out with the gold),
+# "climb" (climbed out without it), "pit" and "wumpus" (walked into one), "limit" (reached the
+# move limit) or "unknown" (e.g. wumpsim.py logs without -verbose, which print no boards and
+# no actions; moves are then -1). The trial and overall averages printed in the log are kept
+# as well. Several logs are parsed in parallel by -workers processes.
+#
+# For each log a summary (tries, average score and moves, and the number of games ending each
+# way) is printed. -csv writes one row per try; -npz saves the columns as NumPy arrays
+# (NumPy is only needed for -npz).
+
+import sys
+import csv
+import gzip
+import array
+import multiprocessing
+
+CAUSES = ("gold", "climb", "pit", "wumpus", "limit", "unknown")
+MAX_MOVES_PER_GAME = 1000
+
+# Column name -> array.array type code
+COLUMNS = (("trial", "l"), ("try", "l"), ("score", "l"), ("moves", "l"), ("cause", "b"))
+
+# (x, y) step of each agent symbol on the board.
+agentMoves = {">": (1,0), "^": (0,1), "<": (-1,0), "v": (0,-1)}
+
+class LogParser:
+
+	def __init__(self):
+		self.trialAverages = array.array("d") # As printed in the log, by trial
+		self.overallAverage = None
+		self.Reset()
+
+	def Reset (self):
+		self.numMoves = 0
+		self.board = None # Lines of the board being read: hazard and agent lines, top row first
+		self.hasGold = False
+		self.lastBoard = None # Board before the last action
+		self.lastHasGold = False
+		self.lastAction = None
+
+	# Yields (trial, try, score, moves, cause index) for every try completed in lines.
+	def Tries (self, lines):
+		for line in lines:
+			first = line[:1]
+			if (first == "|"):
+				if (self.board is not None):
+					self.board.append(line)
+			elif (first == "W"):
+				if (line.startswith("World size = ")):
+					self.board = []
+			elif (first == "A"):
+				if (line.startswith("Action = ")):
+					self.numMoves += 1
+					self.lastAction = line[9:].strip()
+					self.lastBoard = self.board
+					self.lastHasGold = self.hasGold
+					self.board = None
+				elif (line.startswith("Agent has gold = ")):
+					self.hasGold = line[17:18] == "1"
+				elif (line.startswith("All trials completed: Average score for all trials = ")):
+					self.overallAverage = float(line[53:])
+			elif (first == "T"):
+				if (line.endswith(" begin\n") or line.endswith(" begin")):
+					self.Reset()
+				elif (": Score = " in line):
+					header, score = line.split(": Score = ")
+					trial, tries = header[6:-9].split(", Try ")
+					score = int(score)
+					if (self.lastAction is None):
+						yield int(trial), int(tries), score, -1, CAUSES.index("unknown")
+					else:
+						yield int(trial), int(tries), score, self.numMoves, CAUSES.index(self.Cause())
+					self.Reset()
+				elif (": Average score for trial = " in line):
+					self.trialAverages.append(float(line.split(" = ")[1]))
+
+	# How the try that just completed ended.
+	def Cause (self):
+		if (self.lastAction == "CLIMB"):
+			return "gold" if self.lastHasGold else "climb"
+		if ((self.lastAction == "GOFORWARD") and self.lastBoard):
+			hazard = self.ForwardHazard(self.lastBoard)
+			if (hazard is not None):
+				return hazard
+		if (self.numMoves >= MAX_MOVES_PER_GAME):
+			return "limit"
+		return "unknown"
+
+	# Returns "pit" or "wumpus" if the cell in front of the agent on board holds one, else None.
+	def ForwardHazard (self, board):
+		numRows = len(board) // 2
+		for row in range(numRows):
+			agentLine = board[2 * row + 1]
+			column = agentLine.find("A")
+			if (column < 0):
+				continue
+			moveX, moveY = agentMoves[agentLine[column + 1]]
+			x = column // 4 + moveX
+			row -= moveY # Rows are printed top (highest y) first
+			if ((row < 0) or (row >= numRows) or (x < 0) or (4 * x + 4 > len(board[2 * row].rstrip()))):
+				return None
+			cell = board[2 * row][4 * x + 1:4 * x + 4]
+			if (cell[2] == "P"):
+				return "pit"
+			if (cell[0] == "W"):
+				return "wumpus"
+			return None
+		return None
+
+def OpenLog (fileName):
+	if (fileName == "-"):
+		return sys.stdin
+	if (fileName.endswith(".gz")):
+		return gzip.open(fileName, "rt")
+	return open(fileName)
+
+# Parses one log; returns (file name, columns, trial averages, overall average), where columns
+# maps each column name to an array.array.
+def ParseFile (fileName):
+	columns = dict([(name, array.array(typeCode)) for name, typeCode in COLUMNS])
+	appends = [columns[name].append for name, typeCode in COLUMNS]
+	parser = LogParser()
+	logFile = OpenLog(fileName)
+	try:
+		for row in parser.Tries(logFile):
+			for append, value in zip(appends, row):
+				append(value)
+	finally:
+		if (logFile is not sys.stdin):
+			logFile.close()
+	return fileName, columns, parser.trialAverages, parser.overallAverage
+
+# Yields ParseFile's results for the files in order, parsing them on numWorkers processes
+# (in this process if numWorkers is 1 or there is only one file).
+def ParseFiles (fileNames, numWorkers = None):
+	if ((numWorkers == 1) or (len(fileNames) <= 1)):
+		for fileName in fileNames:
+			yield ParseFile(fileName)
+		return
+	with multiprocessing.Pool(numWorkers) as pool:
+		for result in pool.imap(ParseFile, fileNames):
+			yield result
+
+def Summary (columns, overallAverage):
+	numTries = len(columns["score"])
+	moves = [numMoves for numMoves in columns["moves"] if (numMoves >= 0)]
+	causeCounts = [0] * len(CAUSES)
+	for cause in columns["cause"]:
+		causeCounts[cause] += 1
+	line = str(numTries) + " tries"
+	if (numTries):
+		line += ", average score " + "%g" % (sum(columns["score"]) / numTries)
+	if (overallAverage is not None):
+		line += " (log: " + "%g" % overallAverage + ")"
+	if (moves):
+		line += ", average moves " + "%g" % (sum(moves) / len(moves))
+	return line + ", " + ", ".join([name + " " + str(count) for name, count in zip(CAUSES, causeCounts) if count])
+
+def main (argv):
+	fileNames = []
+	csvFile = None
+	npzFile = None
+	numWorkers = None
+
+	# Process command-line options
+	i = 1
+	while (i < len(argv)):
+		if (argv[i] == "-csv"):
+			i += 1
+			csvFile = argv[i]
+		elif (argv[i] == "-npz"):
+			i += 1
+			npzFile = argv[i]
+		elif (argv[i] == "-workers"):
+			i += 1
+			numWorkers = int(argv[i])
+		elif ((argv[i] == "-") or (not argv[i].startswith("-"))):
+			fileNames.append(argv[i])
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+	if (not fileNames):
+		print("usage: python WumpsimLog.py <log file>... [-csv <file>] [-npz <file>] [-workers N]")
+		return 1
+
+	csvWriter = None
+	if (csvFile is not None):
+		csvStream = open(csvFile, "w", newline = "")
+		csvWriter = csv.writer(csvStream)
+		csvWriter.writerow(["file"] + [name for name, typeCode in COLUMNS])
+	allColumns = dict([(name, array.array(typeCode)) for name, typeCode in COLUMNS])
+	fileIndices = array.array("l")
+	for index, (fileName, columns, trialAverages, overallAverage) in enumerate(ParseFiles(fileNames, numWorkers)):
+		print(fileName + ": " + Summary(columns, overallAverage))
+		if (csvWriter is not None):
+			for trial, tries, score, numMoves, cause in zip(*[columns[name] for name, typeCode in COLUMNS]):
+				csvWriter.writerow([fileName, trial, tries, score, numMoves, CAUSES[cause]])
+		if (npzFile is not None):
+			for name, typeCode in COLUMNS:
+				allColumns[name].extend(columns[name])
+			fileIndices.extend([index] * len(columns["score"]))
+	if (csvWriter is not None):
+		csvStream.close()
+	if (npzFile is not None):
+		import numpy
+		arrays = dict([(name, numpy.frombuffer(values, dtype = values.typecode)) for name, values in allColumns.items()])
+		numpy.savez(npzFile, fileIndex = numpy.frombuffer(fileIndices, dtype = fileIndices.typecode), fileNames = numpy.array(fileNames),
+					causes = numpy.array(CAUSES), **arrays)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -2,21 +2,23 @@
 #
 # This code works only for the testworld that comes with the simulator.
 
-from Percept import Percept
+from Percept import Percept, GLITTER, BUMP, SCREAM
 import Action
 import Orientation
 import Search
+import Instrumentation
+import KnowledgeBase
+import HazardProbability
+import WorldModel
+import TourPlanner
 
-class MySearchEngine(Search.SearchEngine):
-    def HeuristicFunction(self, state: Search.SearchState, goalState: Search.SearchState):
-        # Compute and return city block distance.
-        return(abs(state.location[0]-goalState.location[0]) + abs(state.location[1]-goalState.location[1]))
-    
 class Agent:
     def __init__(self):
 
+        self.instrumentation = Instrumentation.default # Counters and log output.
         self.location = [1,1] # A two-item list representing the x and y coordinates of the agent's position.
-        self.searchEngine = MySearchEngine() # Initialize the search engine.
+        self.searchEngine = Search.SearchEngine(heuristic = "turnaware", instrumentation = self.instrumentation) # Initialize the search engine.
+        self.moveDeadline = Search.DefaultMoveDeadline() # Seconds each Process call may search for.  None if unlimited.
         self.goldLocation = None # The location of the gold.  NoneType if unknown.
 
         # Dictionary to convert action objects to the related function.
@@ -33,27 +35,22 @@ class Agent:
         self.turnLeftTransform = {Orientation.UP:Orientation.LEFT, Orientation.LEFT:Orientation.DOWN,
                                   Orientation.DOWN:Orientation.RIGHT, Orientation.RIGHT:Orientation.UP}
 
-        # Assume that the world is the max size to begin.
-        self.worldSize = 9
-
-        # Create a set of locations which have already been visited.
-        self.visitedLocations = set()
+        # The world size is unknown until the agent bumps into a wall.
+        # The world model keeps the visited locations, and the locations that are adjacent to
+        # visited locations but have yet to be visited (starting with [1,1]).
+        self.worldModel = WorldModel.WorldModel()
 
-        # Create a set of locations that are known to be safe
-        self.knownSafeLocations = set()
+        # Create a knowledge base of what the percepts so far tell about pits and the wumpus.
+        self.knowledgeBase = KnowledgeBase.KnowledgeBase(self.worldModel.worldSize)
+        self.hazardModel = HazardProbability.HazardModel(self.knowledgeBase)
 
-        # Create a set of locations which have stenches
-        self.stenchLocations = set()
+        # Orders the known safe locations still to be explored into a short tour.
+        self.tourPlanner = TourPlanner.TourPlanner(self.searchEngine)
 
         # Create a variable to keep track of the wumpus location.
         # An unknown wumpus location is represented by "None"
         self.wumpusLocation = None
 
-        # Create a set of locations that are adjacent to visited locations but have yet to be visited.
-        # Also, add the starting location here as, well, a starting point!
-        self.locationsToVisit = set()
-        self.locationsToVisit.add((1,1))
-
         for x in range(1,10):
             for y in range(1,10):
                 pass
@@ -68,11 +65,14 @@ class Agent:
         # Check the agent's location.  If it is not [1,1], then the agent encountered an unsafe spot at the end of the
         # last try.  Update the agent's knowledge accordingly.  Then, reset the location to [1,1]
         if self.location != [1,1]:
-            print("Agent met its demise at:",self.location,'\n')
-            self.locationsToVisit.remove(tuple(self.location))
-            self.visitedLocations.add(tuple(self.location))
+            self.instrumentation.Log("Agent met its demise at:",self.location,'\n')
+            self.worldModel.MarkDeadly(self.location)
             self.searchEngine.RemoveSafeLocation(self.location[0],self.location[1])
+            self.knowledgeBase.TellDeath(self.location)
+            self.tourPlanner.Clear()
+            if self.wumpusLocation is None: self.wumpusLocation = self.knowledgeBase.wumpusLocation
             self.location = [1,1]
+        self.knowledgeBase.NewTry()
 
         self.orientation = Orientation.RIGHT # The agent's current orientation.
         self.hasGold = False # Whether or not the agent has the gold
@@ -123,24 +123,16 @@ class Agent:
         return [self.location[0] + positionTransform[0], self.location[1] + positionTransform[1]]
 
 
-    def getValidAdjacentLocations(self, location):
-        """
-        Returns a list of all locations adjacent to the given location that aren't out of bounds.
-        """
-        adjacentLocations = list()
-        for x,y in ((-1,0),(1,0),(0,-1),(0,1)):
-            adjacentLocation = (location[0]+x,location[1]+y)
-            if min(adjacentLocation) > 0 and max(adjacentLocation) <= self.worldSize:
-                adjacentLocations.append(adjacentLocation)
-
-        return adjacentLocations
-
-
 
     # Input percept is a dictionary [perceptName: boolean]
     def Process (self, percept: Percept):
 
-        print("Agent is at:",self.location)
+        self.instrumentation.Log("Agent is at:",self.location)
+
+        # Searches made for this move stop at the deadline, possibly with a partial path.  The deadline
+        # grows while moves in a row have their searches cut short, so the agent cannot be stuck without a plan.
+        self.searchEngine.SetMoveDeadline(self.moveDeadline)
+        budgetHits = self.searchEngine.budgetHits
 
         # First thing's first: If we have gold and are at the exit, get out of there!
         if self.hasGold and self.location == [1,1]: return Action.CLIMB
@@ -148,45 +140,38 @@ class Agent:
         # Did the agent bump?  If so, we now know the world size and should reset our position
         # and update our unvisited locations and actionList to make sure we don't try to go out of bounds again.
         if percept.bump:
-            self.worldSize = max(self.location)-1
-            self.location[self.location.index(self.worldSize+1)] = self.worldSize
-            self.locationsToVisit = {location for location in self.locationsToVisit if max(location) <= self.worldSize}
+            worldSize = max(self.location)-1
+            self.location[self.location.index(worldSize+1)] = worldSize
+            self.worldModel.SetWorldSize(worldSize)
+            self.knowledgeBase.SetWorldSize(worldSize)
+            self.tourPlanner.Clear()
             self.actionList.clear()
 
         # Did we hear a scream?  If so, the wumpus is dead!
-        if percept.scream: self.isWumpusAlive = False
+        if percept.scream:
+            self.isWumpusAlive = False
+            self.knowledgeBase.TellScream()
 
         # Check to see if this is a new location.  If it is, we have some new knowledge about the world!
-        if not tuple(self.location) in self.visitedLocations:
+        if not self.worldModel.IsVisited(self.location):
             
             # Clear out the current action, as it should only contain rotation actions now anyway.
             self.actionList.clear()
 
-            # This space has now been visited and is known to be safe.
-            self.visitedLocations.add(tuple(self.location))
+            # This space has now been visited and is known to be safe.  The world model marks any
+            # unvisited adjacent locations to be visited.
+            self.worldModel.Visit(self.location, percept.stench, percept.breeze)
             self.searchEngine.AddSafeLocation(self.location[0],self.location[1])
-            self.locationsToVisit.remove(tuple(self.location))
-            self.knownSafeLocations.add(tuple(self.location))
-
-            # Determine which adjacent spaces are actually valid.
-            adjacentLocations = self.getValidAdjacentLocations(self.location)
-
-            # If there is no breeze or stench, all adjacent spaces are safe too!
-            # Don't forget about the edge case where perceiving a stench while on top of the wumpus's corpse doesn't indicate adjacent danger.
-            if not percept.breeze and (not percept.stench or tuple(self.location) == self.wumpusLocation):
-                for location in adjacentLocations: self.knownSafeLocations.add(location)
-
-            # Otherwise, if there is a stench, add it to the set of known stench locations.
-            elif percept.stench: self.stenchLocations.add(tuple(self.location))
 
-            # Check for any unvisited adjacent locations and mark them to be visited.
-            for location in adjacentLocations:
-                if not location in self.visitedLocations: self.locationsToVisit.add(location)
+            # Tell the knowledge base what we perceive here.  It works out which cells are safe,
+            # where pits must be, and where the wumpus is once only one cell is left for it.
+            self.knowledgeBase.Tell(self.location, percept.stench, percept.breeze)
+            if self.wumpusLocation is None: self.wumpusLocation = self.knowledgeBase.wumpusLocation
 
         # Did the agent perceive a glitter?  If so, grab it, and plan to go back to [1,1]
         # Also, update the known gold position.
         if percept.glitter:
-            print("Found gold! Routing back to [1,1]")
+            self.instrumentation.Log("Found gold! Routing back to [1,1]")
             self.actionList = self.searchEngine.FindPath(self.location, self.orientation, [1,1], Orientation.LEFT)
             self.actionList.reverse()
             self.hasGold = True
@@ -196,56 +181,65 @@ class Agent:
         # If there are not actions planned at the moment, we need to choose a location to travel to.
         if not self.actionList:
 
+            # If we have the gold (and a search for the way back was cut short), head for [1,1].
+            if self.hasGold:
+                self.actionList = self.searchEngine.FindPath(self.location, self.orientation, [1,1], Orientation.LEFT)
+
             # If we know the location of the gold, go there!
-            if self.goldLocation is not None:
-                print("Routing to gold at",self.goldLocation)
+            elif self.goldLocation is not None:
+                self.instrumentation.Log("Routing to gold at",self.goldLocation)
                 self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
                                                              self.goldLocation, Orientation.RIGHT)
 
-            # Otherwise, check for areas marked for exploration that are guaranteed to be safe.
+            # Otherwise, head for the next area marked for exploration that is guaranteed to be safe,
+            # in the order of the tour through all of them.
             else:
-                for location in self.locationsToVisit:
-                    if location in self.knownSafeLocations:
-                        print("Routing to known safe location at",location)
-                        self.searchEngine.AddSafeLocation(location[0],location[1])
-                        self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
-                                                                     list(location), Orientation.RIGHT)
-                        break
+                location, actionList = self.tourPlanner.Plan(self.location, self.orientation,
+                                                             self.knowledgeBase.SafeFrontier())
+                if location is not None:
+                    self.instrumentation.Log("Routing to known safe location at",location)
+                    self.searchEngine.AddSafeLocation(location[0],location[1])
+                    self.actionList = actionList
             
                 # If there aren't any known safe locations, can we kill the wumpus to establish a new safe location?
-                if not self.actionList:
-
-                    # (First, check to see if we actually know the wumpus's location or can determine it.)
-                    if self.wumpusLocation is None:
-                        for stenchLocation1 in self.stenchLocations:
-                            for stenchLocation2 in self.stenchLocations:
-
-                                # Can we find a pair of diagonal stenches?
-                                if abs(stenchLocation1[0]-stenchLocation2[0]) == 1 and abs(stenchLocation1[1]-stenchLocation2[1]) == 1:
-                                    # Is one of the spaces between the diagonals known to be safe?  If so, the wumpus must be in the other space!
-                                    if (stenchLocation1[0],stenchLocation2[1]) in self.knownSafeLocations:
-                                        self.wumpusLocation = (stenchLocation2[0],stenchLocation1[1])
-                                    elif (stenchLocation2[0],stenchLocation1[1]) in self.knownSafeLocations:
-                                        self.wumpusLocation  = (stenchLocation1[0],stenchLocation2[1])
-
-                    # If we know the wumpus location now and haven't been there before, route to it!
-                    if self.wumpusLocation is not None and not self.wumpusLocation in self.visitedLocations:
-                        print("Routing to wumpus at",self.wumpusLocation)
+                # (Only if the search for them was not cut short by the deadline.)
+                if not self.actionList and self.searchEngine.budgetHits == budgetHits:
+
+                    # If we know the wumpus location and haven't been there before, route to it!
+                    if self.wumpusLocation is not None and not self.worldModel.IsVisited(self.wumpusLocation):
+                        self.instrumentation.Log("Routing to wumpus at",self.wumpusLocation)
                         self.searchEngine.AddSafeLocation(self.wumpusLocation[0],self.wumpusLocation[1])
                         self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
                                                                     list(self.wumpusLocation), Orientation.RIGHT)
 
-                    # If we still haven't decided on a location, just pick one that needs to be visited!
+                    # If we still haven't decided on a location, pick the one least likely to hold a pit or the wumpus
+                    # (the closest one of those).  One search from the current pose gives the distance and path
+                    # to every candidate.
                     else: 
-                        location = tuple(self.locationsToVisit)[0]
-                        print("Routing to possibly safe location at",location)
-                        self.searchEngine.AddSafeLocation(location[0],location[1])
-                        self.actionList = self.searchEngine.FindPath(self.location, self.orientation, 
-                                                                    list(location), Orientation.RIGHT)
+                        distances = self.searchEngine.FindDistances(self.location, self.orientation,
+                                                                    self.worldModel.Frontier())
+                        location = self.hazardModel.LeastRisky(self.worldModel.Frontier(), distances)
+                        if location is not None:
+                            self.instrumentation.Log("Routing to possibly safe location at",location)
+                            self.searchEngine.AddSafeLocation(location[0],location[1])
+                            self.actionList = distances.PathTo(location)
+
+            # If there is nowhere left to go (or no way to get there), give up: climb out at [1,1],
+            # or head back there first.
+            if not self.actionList and self.searchEngine.budgetHits == budgetHits:
+                if self.location == [1,1]: return Action.CLIMB
+                self.instrumentation.Log("Nothing left to explore. Routing back to [1,1]")
+                self.actionList = self.searchEngine.FindPath(self.location, self.orientation, [1,1], Orientation.LEFT)
 
             # Reverse the action list so we can pop items off the end, which is more efficient.
             self.actionList.reverse()
 
+        # If the deadline passed before any plan was found, turn in place: it is always safe, and the
+        # next move searches again from the same location.
+        if not self.actionList and self.searchEngine.budgetHits > budgetHits:
+            self.instrumentation.RecordDefaultAction()
+            return self.turnLeft()
+
         # If we have information about the wumpus, make sure we aren't about to run into him!
         # If we are, it means we plotted a path to or through him and we need to shoot him first.
         if (self.wumpusLocation is not None and self.isWumpusAlive and 
@@ -255,6 +249,46 @@ class Agent:
         # If we've reached this point, we should have a list of movement actions to work with.  Pop one off and handle it!
         action = self.actionList.pop()
         return self.actionToFunction[action]()
+
+
+    def PlanAhead(self):
+        """
+        Returns the queued actions that Process would take next if nothing new is perceived, as
+        (action, expected percept, percept mask) tuples for the fast PyAgent bridge.  Each action is
+        only valid if the packed percept before it, masked, equals the expected percept (no
+        glitter, bump or scream); stench and breeze are already known at visited locations.
+        The agent's state is not changed; the host reports the actions it took via AdvancePlan.
+        """
+
+        plan = []
+        location = self.location
+        orientation = self.orientation
+        for action in reversed(self.actionList):
+
+            # Stop where Process would do something else: climb out, or learn about a new location.
+            if (self.hasGold and location == [1,1]) or not self.worldModel.IsVisited(location): break
+
+            # Process shoots instead of walking into a live wumpus.
+            positionTransform = self.orientationMovementTransform[orientation]
+            if (self.wumpusLocation is not None and self.isWumpusAlive and action == Action.GOFORWARD and
+                (location[0] + positionTransform[0], location[1] + positionTransform[1]) == self.wumpusLocation): break
+
+            plan.append((action, 0, GLITTER | BUMP | SCREAM))
+            if action == Action.GOFORWARD: location = [location[0] + positionTransform[0], location[1] + positionTransform[1]]
+            elif action == Action.TURNLEFT: orientation = self.turnLeftTransform[orientation]
+            else: orientation = self.turnRightTransform[orientation]
+        return plan
+
+
+    def AdvancePlan(self, numActions):
+        """
+        Takes the first numActions actions of the plan returned by PlanAhead, exactly as Process
+        would have.
+        """
+
+        for i in range(numActions):
+            self.instrumentation.Log("Agent is at:",self.location)
+            self.actionToFunction[self.actionList.pop()]()
     
     def GameOver(self, score):
-        pass
+        self.gameStats = self.instrumentation.EndGame(score)
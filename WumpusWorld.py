@@ -0,0 +1,240 @@
+# WumpusWorld.py
+#
+# Pure-Python version of the wumpus world simulator (WumpusWorld.cc), so agents can be run
+# in-process without the C++ build. The rules, scoring, world file format and random world
+# generation follow the C++ simulator; random worlds come from Python's random module, so a
+# given seed produces different worlds than wumpsim does.
+
+import random
+import Action
+import Orientation
+from Percept import PackPercept, internedPercepts
+
+PIT_PROBABILITY = 0.2
+
+actionNames = {Action.GOFORWARD: "GOFORWARD", Action.TURNLEFT: "TURNLEFT", Action.TURNRIGHT: "TURNRIGHT",
+			   Action.GRAB: "GRAB", Action.SHOOT: "SHOOT", Action.CLIMB: "CLIMB"}
+
+orientationMoves = {Orientation.RIGHT: (1,0), Orientation.UP: (0,1), Orientation.LEFT: (-1,0), Orientation.DOWN: (0,-1)}
+turnLeftTransform = {Orientation.RIGHT: Orientation.UP, Orientation.UP: Orientation.LEFT,
+					 Orientation.LEFT: Orientation.DOWN, Orientation.DOWN: Orientation.RIGHT}
+turnRightTransform = {Orientation.RIGHT: Orientation.DOWN, Orientation.UP: Orientation.RIGHT,
+					  Orientation.LEFT: Orientation.UP, Orientation.DOWN: Orientation.LEFT}
+
+def Adjacent (location1, location2):
+	return abs(location1[0] - location2[0]) + abs(location1[1] - location2[1]) == 1
+
+class WumpusWorld:
+
+	# Builds a random size x size world using rng (a random.Random, or the random module), or
+	# reads one from worldFile, or uses locations = (size, wumpus location, gold location, pit
+	# locations). Locations are (x,y) tuples.
+	def __init__(self, size = 4, worldFile = None, rng = None, locations = None):
+		if (worldFile is not None):
+			self.Read(worldFile)
+		elif (locations is not None):
+			self.worldSize, self.wumpusLocation, self.goldLocation, pitLocations = locations
+			self.pitLocations = list(pitLocations)
+		else:
+			self.Generate(size, rng or random)
+		self.UpdateHazardPercepts()
+		self.Initialize()
+
+	def Generate (self, size, rng):
+		self.worldSize = size
+		# Choose wumpus location (anywhere except [1,1])
+		x = 1; y = 1
+		while ((x == 1) and (y == 1)):
+			x = rng.randrange(size) + 1
+			y = rng.randrange(size) + 1
+		self.wumpusLocation = (x,y)
+		# Choose gold location (anywhere except [1,1])
+		x = 1; y = 1
+		while ((x == 1) and (y == 1)):
+			x = rng.randrange(size) + 1
+			y = rng.randrange(size) + 1
+		self.goldLocation = (x,y)
+		# Choose pit locations (anywhere except [1,1])
+		self.pitLocations = []
+		for x in range(1, size + 1):
+			for y in range(1, size + 1):
+				if ((x != 1) or (y != 1)):
+					if (rng.randrange(1000) < PIT_PROBABILITY * 1000):
+						self.pitLocations.append((x,y))
+
+	def Read (self, worldFile):
+		with open(worldFile) as worldFileStream:
+			tokens = worldFileStream.read().split()
+		self.pitLocations = []
+		self.worldSize = 0
+		index = 0
+		for expectedToken in ("size", "wumpus", "gold"):
+			if ((index >= len(tokens)) or (tokens[index] != expectedToken)):
+				raise ValueError("Incorrect token in world file: " + (tokens[index] if index < len(tokens) else ""))
+			if (expectedToken == "size"):
+				self.worldSize = max(int(tokens[index + 1]), 2)
+				index += 2
+			else:
+				location = self.ReadLocation(tokens, index, expectedToken)
+				if (expectedToken == "wumpus"):
+					self.wumpusLocation = location
+				else:
+					self.goldLocation = location
+				index += 3
+		# Read pit locations
+		while (index < len(tokens)):
+			if (tokens[index] != "pit"):
+				raise ValueError("Incorrect token in world file: " + tokens[index])
+			self.pitLocations.append(self.ReadLocation(tokens, index, "pit"))
+			index += 3
+
+	def ReadLocation (self, tokens, index, name):
+		x = int(tokens[index + 1])
+		y = int(tokens[index + 2])
+		if ((x < 1) or (x > self.worldSize) or (y < 1) or (y > self.worldSize) or ((x == 1) and (y == 1))):
+			raise ValueError("Bad " + name + " location in world file")
+		return (x,y)
+
+	def Write (self, fileName):
+		with open(fileName, "w") as worldFileStream:
+			worldFileStream.write("size " + str(self.worldSize) + "\n")
+			worldFileStream.write("wumpus " + str(self.wumpusLocation[0]) + " " + str(self.wumpusLocation[1]) + "\n")
+			worldFileStream.write("gold " + str(self.goldLocation[0]) + " " + str(self.goldLocation[1]) + "\n")
+			for x,y in self.pitLocations:
+				worldFileStream.write("pit " + str(x) + " " + str(y) + "\n")
+
+	# Precompute the locations with a stench (next to or at the wumpus, alive or dead) or a breeze.
+	def UpdateHazardPercepts (self):
+		self.pitSet = set(self.pitLocations)
+		self.stenchLocations = set([self.wumpusLocation])
+		self.breezeLocations = set()
+		for x,y in [self.wumpusLocation] + self.pitLocations:
+			for moveX, moveY in orientationMoves.values():
+				if ((x,y) == self.wumpusLocation):
+					self.stenchLocations.add((x + moveX, y + moveY))
+				if ((x,y) in self.pitSet):
+					self.breezeLocations.add((x + moveX, y + moveY))
+
+	def Initialize (self):
+		self.numActions = 0
+		self.agentLocation = (1,1)
+		self.agentOrientation = Orientation.RIGHT
+		self.agentAlive = True
+		self.agentHasArrow = True
+		self.agentHasGold = False
+		self.agentInCave = True
+		self.wumpusAlive = True
+		self.stench = self.agentLocation in self.stenchLocations
+		self.breeze = self.agentLocation in self.breezeLocations
+		self.glitter = self.goldLocation == (1,1)
+		self.bump = False
+		self.scream = False
+
+	# The current percept, as one of the shared immutable Percept.internedPercepts.
+	def GetPercept (self):
+		return internedPercepts[self.GetPerceptBits()]
+
+	def GetPerceptBits (self):
+		return PackPercept(self.stench, self.breeze, self.glitter, self.bump, self.scream)
+
+	# We assume the agent is alive and in the cave (i.e., game not over)
+	def ExecuteAction (self, action):
+		self.numActions += 1
+		self.bump = False
+		self.scream = False
+
+		if (action == Action.GOFORWARD):
+			moveX, moveY = orientationMoves[self.agentOrientation]
+			x = self.agentLocation[0] + moveX
+			y = self.agentLocation[1] + moveY
+			if ((1 <= x <= self.worldSize) and (1 <= y <= self.worldSize)):
+				self.agentLocation = (x,y)
+			else:
+				self.bump = True
+			self.glitter = (not self.agentHasGold) and (self.agentLocation == self.goldLocation)
+			self.stench = self.agentLocation in self.stenchLocations
+			self.breeze = self.agentLocation in self.breezeLocations
+			# Check for death by pit or wumpus
+			if ((self.agentLocation in self.pitSet) or (self.wumpusAlive and (self.agentLocation == self.wumpusLocation))):
+				self.agentAlive = False
+
+		elif (action == Action.TURNLEFT):
+			self.agentOrientation = turnLeftTransform[self.agentOrientation]
+
+		elif (action == Action.TURNRIGHT):
+			self.agentOrientation = turnRightTransform[self.agentOrientation]
+
+		elif (action == Action.GRAB):
+			if ((not self.agentHasGold) and (self.agentLocation == self.goldLocation)):
+				self.agentHasGold = True
+				self.glitter = False
+
+		elif (action == Action.SHOOT):
+			if (self.agentHasArrow):
+				self.agentHasArrow = False
+				if (self.wumpusAlive and self.InLineOfFire(self.wumpusLocation)):
+					self.wumpusAlive = False
+					self.scream = True
+
+		elif (action == Action.CLIMB):
+			if (self.agentLocation == (1,1)):
+				self.agentInCave = False
+				self.stench = False
+				self.breeze = False
+				self.glitter = False
+
+	# True if location is straight ahead of the agent.
+	def InLineOfFire (self, location):
+		x, y = self.agentLocation
+		if (self.agentOrientation == Orientation.RIGHT):
+			return (x < location[0]) and (y == location[1])
+		if (self.agentOrientation == Orientation.UP):
+			return (x == location[0]) and (y < location[1])
+		if (self.agentOrientation == Orientation.LEFT):
+			return (x > location[0]) and (y == location[1])
+		return (x == location[0]) and (y > location[1])
+
+	def GameOver (self):
+		return (not self.agentInCave) or (not self.agentAlive)
+
+	def GetScore (self):
+		# -1 for each action
+		score = -self.numActions
+		# -10 for shooting the arrow (already lost 1 for the action)
+		if (not self.agentHasArrow):
+			score -= 9
+		# +1000 for leaving the cave with the gold
+		if (self.agentHasGold and (not self.agentInCave)):
+			score += 1000
+		# -1000 for dying
+		if (not self.agentAlive):
+			score -= 1000
+		return score
+
+	def Print (self, stream):
+		lines = ["World size = " + str(self.worldSize) + "x" + str(self.worldSize)]
+		boundary = "+" + "---+" * self.worldSize
+		lines.append(boundary)
+		agentSymbols = {Orientation.RIGHT: " A>|", Orientation.UP: " A^|", Orientation.LEFT: " A<|", Orientation.DOWN: " Av|"}
+		for y in range(self.worldSize, 0, -1):
+			hazardLine = "|"
+			agentLine = "|"
+			for x in range(1, self.worldSize + 1):
+				if (self.wumpusLocation == (x,y)):
+					hazardLine += "W" if self.wumpusAlive else "x"
+				else:
+					hazardLine += " "
+				hazardLine += "G" if ((not self.agentHasGold) and (self.goldLocation == (x,y))) else " "
+				hazardLine += "P" if ((x,y) in self.pitSet) else " "
+				hazardLine += "|"
+				if (self.agentAlive and (self.agentLocation == (x,y))):
+					agentLine += agentSymbols[self.agentOrientation]
+				else:
+					agentLine += "   |"
+			lines += [hazardLine, agentLine, boundary]
+		lines.append("Current percept = [Stench=" + str(int(self.stench)) + ",Breeze=" + str(int(self.breeze)) +
+					 ",Glitter=" + str(int(self.glitter)) + ",Bump=" + str(int(self.bump)) +
+					 ",Scream=" + str(int(self.scream)) + "]")
+		lines.append("Agent has gold = " + str(int(self.agentHasGold)) + ", agent has arrow = " + str(int(self.agentHasArrow)))
+		lines.append("Current score = " + str(self.GetScore()))
+		stream.write("\n".join(lines) + "\n\n")
@@ -0,0 +1,166 @@
+# wumpsim.py
+#
+# Pure-Python wumpus simulator (see wumpsim.cc), running a Python agent in-process.
+#
+# Usage: python wumpsim.py [-agent <module>] [-size N] [-trials N] [-tries N] [-seed N]
+#                          [-world <file>] [-plan] [-trace <file>] [-verbose]
+#
+# The agent module (default Agent, as for pywumpsim) must define an Agent class with
+# Initialize, Process and GameOver methods. With -plan, agents that also define PlanAhead and
+# AdvancePlan are run as pywumpsim runs them through PyAgent_ProcessPlan: queued actions are
+# taken without calling Process while the percepts are as the agent expected. With -trace, each
+# trial's world and every move are recorded to a binary trace (see GameTrace.py); -plan then has
+# no effect. Only the per-try, per-trial and overall scores are printed, unless -verbose is
+# given, in which case the board and each action are printed as wumpsim does.
+
+import sys
+import time
+import random
+import importlib
+import WumpusWorld
+import GameTrace
+from Percept import internedPercepts
+
+WUMPSIM_VERSION = "3.2"
+MAX_MOVES_PER_GAME = 1000
+
+# Plays one game (try) of an already initialized world and returns (score, number of moves).
+# If usePlans is set and the agent has a PlanAhead method, the agent's plans are followed as
+# PyAgent_ProcessPlan does.
+def PlayGame (wumpusWorld, agent, stream = None, usePlans = False):
+	agent.Initialize()
+	usePlans = usePlans and hasattr(agent, "PlanAhead")
+	plan = []
+	planIndex = 0
+	numMoves = 0
+	while ((not wumpusWorld.GameOver()) and (numMoves < MAX_MOVES_PER_GAME)):
+		if (stream is not None):
+			wumpusWorld.Print(stream)
+		if (usePlans):
+			perceptBits = wumpusWorld.GetPerceptBits()
+			if ((planIndex < len(plan)) and ((perceptBits & plan[planIndex][2]) == plan[planIndex][1])):
+				action = plan[planIndex][0]
+				planIndex += 1
+			else:
+				if (planIndex):
+					agent.AdvancePlan(planIndex)
+				action = agent.Process(internedPercepts[perceptBits])
+				plan = agent.PlanAhead()
+				planIndex = 0
+		else:
+			action = agent.Process(wumpusWorld.GetPercept())
+		if (stream is not None):
+			stream.write("Action = " + WumpusWorld.actionNames[action] + "\n\n")
+		wumpusWorld.ExecuteAction(action)
+		numMoves += 1
+	if (planIndex):
+		agent.AdvancePlan(planIndex)
+	score = wumpusWorld.GetScore()
+	agent.GameOver(score)
+	return score, numMoves
+
+# Runs numTrials trials of numTries tries each, with a new world (read from worldFile, or
+# generated from seed) and a new agent for each trial. Yields (trial, try, score, moves) for
+# every game. Nothing is printed unless a stream is given. If a GameTrace.TraceRecorder is
+# given, the games are recorded to it.
+def RunTrials (agentClass, worldSize = 4, numTrials = 1, numTries = 1, seed = None, worldFile = None, stream = None,
+			   usePlans = False, recorder = None):
+	rng = random.Random(seed)
+	for trial in range(1, numTrials + 1):
+		if (worldFile is not None):
+			wumpusWorld = WumpusWorld.WumpusWorld(worldFile = worldFile)
+		else:
+			wumpusWorld = WumpusWorld.WumpusWorld(size = worldSize, rng = rng)
+		agent = agentClass()
+		if (recorder is not None):
+			recorder.BeginTrial(wumpusWorld)
+			agent = recorder.Wrap(agent)
+		for tries in range(1, numTries + 1):
+			wumpusWorld.Initialize()
+			if (stream is not None):
+				stream.write("Trial " + str(trial) + ", Try " + str(tries) + " begin\n\n")
+			score, numMoves = PlayGame(wumpusWorld, agent, stream, usePlans)
+			yield trial, tries, score, numMoves
+		del agent
+
+# Formats a float like the C++ simulator's cout (6 significant digits).
+def FormatScore (score):
+	return "%g" % score
+
+def main (argv):
+	agentModule = "Agent"
+	worldSize = 4
+	numTrials = 1
+	numTries = 1
+	seed = None
+	worldFile = None
+	usePlans = False
+	traceFile = None
+	verbose = False
+
+	# Process command-line options
+	i = 1
+	while (i < len(argv)):
+		if (argv[i] == "-agent"):
+			i += 1
+			agentModule = argv[i]
+		elif (argv[i] == "-size"):
+			i += 1
+			worldSize = max(int(argv[i]), 2)
+		elif (argv[i] == "-trials"):
+			i += 1
+			numTrials = int(argv[i])
+		elif (argv[i] == "-tries"):
+			i += 1
+			numTries = int(argv[i])
+		elif (argv[i] == "-seed"):
+			i += 1
+			seed = int(argv[i])
+		elif (argv[i] == "-world"):
+			i += 1
+			worldFile = argv[i]
+		elif (argv[i] == "-plan"):
+			usePlans = True
+		elif (argv[i] == "-trace"):
+			i += 1
+			traceFile = argv[i]
+		elif (argv[i] == "-verbose"):
+			verbose = True
+		else:
+			print("unknown option " + argv[i])
+			return 1
+		i += 1
+
+	# Set random number generator seed
+	if (seed is None):
+		seed = int(time.time())
+
+	agentClass = importlib.import_module(agentModule).Agent
+	recorder = None
+	if (traceFile is not None):
+		recorder = GameTrace.TraceRecorder(traceFile, {"agent": agentModule, "size": worldSize, "trials": numTrials,
+													   "tries": numTries, "seed": seed, "world": worldFile})
+
+	print("Welcome to the Wumpus World Simulator v" + WUMPSIM_VERSION + ".  Happy hunting!\n")
+
+	totalScore = 0
+	trialScore = 0
+	startTime = time.perf_counter()
+	for trial, tries, score, numMoves in RunTrials(agentClass, worldSize, numTrials, numTries, seed, worldFile,
+												   sys.stdout if verbose else None, usePlans, recorder):
+		trialScore += score
+		print("Trial " + str(trial) + ", Try " + str(tries) + " complete: Score = " + str(score) + "\n")
+		if (tries == numTries):
+			print("Trial " + str(trial) + " complete: Average score for trial = " + FormatScore(trialScore / numTries) + "\n")
+			totalScore += trialScore
+			trialScore = 0
+	seconds = time.perf_counter() - startTime
+	if (recorder is not None):
+		recorder.close()
+	print("All trials completed: Average score for all trials = " + FormatScore(totalScore / (numTrials * numTries)))
+	print("Thanks for playing!\n")
+	sys.stderr.write(str(numTrials * numTries) + " games in " + "%.3f" % seconds + " s\n")
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))